@@ -1,16 +1,41 @@
-from django.contrib import admin
-from .models import Author, Category, Book, UserProfile, Borrowing, Review, Contact, VisitLog
+from django.contrib import admin, messages
+from django.core.files.storage import default_storage
+from django.db.models import BooleanField, Case, Count, Value, When
+from django.db.models.functions import Now
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.utils import timezone
+
+from . import jobs
+from .forms import CatalogImportForm
+from .pagination import EstimatedCountPaginator
+from .models import (
+    Author, Category, Book, UserProfile, Borrowing, Review, Contact, VisitLog, Notification, Job,
+    DailyVisitStat, DailyCirculationStat, BookNeighbor, Hold,
+)
+
+
+class BookCountMixin:
+    """Annotate the changelist with the number of books instead of counting per row."""
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(_book_count=Count('books'))
+
+    @admin.display(description='Books', ordering='_book_count')
+    def book_count(self, obj):
+        return obj._book_count
 
 
 @admin.register(Author)
-class AuthorAdmin(admin.ModelAdmin):
+class AuthorAdmin(BookCountMixin, admin.ModelAdmin):
     list_display = ('name', 'book_count', 'created_at')
     search_fields = ('name', 'bio')
     list_per_page = 20
 
 
 @admin.register(Category)
-class CategoryAdmin(admin.ModelAdmin):
+class CategoryAdmin(BookCountMixin, admin.ModelAdmin):
     list_display = ('name', 'icon', 'book_count', 'created_at')
     search_fields = ('name',)
     list_per_page = 20
@@ -18,13 +43,16 @@ class CategoryAdmin(admin.ModelAdmin):
 
 @admin.register(Book)
 class BookAdmin(admin.ModelAdmin):
+    change_list_template = 'admin/library/book/change_list.html'
     list_display = ('title', 'author', 'category', 'publication_year', 'total_copies', 'available_copies', 'average_rating', 'created_at')
-    list_filter = ('category', 'author', 'language', 'publication_year')
-    search_fields = ('title', 'author__name', 'description')
+    list_filter = ('category', 'language', 'publication_year')
+    list_select_related = ('author', 'category')
+    search_fields = ('title', 'isbn', 'author__name', 'description')
+    autocomplete_fields = ('author', 'category')
     list_per_page = 20
     fieldsets = (
         ('Basic Information', {
-            'fields': ('title', 'author', 'category', 'description', 'cover_image')
+            'fields': ('title', 'isbn', 'author', 'category', 'description', 'cover_image')
         }),
         ('Details', {
             'fields': ('publication_year', 'pages', 'language')
@@ -34,27 +62,91 @@ class BookAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_urls(self):
+        return [
+            path('import/', self.admin_site.admin_view(self.import_view), name='library_book_import'),
+        ] + super().get_urls()
+
+    def import_view(self, request):
+        """Upload a catalog file and queue it for the job worker."""
+        if not self.has_add_permission(request):
+            return redirect('admin:library_book_changelist')
+        form = CatalogImportForm(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            upload = form.cleaned_data['file']
+            name = default_storage.save(f'imports/{timezone.now():%Y%m%d-%H%M%S}-{upload.name}', upload)
+            job, _ = jobs.enqueue('import_catalog', {
+                'name': name,
+                'kind': form.cleaned_data['kind'],
+                'dry_run': form.cleaned_data['dry_run'],
+            })
+            messages.success(request, f'Import queued as job #{job.pk}; the report will appear on the job once it runs.')
+            return redirect('admin:library_job_change', job.pk)
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'Import catalog',
+            'form': form,
+        }
+        return TemplateResponse(request, 'admin/library/book/import_catalog.html', context)
+
+    @admin.display(description='Average rating', ordering='rating_avg')
+    def average_rating(self, obj):
+        return obj.average_rating
+
 
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
-    list_display = ('user', 'phone', 'currently_borrowed_count', 'total_borrowed_count', 'created_at')
+    list_display = (
+        'user', 'phone', 'active_borrow_count', 'total_borrow_count', 'review_count', 'overdue_count', 'created_at',
+    )
+    list_select_related = ('user',)
     search_fields = ('user__username', 'user__email', 'phone')
+    raw_id_fields = ('user',)
+    readonly_fields = ('active_borrow_count', 'total_borrow_count', 'review_count', 'overdue_count')
     list_per_page = 20
 
+    def save_model(self, request, obj, form, change):
+        if not change:
+            obj.save()
+            UserProfile.objects.filter(pk=obj.pk).refresh_counters()
+        elif form.changed_data:
+            # A full save would write back counters read when the form loaded.
+            obj.save(update_fields=form.changed_data)
+
 
 @admin.register(Borrowing)
 class BorrowingAdmin(admin.ModelAdmin):
     list_display = ('user', 'book', 'borrow_date', 'due_date', 'return_date', 'returned', 'is_overdue')
-    list_filter = ('returned', 'borrow_date')
+    list_filter = ('returned', 'overdue', 'borrow_date')
+    list_select_related = ('user', 'book')
     search_fields = ('user__username', 'book__title')
+    raw_id_fields = ('user', 'book')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     list_per_page = 20
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            _is_overdue=Case(
+                When(returned=False, due_date__lt=Now(), then=Value(True)),
+                default=Value(False),
+                output_field=BooleanField(),
+            ),
+        )
+
+    @admin.display(description='Overdue', boolean=True, ordering='_is_overdue')
+    def is_overdue(self, obj):
+        return obj._is_overdue
+
 
 @admin.register(Review)
 class ReviewAdmin(admin.ModelAdmin):
     list_display = ('user', 'book', 'rating', 'created_at')
     list_filter = ('rating', 'created_at')
+    list_select_related = ('user', 'book')
     search_fields = ('user__username', 'book__title', 'comment')
+    raw_id_fields = ('user', 'book')
     list_per_page = 20
 
 
@@ -66,9 +158,88 @@ class ContactAdmin(admin.ModelAdmin):
     list_per_page = 20
 
 
+class MethodListFilter(admin.SimpleListFilter):
+    """Fixed HTTP methods, so the sidebar does not run SELECT DISTINCT over the whole log."""
+
+    title = 'HTTP method'
+    parameter_name = 'method'
+
+    def lookups(self, request, model_admin):
+        return [(method, method) for method in ('GET', 'POST', 'PUT', 'PATCH', 'DELETE', 'HEAD')]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(method=self.value())
+        return queryset
+
+
 @admin.register(VisitLog)
 class VisitLogAdmin(admin.ModelAdmin):
     list_display = ('path', 'method', 'ip_address', 'user', 'timestamp')
-    list_filter = ('method', 'timestamp')
+    list_filter = (MethodListFilter, 'timestamp')
+    list_select_related = ('user',)
     search_fields = ('path', 'ip_address')
+    raw_id_fields = ('user',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_per_page = 50
+
+
+@admin.register(Hold)
+class HoldAdmin(admin.ModelAdmin):
+    list_display = ('user', 'book', 'status', 'priority', 'created_at', 'expires_at')
+    list_filter = ('status',)
+    search_fields = ('user__username', 'book__title')
+    list_select_related = ('user', 'book')
+    raw_id_fields = ('user', 'book')
+    # Status changes go through library.inventory so copies follow the queue.
+    readonly_fields = ('status', 'ready_at', 'expires_at', 'closed_at')
+    list_per_page = 50
+
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ('user', 'kind', 'message', 'created_at', 'read_at')
+    list_filter = ('kind', 'created_at')
+    list_select_related = ('user',)
+    search_fields = ('user__username', 'message')
+    raw_id_fields = ('user', 'borrowing', 'hold')
+    list_per_page = 50
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('name', 'status', 'attempts', 'run_at', 'finished_at')
+    list_filter = ('status', 'name')
+    search_fields = ('name', 'key')
+    readonly_fields = ('attempts', 'locked_at', 'result', 'last_error', 'finished_at')
+    list_per_page = 50
+
+
+@admin.register(DailyVisitStat)
+class DailyVisitStatAdmin(admin.ModelAdmin):
+    list_display = ('date', 'path', 'user_type', 'views')
+    list_filter = ('user_type', 'date')
+    search_fields = ('path',)
+    date_hierarchy = 'date'
+    list_per_page = 50
+
+
+@admin.register(DailyCirculationStat)
+class DailyCirculationStatAdmin(admin.ModelAdmin):
+    list_display = ('date', 'book', 'category', 'borrows', 'returns')
+    list_filter = ('category', 'date')
+    search_fields = ('book__title',)
+    list_select_related = ('book', 'category')
+    raw_id_fields = ('book',)
+    date_hierarchy = 'date'
+    list_per_page = 50
+
+
+@admin.register(BookNeighbor)
+class BookNeighborAdmin(admin.ModelAdmin):
+    list_display = ('book', 'rank', 'neighbor', 'score', 'co_occurrences', 'computed_at')
+    search_fields = ('book__title',)
+    list_select_related = ('book', 'neighbor')
+    raw_id_fields = ('book', 'neighbor')
     list_per_page = 50
@@ -0,0 +1,138 @@
+"""
+Incremental usage analytics.
+
+Raw ``VisitLog`` and ``Borrowing`` rows are folded into daily counters
+(``DailyVisitStat``, ``DailyCirculationStat``) with ``INSERT ... SELECT ...
+GROUP BY ... ON CONFLICT DO UPDATE`` statements. Each source keeps a
+``RollupWatermark`` that is advanced in the same transaction as the counters
+it produced, so every row is counted exactly once and a run only reads rows
+added since the previous one.
+"""
+
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import Borrowing, RollupWatermark, VisitLog
+
+VISITS = 'visits'
+BORROWS = 'borrows'
+RETURNS = 'returns'
+
+# Returns are tracked by return_date; rows younger than this are left for the
+# next run so a transaction still in flight cannot be skipped.
+SETTLE_TIME = timedelta(seconds=60)
+
+DEFAULT_CHUNK_SIZE = 50000
+
+
+def _day(column):
+    if connection.vendor == 'sqlite':
+        return f'date({column})'
+    return f'CAST({column} AS date)'
+
+
+def _watermark(name):
+    watermark, _ = RollupWatermark.objects.select_for_update().get_or_create(name=name)
+    return watermark
+
+
+def _visit_sql():
+    return f"""
+        INSERT INTO library_dailyvisitstat (date, path, user_type, views)
+        SELECT {_day('v.timestamp')},
+               v.path,
+               CASE WHEN v.user_id IS NULL THEN 'anonymous'
+                    WHEN u.is_staff THEN 'staff'
+                    ELSE 'student' END,
+               COUNT(*)
+        FROM library_visitlog v
+        LEFT JOIN auth_user u ON u.id = v.user_id
+        WHERE v.id > %s AND v.id <= %s
+        GROUP BY 1, 2, 3
+        ON CONFLICT (date, path, user_type)
+        DO UPDATE SET views = library_dailyvisitstat.views + excluded.views
+    """
+
+
+def _circulation_sql(counter, day_column, where):
+    borrows, returns = ('COUNT(*)', '0') if counter == 'borrows' else ('0', 'COUNT(*)')
+    return f"""
+        INSERT INTO library_dailycirculationstat (date, book_id, category_id, borrows, returns)
+        SELECT {_day(day_column)}, br.book_id, b.category_id, {borrows}, {returns}
+        FROM library_borrowing br
+        JOIN library_book b ON b.id = br.book_id
+        WHERE {where}
+        GROUP BY 1, 2, 3
+        ON CONFLICT (date, book_id)
+        DO UPDATE SET {counter} = library_dailycirculationstat.{counter} + excluded.{counter},
+                      category_id = excluded.category_id
+    """
+
+
+def _rollup_by_id(name, model, sql, chunk_size):
+    """
+    Fold rows with ids above the watermark into counters, ``chunk_size`` ids
+    per transaction. Returns the number of counter rows written.
+    """
+    upper = model.objects.aggregate(last=Max('id'))['last'] or 0
+    written = 0
+    while True:
+        with transaction.atomic():
+            watermark = _watermark(name)
+            start = watermark.last_id
+            if start >= upper:
+                break
+            end = min(start + chunk_size, upper)
+            with connection.cursor() as cursor:
+                cursor.execute(sql, [start, end])
+                written += max(cursor.rowcount, 0)
+            watermark.last_id = end
+            watermark.save(update_fields=['last_id', 'updated_at'])
+    return written
+
+
+def rollup_visits(chunk_size=DEFAULT_CHUNK_SIZE):
+    return _rollup_by_id(VISITS, VisitLog, _visit_sql(), chunk_size)
+
+
+def rollup_borrows(chunk_size=DEFAULT_CHUNK_SIZE):
+    sql = _circulation_sql('borrows', 'br.borrow_date', 'br.id > %s AND br.id <= %s')
+    return _rollup_by_id(BORROWS, Borrowing, sql, chunk_size)
+
+
+def rollup_returns(now=None):
+    """Count returns whose return_date falls after the watermark (uses borrowing_return_date_idx)."""
+    cutoff = (now or timezone.now()) - SETTLE_TIME
+    adapt = connection.ops.adapt_datetimefield_value
+    with transaction.atomic():
+        watermark = _watermark(RETURNS)
+        start = watermark.last_timestamp
+        if start is not None and start >= cutoff:
+            return 0
+        where = 'br.return_date <= %s'
+        params = [adapt(cutoff)]
+        if start is not None:
+            where = 'br.return_date > %s AND ' + where
+            params.insert(0, adapt(start))
+        with connection.cursor() as cursor:
+            cursor.execute(_circulation_sql('returns', 'br.return_date', where), params)
+            written = max(cursor.rowcount, 0)
+        watermark.last_timestamp = cutoff
+        watermark.save(update_fields=['last_timestamp', 'updated_at'])
+    return written
+
+
+def rollup_all(chunk_size=DEFAULT_CHUNK_SIZE):
+    return {
+        VISITS: rollup_visits(chunk_size),
+        BORROWS: rollup_borrows(chunk_size),
+        RETURNS: rollup_returns(),
+    }
+
+
+def rolled_up_visit_id():
+    """Highest VisitLog id already folded into DailyVisitStat; older rows are safe to prune."""
+    return RollupWatermark.objects.filter(name=VISITS).values_list('last_id', flat=True).first() or 0
@@ -4,3 +4,6 @@ class LibraryConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'library'
     verbose_name = 'Library Management'
+
+    def ready(self):
+        from . import signals  # noqa: F401
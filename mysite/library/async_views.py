@@ -0,0 +1,104 @@
+"""
+Async versions of the read-only catalog pages, served under ASGI.
+
+Database work goes through the async ORM (``aget``, ``acount``, ``async
+for``). The async ORM runs each query in the thread-sensitive
+``sync_to_async`` executor, one at a time on a single thread, so the queries
+are awaited in turn: the gain is that the event loop is free for other
+requests while they run, not that one request's queries overlap. Templates
+are rendered through ``sync_to_async``: the context processors and the lazy
+``request.user`` read the session and auth tables synchronously, which
+Django refuses to do on the event loop.
+
+The book list shares its parameter handling, search and pagination with
+``views.all_books`` through ``views.CatalogListing``.
+
+``library.urls`` picks these views over the ones in ``library.views`` when
+LIBRARY_ASYNC_VIEWS is set.
+"""
+
+from asgiref.sync import sync_to_async
+from django.db.models import Count
+from django.shortcuts import aget_object_or_404, render
+
+from .conditional import (
+    authors_validators, book_validators, catalog_validators, categories_validators,
+    conditional_for_anonymous,
+)
+from .models import Book, Borrowing, Category, Hold, Review
+from .recommendations import similar_books
+from .stats import aget_home_stats
+from .pagination import KeysetPaginator
+from .views import (
+    AUTHOR_SORT_KEY, AUTHORS_PER_PAGE, CatalogListing, authors_with_book_counts, pagination_queries,
+)
+
+arender = sync_to_async(render)
+
+
+async def _alist(queryset):
+    return [obj async for obj in queryset]
+
+
+async def home(request):
+    context = await aget_home_stats()
+    return await arender(request, 'library/home.html', context)
+
+
+@conditional_for_anonymous(catalog_validators)
+async def all_books(request):
+    # The search runs in the constructor and is synchronous.
+    listing = await sync_to_async(CatalogListing)(request)
+    page_obj, total_count = await listing.apage()
+    categories = await _alist(Category.objects.all())
+    return await arender(request, 'library/books.html', listing.context(page_obj, total_count, categories))
+
+
+@conditional_for_anonymous(book_validators)
+async def book_detail(request, id):
+    user = await request.auser()
+    book = await aget_object_or_404(Book.objects.select_related('author', 'category'), id=id)
+    reviews = await _alist(Review.objects.for_display().filter(book_id=id))
+    similar = await _alist(similar_books(id))
+    user_has_borrowed = False
+    user_currently_borrowed = False
+    user_has_reviewed = False
+    user_hold = None
+
+    if user.is_authenticated:
+        user_has_borrowed = await Borrowing.objects.filter(user=user, book=book).aexists()
+        user_currently_borrowed = await Borrowing.objects.filter(user=user, book=book, returned=False).aexists()
+        user_has_reviewed = await Review.objects.filter(user=user, book=book).aexists()
+        user_hold = await Hold.objects.active().with_position().filter(user=user, book=book).afirst()
+
+    context = {
+        'book': book,
+        'reviews': reviews,
+        'similar_books': similar,
+        'user_has_borrowed': user_has_borrowed,
+        'user_currently_borrowed': user_currently_borrowed,
+        'user_has_reviewed': user_has_reviewed,
+        'user_hold': user_hold,
+    }
+    return await arender(request, 'library/book_detail.html', context)
+
+
+@conditional_for_anonymous(categories_validators)
+async def categories_page(request):
+    categories = await _alist(Category.objects.annotate(num_books=Count('books')))
+    context = {'categories': categories}
+    return await arender(request, 'library/categories.html', context)
+
+
+@conditional_for_anonymous(authors_validators)
+async def authors_page(request):
+    paginator = KeysetPaginator(authors_with_book_counts(), AUTHOR_SORT_KEY, AUTHORS_PER_PAGE)
+    page_obj = await paginator.aget_page(request.GET.get('cursor'))
+    previous_query, next_query = pagination_queries(request, page_obj)
+    context = {
+        'authors': page_obj,
+        'page_obj': page_obj,
+        'previous_query': previous_query,
+        'next_query': next_query,
+    }
+    return await arender(request, 'library/authors.html', context)
@@ -0,0 +1,132 @@
+"""
+Typeahead suggestions for book titles and author names.
+
+Suggestions live in a sorted array of normalized keys searched with bisect,
+so a prefix lookup costs O(log n + limit). The index is built lazily on the
+first lookup and patched in place from model signals afterwards.
+
+Each process keeps its own index, so every change also bumps a generation
+counter in the shared stats cache (``SUGGESTIONS_KEY``). A lookup compares
+it with the generation the index was built at and rebuilds when another
+process or the importer has changed the catalogue since.
+"""
+
+import threading
+from bisect import bisect_left, insort
+
+from . import stats
+from .models import Author, Book
+
+BOOK = 'book'
+AUTHOR = 'author'
+SUGGESTIONS_KEY = 'library:suggestions'
+
+
+def normalize(text):
+    return ' '.join((text or '').casefold().split())
+
+
+class SuggestionIndex:
+    def __init__(self, loader=None, shared_key=None):
+        self._loader = loader
+        self._shared_key = shared_key
+        self._lock = threading.RLock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.is_built = False
+            self._entries = []
+            self._keys = {}
+            self._generation = None
+
+    def build(self):
+        with self._lock:
+            if self.is_built:
+                return
+            # Read before loading, so a change made meanwhile triggers another build.
+            generation = stats.get_generation(self._shared_key) if self._shared_key else None
+            entries = []
+            keys = {}
+            for kind, pk, label in self._loader():
+                entry = (normalize(label), kind, pk, label)
+                entries.append(entry)
+                keys[(kind, pk)] = entry
+            entries.sort()
+            self._entries = entries
+            self._keys = keys
+            self._generation = generation
+            self.is_built = True
+
+    def invalidate(self):
+        """Drop this index and make every other process rebuild theirs."""
+        with self._lock:
+            if self._shared_key:
+                stats.bump_generation(self._shared_key)
+            self.reset()
+
+    def _publish(self):
+        # Called after patching this index. It stays current unless another
+        # change was published since it was built or last published.
+        if not self._shared_key:
+            return
+        generation = stats.bump_generation(self._shared_key)
+        if self.is_built and generation == self._generation + 1:
+            self._generation = generation
+        else:
+            self.reset()
+
+    def add(self, kind, pk, label):
+        with self._lock:
+            if self.is_built:
+                self._discard(kind, pk)
+                entry = (normalize(label), kind, pk, label)
+                insort(self._entries, entry)
+                self._keys[(kind, pk)] = entry
+            self._publish()
+
+    def remove(self, kind, pk):
+        with self._lock:
+            if self.is_built:
+                self._discard(kind, pk)
+            self._publish()
+
+    def _discard(self, kind, pk):
+        entry = self._keys.pop((kind, pk), None)
+        if entry is None:
+            return
+        position = bisect_left(self._entries, entry)
+        if position < len(self._entries) and self._entries[position] == entry:
+            del self._entries[position]
+
+    def suggest(self, prefix, limit=8):
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        with self._lock:
+            if self.is_built and self._shared_key and stats.get_generation(self._shared_key) != self._generation:
+                self.reset()
+            self.build()
+            entries = self._entries
+            position = bisect_left(entries, (prefix,))
+            results = []
+            while position < len(entries) and len(results) < limit:
+                key, kind, pk, label = entries[position]
+                if not key.startswith(prefix):
+                    break
+                results.append({'type': kind, 'id': pk, 'label': label})
+                position += 1
+            return results
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def load_catalog():
+    for pk, title in Book.objects.order_by().values_list('id', 'title').iterator(chunk_size=5000):
+        yield BOOK, pk, title
+    for pk, name in Author.objects.order_by().values_list('id', 'name').iterator(chunk_size=5000):
+        yield AUTHOR, pk, name
+
+
+suggestion_index = SuggestionIndex(load_catalog, shared_key=SUGGESTIONS_KEY)
@@ -0,0 +1,105 @@
+"""
+Mixed read/write workload for comparing SQLite database profiles.
+
+Each worker process runs several threads that, for a fixed duration, either
+read a catalog page (book cards plus a book's reviews) or write: a
+synchronous VisitLog insert or a borrow followed by a return. Lock failures
+are counted separately from business-rule outcomes such as an unavailable
+book.
+"""
+
+import random
+import threading
+import time
+
+from django.contrib.auth.models import User
+from django.db import OperationalError, connections
+from library import db, inventory
+from library.models import Book, Review, VisitLog
+
+from .runner import summarize
+
+READ = 'read'
+VISIT = 'visit'
+BORROW = 'borrow'
+
+
+def run_worker(threads, duration, write_ratio, seed, start_at=None):
+    """Run the workload in this process and return raw per-operation results."""
+    user_ids = list(User.objects.filter(is_staff=False).order_by('pk').values_list('pk', flat=True)[:500])
+    book_ids = list(Book.objects.order_by('pk').values_list('pk', flat=True)[:2000])
+    connections.close_all()
+    if start_at:
+        time.sleep(max(start_at - time.time(), 0))
+    deadline = time.perf_counter() + duration
+    results = {READ: [], VISIT: [], BORROW: []}
+    failures = {'locked': 0, 'other': 0}
+    lock = threading.Lock()
+
+    def worker(index):
+        rng = random.Random(seed * 1000 + index)
+        local = {READ: [], VISIT: [], BORROW: []}
+        local_failures = {'locked': 0, 'other': 0}
+        try:
+            while time.perf_counter() < deadline:
+                if rng.random() >= write_ratio:
+                    kind = READ
+                else:
+                    kind = VISIT if rng.random() < 0.7 else BORROW
+                started = time.perf_counter()
+                try:
+                    if kind == READ:
+                        book_id = rng.choice(book_ids)
+                        list(Book.objects.for_cards().order_by('-created_at', '-id')[:24])
+                        list(Review.objects.for_display().filter(book_id=book_id)[:10])
+                    elif kind == VISIT:
+                        VisitLog.objects.create(path=f'/book/{rng.choice(book_ids)}/', method='GET')
+                    else:
+                        user = User(pk=rng.choice(user_ids))
+                        book = Book(pk=rng.choice(book_ids))
+                        try:
+                            borrowing = inventory.borrow(user, book)
+                        except inventory.BorrowingError:
+                            pass
+                        else:
+                            inventory.return_borrowing(borrowing)
+                except OperationalError as exc:
+                    local_failures['locked' if db.is_locked_error(exc) else 'other'] += 1
+                    continue
+                local[kind].append((time.perf_counter() - started) * 1000)
+        finally:
+            connections.close_all()
+            with lock:
+                for key, values in local.items():
+                    results[key].extend(values)
+                for key, value in local_failures.items():
+                    failures[key] += value
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return {'latencies': results, 'failures': failures, 'retries': dict(db.retry_stats)}
+
+
+def aggregate(worker_results, duration):
+    """Combine the raw results of every worker process into one summary."""
+    latencies = {READ: [], VISIT: [], BORROW: []}
+    failures = {'locked': 0, 'other': 0}
+    retries = 0
+    for result in worker_results:
+        for key, values in result['latencies'].items():
+            latencies[key].extend(values)
+        for key, value in result['failures'].items():
+            failures[key] += value
+        retries += result['retries']['retries']
+    total = sum(len(values) for values in latencies.values())
+    return {
+        'ops': total,
+        'ops_per_s': round(total / duration, 1),
+        'operations': {key: summarize(values) for key, values in latencies.items()},
+        'locked_errors': failures['locked'],
+        'other_errors': failures['other'],
+        'retries': retries,
+    }
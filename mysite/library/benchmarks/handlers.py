@@ -0,0 +1,183 @@
+"""
+Load generators that drive Django's WSGI and ASGI handlers directly.
+
+``run_wsgi_load`` calls ``WSGIHandler`` from a pool of threads, the way a
+threaded WSGI server would; ``run_asgi_load`` runs many concurrent requests
+through ``ASGIHandler`` on one event loop, the way an ASGI server would.
+Both exercise the full middleware stack, views and templates but no socket
+or HTTP parsing, so the numbers compare the two request paths rather than
+any particular server.
+"""
+
+import asyncio
+import io
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connections
+
+from .runner import summarize
+
+HOST = 'localhost'
+
+
+def wsgi_environ(url):
+    parts = urlsplit(url)
+    return {
+        'REQUEST_METHOD': 'GET',
+        'SCRIPT_NAME': '',
+        'PATH_INFO': parts.path,
+        'QUERY_STRING': parts.query,
+        'SERVER_NAME': HOST,
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': HOST,
+        'REMOTE_ADDR': '127.0.0.1',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+
+
+def asgi_scope(url):
+    parts = urlsplit(url)
+    return {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': parts.path,
+        'raw_path': parts.path.encode(),
+        'query_string': parts.query.encode(),
+        'root_path': '',
+        'headers': [(b'host', HOST.encode())],
+        'client': ('127.0.0.1', 0),
+        'server': (HOST, 80),
+    }
+
+
+def run_wsgi_load(paths, threads=8, duration=10.0, warmup=True):
+    """Request ``paths`` round-robin from ``threads`` threads for ``duration`` seconds."""
+    application = WSGIHandler()
+    if warmup:
+        for path in paths:
+            application(wsgi_environ(path), lambda status, headers, exc_info=None: None).close()
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+
+    def worker(offset):
+        local, local_errors = [], 0
+        position = offset
+        status = []
+
+        def start_response(value, headers, exc_info=None):
+            status.append(int(value.split()[0]))
+
+        try:
+            while time.perf_counter() < deadline:
+                path = paths[position % len(paths)]
+                position += 1
+                status.clear()
+                started = time.perf_counter()
+                try:
+                    response = application(wsgi_environ(path), start_response)
+                    for _ in response:
+                        pass
+                    response.close()
+                    failed = not status or status[0] >= 400
+                except Exception:
+                    failed = True
+                local.append((time.perf_counter() - started) * 1000)
+                local_errors += failed
+        finally:
+            connections.close_all()
+            with lock:
+                latencies.extend(local)
+                errors[0] += local_errors
+
+    deadline = time.perf_counter() + duration
+    started = time.perf_counter()
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    summary = summarize(latencies, errors=errors[0])
+    summary.update(concurrency=threads, duration_s=round(elapsed, 3), rps=round(len(latencies) / elapsed, 1))
+    return summary
+
+
+async def asgi_request(application, url):
+    """Send one GET through ``application`` and return the response status."""
+    done = asyncio.Event()
+    status = []
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        # Django listens for a disconnect while the view runs; only send one
+        # once the response is complete.
+        await done.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+        elif message['type'] == 'http.response.body' and not message.get('more_body'):
+            done.set()
+
+    try:
+        await application(asgi_scope(url), receive, send)
+    finally:
+        done.set()
+    return status[0] if status else 500
+
+
+def run_asgi_load(paths, concurrency=8, duration=10.0, warmup=True):
+    """Keep ``concurrency`` requests in flight on one event loop for ``duration`` seconds."""
+    application = ASGIHandler()
+    latencies = []
+    errors = [0]
+
+    async def worker(offset, deadline):
+        position = offset
+        while time.perf_counter() < deadline:
+            path = paths[position % len(paths)]
+            position += 1
+            started = time.perf_counter()
+            try:
+                failed = await asgi_request(application, path) >= 400
+            except Exception:
+                failed = True
+            latencies.append((time.perf_counter() - started) * 1000)
+            errors[0] += failed
+
+    async def main():
+        if warmup:
+            for path in paths:
+                await asgi_request(application, path)
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i, started + duration) for i in range(concurrency)))
+        return time.perf_counter() - started
+
+    elapsed = asyncio.run(main())
+    connections.close_all()
+
+    summary = summarize(latencies, errors=errors[0])
+    summary.update(concurrency=concurrency, duration_s=round(elapsed, 3), rps=round(len(latencies) / elapsed, 1))
+    return summary
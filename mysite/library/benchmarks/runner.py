@@ -0,0 +1,141 @@
+"""
+Latency, query-count and throughput measurement for the view benchmarks.
+
+Requests go through the Django test client, so the numbers cover URL
+resolution, middleware, views, ORM and template rendering but not a real
+HTTP server.
+"""
+
+import statistics
+import threading
+import time
+
+from django.db import connections
+from django.test import Client
+from library.db import execute_wrapper_all
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = max(int(round(fraction * len(sorted_values))) - 1, 0)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+def summarize(latencies, queries=None, errors=0):
+    latencies = sorted(latencies)
+    summary = {
+        'requests': len(latencies),
+        'errors': errors,
+        'mean_ms': round(statistics.mean(latencies), 3) if latencies else 0.0,
+        'p50_ms': round(percentile(latencies, 0.50), 3),
+        'p95_ms': round(percentile(latencies, 0.95), 3),
+        'p99_ms': round(percentile(latencies, 0.99), 3),
+    }
+    if queries is not None:
+        summary['queries'] = max(queries) if queries else 0
+    return summary
+
+
+class QueryCounter:
+    """Counts queries on the current thread's connections."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def make_clients(user):
+    anonymous = Client()
+    student = Client()
+    if user is not None:
+        student.force_login(user)
+    return anonymous, student
+
+
+def measure_targets(targets, user, iterations=20, warmup=2):
+    """Request each target sequentially and return per-target latency stats."""
+    anonymous, student = make_clients(user)
+    results = {}
+    for name, path, needs_login in targets:
+        if needs_login and user is None:
+            continue
+        client = student if needs_login else anonymous
+        for _ in range(warmup):
+            client.get(path)
+        latencies, queries, errors = [], [], 0
+        for _ in range(iterations):
+            counter = QueryCounter()
+            started = time.perf_counter()
+            with execute_wrapper_all(counter):
+                response = client.get(path)
+            latencies.append((time.perf_counter() - started) * 1000)
+            queries.append(counter.count)
+            if response.status_code >= 400:
+                errors += 1
+        results[name] = dict(summarize(latencies, queries, errors), path=path)
+    return results
+
+
+def run_load(targets, user, threads=8, duration=10.0):
+    """Hammer the targets from several threads and report throughput."""
+    targets = [target for target in targets if user is not None or not target[2]]
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker(offset):
+        anonymous, student = make_clients(user)
+        local, local_errors = [], 0
+        position = offset
+        try:
+            while time.perf_counter() < deadline:
+                _, path, needs_login = targets[position % len(targets)]
+                position += 1
+                client = student if needs_login else anonymous
+                started = time.perf_counter()
+                try:
+                    response = client.get(path)
+                    failed = response.status_code >= 400
+                except Exception:
+                    failed = True
+                local.append((time.perf_counter() - started) * 1000)
+                local_errors += failed
+        finally:
+            connections.close_all()
+            with lock:
+                latencies.extend(local)
+                errors[0] += local_errors
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    summary = summarize(latencies, errors=errors[0])
+    summary.update(threads=threads, duration_s=round(elapsed, 3), rps=round(len(latencies) / elapsed, 1))
+    return summary
+
+
+def compare(results, baseline, tolerance=0.2):
+    """Return human-readable regressions of ``results`` against ``baseline``."""
+    regressions = []
+    for name, base in baseline.get('views', {}).items():
+        current = results.get('views', {}).get(name)
+        if current is None:
+            continue
+        if current['p95_ms'] > base['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {base['p95_ms']:.1f}ms -> {current['p95_ms']:.1f}ms")
+        if current.get('queries', 0) > base.get('queries', 0):
+            regressions.append(f"{name}: queries {base.get('queries', 0)} -> {current['queries']}")
+    base_load, load = baseline.get('load'), results.get('load')
+    if base_load and load and load['rps'] < base_load['rps'] * (1 - tolerance):
+        regressions.append(f"load: {base_load['rps']:.1f} -> {load['rps']:.1f} req/s")
+    return regressions
@@ -0,0 +1,60 @@
+"""
+The set of pages exercised by the view benchmarks.
+"""
+
+from itertools import product
+
+from library.models import Author, Book, Borrowing, Category
+
+SORTS = ['newest', 'oldest', 'highest_rated']
+
+
+def build_targets(search_term='history'):
+    """Return (name, path, needs_login) for every read-only page in library/urls.py."""
+    book = Book.objects.order_by('-created_at').first()
+    author = Author.objects.first()
+    category = Category.objects.first()
+
+    targets = [
+        ('home', '/', False),
+        ('categories', '/categories/', False),
+        ('authors', '/authors/', False),
+        ('contact', '/contact/', False),
+        ('login', '/login/', False),
+        ('register', '/register/', False),
+        ('autocomplete', f'/books/autocomplete/?q={search_term[:3]}', False),
+    ]
+
+    category_options = [None] + ([category.id] if category else [])
+    for sort, category_id, query in product(SORTS + ['relevance'], category_options, [None, search_term]):
+        if sort == 'relevance' and not query:
+            continue
+        params = [f'sort={sort}']
+        name = f'all_books sort={sort}'
+        if category_id:
+            params.append(f'category={category_id}')
+            name += ' category'
+        if query:
+            params.append(f'q={query}')
+            name += ' q'
+        targets.append((name, '/books/?' + '&'.join(params), False))
+
+    if book:
+        targets.append(('book_detail', f'/book/{book.id}/', False))
+    if category:
+        targets.append(('category_books', f'/category/{category.id}/', False))
+    if author:
+        targets.append(('author_detail', f'/author/{author.id}/', False))
+
+    logged_in = [
+        ('home (student)', '/', True),
+        ('profile', '/profile/', True),
+        ('profile_edit', '/profile/edit/', True),
+        ('my_books', '/my-books/', True),
+    ]
+    if book:
+        logged_in.append(('book_detail (student)', f'/book/{book.id}/', True))
+    borrowing = Borrowing.objects.first()
+    if borrowing:
+        logged_in.append(('add_review', f'/book/{borrowing.book_id}/review/', True))
+    return targets + logged_in
@@ -0,0 +1,138 @@
+"""
+Conditional GET support for the public catalog pages.
+
+Anonymous requests get an ETag and Last-Modified derived from cheap
+watermark queries, so a repeat request for an unchanged page is answered
+with 304 before the view queries or renders anything, and a shared cache in
+front of the site can store the page. Whole tables are summarised by
+max(updated_at), an index lookup, plus a deletion counter kept in
+``RollupWatermark`` by post_delete signals (``count_deletion``), since a
+delete leaves the maximum unchanged; counting the rows would scan the
+table on every request.
+Logged-in users see personalised markup and always get a fresh response.
+"""
+
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db.models import Count, F, Max
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+
+from .models import Author, Book, BookNeighbor, Category, Review, RollupWatermark
+
+
+def _watermark(queryset, field='updated_at'):
+    return queryset.order_by().aggregate(modified=Max(field), count=Count('pk'))
+
+
+def _deletions_name(model):
+    return f'deletions:{model._meta.label_lower}'
+
+
+def count_deletion(model):
+    """Bump the deletion counter that stands in for ``model``'s row count in the validators."""
+    name = _deletions_name(model)
+    if not RollupWatermark.objects.filter(name=name).update(last_id=F('last_id') + 1):
+        RollupWatermark.objects.get_or_create(name=name)
+        RollupWatermark.objects.filter(name=name).update(last_id=F('last_id') + 1)
+
+
+def _table_watermarks(*models):
+    names = [_deletions_name(model) for model in models]
+    deletions = dict(RollupWatermark.objects.filter(name__in=names).values_list('name', 'last_id'))
+    return [
+        {
+            'modified': model.objects.order_by().aggregate(modified=Max('updated_at'))['modified'],
+            'deleted': deletions.get(name, 0),
+        }
+        for model, name in zip(models, names)
+    ]
+
+
+def _validators(*watermarks):
+    modified = [mark['modified'] for mark in watermarks if mark.get('modified')]
+    digest = hashlib.sha1(repr(watermarks).encode()).hexdigest()
+    return {'etag': digest, 'last_modified': max(modified) if modified else None}
+
+
+def catalog_validators(request, **kwargs):
+    return _validators(*_table_watermarks(Book, Category))
+
+
+def authors_validators(request, **kwargs):
+    return _validators(*_table_watermarks(Author, Book))
+
+
+def categories_validators(request, **kwargs):
+    return _validators(*_table_watermarks(Category, Book))
+
+
+def book_validators(request, id, **kwargs):
+    book = Book.objects.filter(pk=id).values(
+        'updated_at', 'author__updated_at', 'category__updated_at'
+    ).first()
+    if book is None:
+        return {'etag': None, 'last_modified': None}
+    reviews = _watermark(Review.objects.filter(book_id=id), field='created_at')
+    neighbors = _watermark(BookNeighbor.objects.filter(book_id=id), field='computed_at')
+    modified = {'modified': max(value for value in book.values() if value)}
+    return _validators(modified, book, reviews, neighbors)
+
+
+def _has_pending_messages(request):
+    # A 304 would leave a flash message unread until some later page.
+    return bool(request.COOKIES.get(getattr(settings, 'MESSAGE_COOKIE_NAME', 'messages')))
+
+
+def conditional_for_anonymous(validators):
+    """Apply ETag/Last-Modified handling and public caching to anonymous GETs."""
+
+    def decorator(view):
+        def get_validators(request, *args, **kwargs):
+            if not hasattr(request, '_catalog_validators'):
+                request._catalog_validators = validators(request, *args, **kwargs)
+            return request._catalog_validators
+
+        conditional_view = condition(
+            etag_func=lambda request, *args, **kwargs: get_validators(request, *args, **kwargs)['etag'],
+            last_modified_func=lambda request, *args, **kwargs: get_validators(request, *args, **kwargs)['last_modified'],
+        )(view)
+
+        def add_cache_headers(response):
+            if response.status_code in (200, 304):
+                patch_cache_control(response, public=True, max_age=getattr(settings, 'LIBRARY_CATALOG_MAX_AGE', 60))
+                patch_vary_headers(response, ['Cookie'])
+            return response
+
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapped(request, *args, **kwargs):
+                if (
+                    request.method not in ('GET', 'HEAD')
+                    or (await request.auser()).is_authenticated
+                    or _has_pending_messages(request)
+                ):
+                    return await view(request, *args, **kwargs)
+                # condition() calls the validator functions synchronously, so
+                # compute them in a thread first; it then reads the cached values.
+                await sync_to_async(get_validators)(request, *args, **kwargs)
+                return add_cache_headers(await conditional_view(request, *args, **kwargs))
+
+            return async_wrapped
+
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            if (
+                request.method not in ('GET', 'HEAD')
+                or request.user.is_authenticated
+                or _has_pending_messages(request)
+            ):
+                return view(request, *args, **kwargs)
+            return add_cache_headers(conditional_view(request, *args, **kwargs))
+
+        return wrapped
+
+    return decorator
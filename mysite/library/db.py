@@ -0,0 +1,137 @@
+"""
+SQLite production profile.
+
+``sqlite_production_databases`` builds a DATABASES setting with two aliases
+on the same file: ``default`` is the single writer (WAL journal,
+``synchronous=NORMAL``, IMMEDIATE transactions so a transaction takes the
+write lock up front instead of failing on a lock upgrade) and ``replica``
+is a ``query_only`` connection for reads. In WAL mode readers never block
+the writer and the writer never blocks readers. ``PrimaryReplicaRouter``
+sends reads to ``replica`` except inside a transaction on ``default``, which
+must see its own uncommitted writes.
+
+``retry_on_locked`` retries a whole write transaction a few times when
+SQLite still reports the database as locked after its busy timeout.
+"""
+
+import contextlib
+import functools
+import logging
+import random
+import threading
+import time
+
+from django.db import OperationalError, connections
+
+logger = logging.getLogger(__name__)
+
+WRITER = 'default'
+READER = 'replica'
+
+WRITER_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -64000,  # KiB, i.e. 64 MB
+    'mmap_size': 268435456,  # 256 MB
+    'temp_store': 'MEMORY',
+    'journal_size_limit': 67108864,
+}
+READER_PRAGMAS = {
+    'query_only': 'ON',
+    'cache_size': -64000,
+    'mmap_size': 268435456,
+    'temp_store': 'MEMORY',
+}
+
+
+def init_command(pragmas):
+    return ';'.join(f'PRAGMA {name} = {value}' for name, value in pragmas.items())
+
+
+def sqlite_production_databases(path, timeout=20):
+    """DATABASES setting for a WAL-mode writer plus a read-only alias on ``path``."""
+    writer = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': path,
+        'OPTIONS': {
+            'timeout': timeout,
+            'transaction_mode': 'IMMEDIATE',
+            'init_command': init_command(WRITER_PRAGMAS),
+        },
+    }
+    reader = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': path,
+        'OPTIONS': {
+            'timeout': timeout,
+            'init_command': init_command(READER_PRAGMAS),
+        },
+        'TEST': {'MIRROR': WRITER},
+    }
+    return {WRITER: writer, READER: reader}
+
+
+class PrimaryReplicaRouter:
+    """Route reads to the ``replica`` alias and everything else to ``default``."""
+
+    def db_for_read(self, model, **hints):
+        if READER not in connections.settings or connections[WRITER].in_atomic_block:
+            return WRITER
+        return READER
+
+    def db_for_write(self, model, **hints):
+        return WRITER
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == WRITER
+
+
+@contextlib.contextmanager
+def execute_wrapper_all(wrapper):
+    """``execute_wrapper`` installed on every configured alias (reads may go to the replica)."""
+    with contextlib.ExitStack() as stack:
+        for alias in connections.settings:
+            stack.enter_context(connections[alias].execute_wrapper(wrapper))
+        yield
+
+
+retry_stats = {'retries': 0, 'gave_up': 0}
+_stats_lock = threading.Lock()
+
+
+def is_locked_error(exc):
+    message = str(exc).lower()
+    return 'database is locked' in message or 'database table is locked' in message or 'busy' in message
+
+
+def retry_on_locked(attempts=4, delay=0.05, using=WRITER):
+    """
+    Retry the decorated function when SQLite reports a lock conflict.
+
+    Only the outermost transaction is retried: inside an enclosing atomic
+    block the error is re-raised, since that transaction is already broken.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            connection = connections[using]
+            if connection.vendor != 'sqlite' or connection.in_atomic_block:
+                return func(*args, **kwargs)
+            for attempt in range(1, attempts + 1):
+                try:
+                    return func(*args, **kwargs)
+                except OperationalError as exc:
+                    if not is_locked_error(exc) or attempt == attempts:
+                        if is_locked_error(exc):
+                            with _stats_lock:
+                                retry_stats['gave_up'] += 1
+                        raise
+                    with _stats_lock:
+                        retry_stats['retries'] += 1
+                    logger.info('%s: database locked, retry %d/%d', func.__qualname__, attempt, attempts - 1)
+                    time.sleep(delay * 2 ** (attempt - 1) * (0.5 + random.random()))
+        return wrapper
+    return decorator
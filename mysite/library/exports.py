@@ -0,0 +1,160 @@
+"""
+Streaming exports of the library tables as CSV or JSON Lines.
+
+Rows are read with ``values_list`` in primary-key batches (keyset, not
+OFFSET) and encoded into ~64 KB chunks, optionally gzip-compressed on the
+fly, so memory stays flat however large the table is. Each batch is its own
+short query; on SQLite that keeps a long download from holding a read lock
+that would block writers for its whole duration.
+"""
+
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime, time, timedelta
+
+from django.utils import timezone
+
+from .models import Book, Borrowing, Review, VisitLog
+
+FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+CHUNK_BYTES = 64 * 1024
+
+# Spreadsheets evaluate cells starting with these as formulas, so text that
+# users typed (titles, review comments) could run when staff open a CSV.
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+class Dataset:
+    def __init__(self, model, fields, date_field, category_field=None):
+        self.model = model
+        self.fields = fields
+        self.date_field = date_field
+        self.category_field = category_field
+
+    @property
+    def headers(self):
+        return [field.replace('__', '_') for field in self.fields]
+
+    def queryset(self, start=None, end=None, category=None):
+        queryset = self.model.objects.order_by()
+        if start:
+            queryset = queryset.filter(**{f'{self.date_field}__gte': _day_start(start)})
+        if end:
+            queryset = queryset.filter(**{f'{self.date_field}__lt': _day_start(end + timedelta(days=1))})
+        if category:
+            if self.category_field is None:
+                raise ValueError(f'{self.model._meta.verbose_name_plural} cannot be filtered by category')
+            queryset = queryset.filter(**{self.category_field: category})
+        return queryset
+
+
+DATASETS = {
+    'books': Dataset(
+        Book,
+        ['id', 'isbn', 'title', 'author__name', 'category__name', 'publication_year', 'pages', 'language',
+         'total_copies', 'available_copies', 'rating_count', 'rating_avg', 'created_at'],
+        'created_at', 'category_id',
+    ),
+    'borrowings': Dataset(
+        Borrowing,
+        ['id', 'user__username', 'book_id', 'book__title', 'borrow_date', 'due_date',
+         'return_date', 'returned', 'overdue'],
+        'borrow_date', 'book__category_id',
+    ),
+    'reviews': Dataset(
+        Review,
+        ['id', 'user__username', 'book_id', 'book__title', 'rating', 'comment', 'created_at'],
+        'created_at', 'book__category_id',
+    ),
+    'visits': Dataset(
+        VisitLog,
+        ['id', 'path', 'method', 'ip_address', 'user__username', 'timestamp'],
+        'timestamp',
+    ),
+}
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min), timezone.get_current_timezone())
+
+
+def iter_rows(queryset, fields, chunk_size=2000):
+    """Yield ``values_list`` tuples of ``fields`` in primary-key order, one query per chunk."""
+    queryset = queryset.order_by('pk').values_list('pk', *fields)
+    last = None
+    while True:
+        page = queryset if last is None else queryset.filter(pk__gt=last)
+        batch = list(page[:chunk_size])
+        if not batch:
+            return
+        for row in batch:
+            yield row[1:]
+        last = batch[-1][0]
+
+
+def _plain(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _csv_cell(value):
+    if value is None:
+        return ''
+    value = _plain(value)
+    # A leading quote makes the spreadsheet show the text as typed.
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def iter_csv(headers, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(headers)
+    for row in rows:
+        writer.writerow([_csv_cell(value) for value in row])
+        if buffer.tell() >= CHUNK_BYTES:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def iter_jsonl(headers, rows):
+    lines = []
+    size = 0
+    for row in rows:
+        line = json.dumps(dict(zip(headers, map(_plain, row))), ensure_ascii=False) + '\n'
+        lines.append(line)
+        size += len(line)
+        if size >= CHUNK_BYTES:
+            yield ''.join(lines).encode()
+            lines, size = [], 0
+    yield ''.join(lines).encode()
+
+
+def gzip_chunks(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 writes a gzip header
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def stream_export(name, fmt='csv', start=None, end=None, category=None, compress=False, chunk_size=2000):
+    """Byte chunks of dataset ``name`` in ``fmt``; raises KeyError/ValueError for bad arguments."""
+    dataset = DATASETS[name]
+    if fmt not in FORMATS:
+        raise ValueError(f'Unknown format: {fmt}')
+    rows = iter_rows(dataset.queryset(start, end, category), dataset.fields, chunk_size)
+    encode = iter_csv if fmt == 'csv' else iter_jsonl
+    chunks = encode(dataset.headers, rows)
+    return gzip_chunks(chunks) if compress else chunks
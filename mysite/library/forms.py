@@ -1,6 +1,8 @@
 from django import forms
 from django.contrib.auth.models import User
 from django.contrib.auth.forms import AuthenticationForm
+from django.template.defaultfilters import filesizeformat
+from . import images
 from .models import Review, Contact, UserProfile
 
 
@@ -112,6 +114,20 @@ class ProfileEditForm(forms.Form):
         widget=forms.PasswordInput(attrs={'class': 'form-control', 'placeholder': 'Confirm New Password'})
     )
 
+    def clean_profile_picture(self):
+        picture = self.cleaned_data.get('profile_picture')
+        if not picture:
+            return picture
+        max_bytes, max_dimension = images.get_upload_limits()
+        if picture.size > max_bytes:
+            raise forms.ValidationError(f"The picture must be smaller than {filesizeformat(max_bytes)}.")
+        # ImageField has already opened the file with Pillow and kept the header.
+        if picture.image.format not in images.UPLOAD_FORMATS:
+            raise forms.ValidationError("Upload a JPEG, PNG or WebP picture.")
+        if max(picture.image.size) > max_dimension:
+            raise forms.ValidationError(f"The picture must be at most {max_dimension} pixels wide and high.")
+        return images.normalize_upload(picture)
+
     def clean(self):
         cleaned_data = super().clean()
         new_password = cleaned_data.get('new_password')
@@ -119,3 +135,9 @@ class ProfileEditForm(forms.Form):
         if new_password and new_password != confirm_new_password:
             raise forms.ValidationError("New passwords do not match.")
         return cleaned_data
+
+
+class CatalogImportForm(forms.Form):
+    kind = forms.ChoiceField(choices=[('books', 'Books'), ('authors', 'Authors'), ('categories', 'Categories')])
+    file = forms.FileField(help_text='CSV or JSON Lines, optionally gzipped (.csv, .jsonl, .csv.gz, .jsonl.gz)')
+    dry_run = forms.BooleanField(required=False, initial=True, help_text='Validate only, write nothing')
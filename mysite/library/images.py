@@ -0,0 +1,189 @@
+"""
+Derivative images for book covers, author photos and profile pictures.
+
+Each source image is resized to a few widths in WebP and JPEG and stored
+under ``thumbs/`` with content-hashed names, so derivatives are immutable
+and can be cached forever. A small JSON manifest per source, stored under
+a hash of the source's name, records what was generated, so pages never
+need to open the original image. Derivatives are made when a new file is
+saved or by ``manage.py generate_thumbnails``, never while rendering.
+
+Profile picture uploads are checked and re-encoded by ``normalize_upload``
+before they are stored, which also drops EXIF and other metadata.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+THUMB_DIR = 'thumbs'
+FORMATS = {
+    'webp': ('WEBP', 'image/webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'image/jpeg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+# Formats accepted for uploads, with the extension and options they are re-encoded with.
+UPLOAD_FORMATS = {
+    'JPEG': ('jpg', {'quality': 90, 'optimize': True}),
+    'PNG': ('png', {'optimize': True}),
+    'WEBP': ('webp', {'quality': 90}),
+}
+
+
+def get_widths():
+    return tuple(getattr(settings, 'LIBRARY_IMAGE_WIDTHS', (160, 320, 640)))
+
+
+def content_hash(name, storage=default_storage):
+    digest = hashlib.sha1()
+    with storage.open(name, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(65536), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:20]
+
+
+def get_upload_limits():
+    """Largest accepted upload as (bytes, pixels on the longer side)."""
+    return (
+        getattr(settings, 'LIBRARY_UPLOAD_MAX_BYTES', 5 * 1024 * 1024),
+        getattr(settings, 'LIBRARY_UPLOAD_MAX_DIMENSION', 4096),
+    )
+
+
+def _name_key(name):
+    return hashlib.sha1(name.encode()).hexdigest()
+
+
+def _manifest_path(name):
+    key = _name_key(name)
+    return f'{THUMB_DIR}/{key[:2]}/{key}.json'
+
+
+def _derivative_path(digest, width, ext):
+    return f'{THUMB_DIR}/{digest[:2]}/{digest}-{width}w.{ext}'
+
+
+def _prepare(image, fmt):
+    if fmt == 'JPEG' and image.mode != 'RGB':
+        # JPEG has no alpha channel; flatten transparent images onto white.
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        rgba = image.convert('RGBA')
+        background.paste(rgba, mask=rgba.getchannel('A'))
+        return background
+    if image.mode not in ('RGB', 'RGBA'):
+        return image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+    return image
+
+
+def _read_manifest(name, storage):
+    path = _manifest_path(name)
+    if not storage.exists(path):
+        return None
+    with storage.open(path, 'rb') as fh:
+        return json.loads(fh.read())
+
+
+def generate_derivatives(name, storage=default_storage, refresh=False):
+    """
+    Create the resized copies of ``name`` if missing and return its manifest.
+
+    An existing manifest is returned as is unless ``refresh`` is set, which
+    is needed when a new file was saved under a name that was used before.
+    """
+    manifest_path = _manifest_path(name)
+    if not refresh:
+        manifest = _read_manifest(name, storage)
+        if manifest is not None:
+            return manifest
+
+    digest = content_hash(name, storage)
+    with storage.open(name, 'rb') as fh:
+        image = ImageOps.exif_transpose(Image.open(fh))
+        image.load()
+
+    widths = sorted({min(width, image.width) for width in get_widths()})
+    sources = {}
+    for ext, (fmt, _, options) in FORMATS.items():
+        prepared = _prepare(image, fmt)
+        sources[ext] = []
+        for width in widths:
+            path = _derivative_path(digest, width, ext)
+            if not storage.exists(path):
+                resized = prepared.copy()
+                resized.thumbnail((width, width * 10), Image.LANCZOS)
+                buffer = BytesIO()
+                resized.save(buffer, fmt, **options)
+                path = storage.save(path, ContentFile(buffer.getvalue()))
+            sources[ext].append([width, path])
+
+    manifest = {'hash': digest, 'width': image.width, 'height': image.height, 'sources': sources}
+    if storage.exists(manifest_path):
+        storage.delete(manifest_path)
+    storage.save(manifest_path, ContentFile(json.dumps(manifest).encode()))
+    return manifest
+
+
+def _cache_key(name):
+    return 'library:image:' + _name_key(name)
+
+
+def _cache():
+    return caches[getattr(settings, 'LIBRARY_STATS_CACHE', 'default')]
+
+
+def get_manifest(name, storage=default_storage):
+    """
+    Manifest for ``name``, or None if its derivatives have not been made yet.
+
+    Only the small manifest is read; the original is never opened here, so
+    this is safe on the request path.
+    """
+    cache = _cache()
+    manifest = cache.get(_cache_key(name))
+    if manifest is None:
+        manifest = _read_manifest(name, storage)
+        if manifest is not None:
+            cache.set(_cache_key(name), manifest, None)
+    return manifest
+
+
+def process_upload(field):
+    """Generate derivatives for a freshly saved image field; never raises."""
+    if not field:
+        return None
+    try:
+        manifest = generate_derivatives(field.name, field.storage, refresh=True)
+    except Exception:
+        logger.exception('Could not generate derivatives for %s', field.name)
+        return None
+    _cache().set(_cache_key(field.name), manifest, None)
+    return manifest
+
+
+def normalize_upload(upload):
+    """
+    Re-encode an uploaded image that passed the form checks.
+
+    The copy is rotated upright and saved without EXIF, XMP or other
+    metadata, in the upload's own format.
+    """
+    upload.seek(0)
+    with Image.open(upload) as original:
+        fmt = original.format
+        image = ImageOps.exif_transpose(original)
+        image.load()
+    extension, options = UPLOAD_FORMATS[fmt]
+    buffer = BytesIO()
+    # Pillow only writes metadata that is passed to save(), so none is kept.
+    _prepare(image, fmt).save(buffer, fmt, **options)
+    stem = os.path.splitext(os.path.basename(upload.name))[0]
+    return ContentFile(buffer.getvalue(), name=f'{stem}.{extension}')
@@ -0,0 +1,327 @@
+"""
+Bulk import of categories, authors and books from CSV or JSON Lines.
+
+Rows are validated one at a time; a bad row is reported with its line
+number and skipped, never aborting the file. Author and category names are
+resolved through in-memory casefolded name -> id maps loaded once per
+import, and valid rows are written in chunks: authors and categories
+matched through the maps are updated and the rest created, books are
+upserted with ``bulk_create(update_conflicts=True)`` keyed on
+``Book.isbn``. Re-importing a file therefore updates rows in place.
+Existing books keep their inventory counts; only new books take
+``total_copies`` from the file.
+"""
+
+import csv
+import gzip
+import io
+import json
+import time
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import search, stats
+from .autocomplete import suggestion_index
+from .models import Author, Book, Category
+
+CATEGORIES = 'categories'
+AUTHORS = 'authors'
+BOOKS = 'books'
+KINDS = (CATEGORIES, AUTHORS, BOOKS)
+
+
+class RowError(ValueError):
+    pass
+
+
+def read_records(fileobj, fmt):
+    """Yield ``(line_number, record, error)`` from a binary file object."""
+    text = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+    if fmt == 'csv':
+        reader = csv.DictReader(text)
+        for record in reader:
+            yield reader.line_num, record, None
+        return
+    for line_number, line in enumerate(text, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as exc:
+            yield line_number, None, f'invalid JSON: {exc}'
+            continue
+        if not isinstance(record, dict):
+            yield line_number, None, 'expected a JSON object'
+            continue
+        yield line_number, record, None
+
+
+def source_format(name):
+    """``'csv'`` or ``'jsonl'`` from a file name, ignoring a trailing .gz."""
+    name = str(name).lower().removesuffix('.gz')
+    return 'jsonl' if name.endswith(('.jsonl', '.ndjson', '.json')) else 'csv'
+
+
+def _text(record, field, max_length, required=False):
+    value = record.get(field)
+    value = '' if value is None else str(value).strip()
+    if required and not value:
+        raise RowError(f'{field} is required')
+    if len(value) > max_length:
+        raise RowError(f'{field} is longer than {max_length} characters')
+    return value
+
+
+def _integer(record, field, default, minimum=0, maximum=None):
+    value = record.get(field)
+    if value is None or value == '':
+        return default
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise RowError(f'{field} must be an integer')
+    if value < minimum:
+        raise RowError(f'{field} must be at least {minimum}')
+    if maximum is not None and value > maximum:
+        raise RowError(f'{field} must be at most {maximum}')
+    return value
+
+
+def normalize_isbn(value):
+    isbn = str(value or '').replace('-', '').replace(' ', '').upper()
+    if not isbn:
+        raise RowError('isbn is required')
+    if len(isbn) == 10 and isbn[:9].isdigit() and (isbn[9].isdigit() or isbn[9] == 'X'):
+        return isbn
+    if len(isbn) == 13 and isbn.isdigit():
+        return isbn
+    raise RowError(f'invalid isbn {value!r}')
+
+
+def _name_key(name):
+    return ' '.join(name.casefold().split())
+
+
+class CatalogImporter:
+    def __init__(self, kind, dry_run=False, chunk_size=1000, max_errors=100, progress=None):
+        if kind not in KINDS:
+            raise ValueError(f'Unknown import kind: {kind}')
+        self.kind = kind
+        self.dry_run = dry_run
+        self.chunk_size = chunk_size
+        self.max_errors = max_errors
+        self.progress = progress
+        self.errors = []
+        self.error_count = 0
+        self.rows = 0
+        self.valid = 0
+        self.written = 0
+        self.created_authors = 0
+        self.created_categories = 0
+        self.authors = {}
+        self.categories = {}
+        self.max_year = timezone.now().year + 1
+
+    def load_maps(self):
+        # First id wins when the table already holds duplicate names.
+        for pk, name in Author.objects.order_by('-pk').values_list('pk', 'name').iterator(chunk_size=5000):
+            self.authors[_name_key(name)] = pk
+        for pk, name in Category.objects.values_list('pk', 'name'):
+            self.categories[_name_key(name)] = pk
+
+    def error(self, line_number, message):
+        self.error_count += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append((line_number, message))
+
+    def run(self, records):
+        started = time.perf_counter()
+        self.load_maps()
+        clean = getattr(self, f'clean_{self.kind}')
+        write = getattr(self, f'write_{self.kind}')
+        chunk = {}
+        for line_number, record, error in records:
+            self.rows += 1
+            if error is None:
+                try:
+                    key, row = clean(record)
+                except RowError as exc:
+                    error = str(exc)
+            if error is not None:
+                self.error(line_number, error)
+                continue
+            self.valid += 1
+            # Later lines win within a chunk; a single upsert cannot touch a row twice.
+            chunk.pop(key, None)
+            chunk[key] = row
+            if len(chunk) >= self.chunk_size:
+                self.flush(write, chunk, started)
+                chunk = {}
+        if chunk:
+            self.flush(write, chunk, started)
+        if self.written and not self.dry_run:
+            suggestion_index.invalidate()
+            stats.invalidate(stats.HOME_STATS_KEY)
+        return self.report(time.perf_counter() - started)
+
+    def flush(self, write, chunk, started):
+        if self.dry_run:
+            self.written += len(chunk)
+        else:
+            with transaction.atomic():
+                self.written += write(list(chunk.values()))
+        if self.progress:
+            self.progress(self.rows, self.rows / max(time.perf_counter() - started, 1e-9))
+
+    def report(self, elapsed):
+        return {
+            'kind': self.kind,
+            'dry_run': self.dry_run,
+            'rows': self.rows,
+            'valid': self.valid,
+            'written': self.written,
+            'created_authors': self.created_authors,
+            'created_categories': self.created_categories,
+            'error_count': self.error_count,
+            'errors': self.errors,
+            'seconds': round(elapsed, 3),
+            'rows_per_second': round(self.rows / max(elapsed, 1e-9)),
+        }
+
+    # --- Validation ---
+
+    def count_new(self, name, names, attr):
+        # Dry runs write nothing, so count the names a real run would create.
+        if self.dry_run and name and _name_key(name) not in names:
+            names[_name_key(name)] = None
+            setattr(self, attr, getattr(self, attr) + 1)
+
+    def clean_categories(self, record):
+        name = _text(record, 'name', 100, required=True)
+        self.count_new(name, self.categories, 'created_categories')
+        return _name_key(name), {'name': name, 'icon': _text(record, 'icon', 50) or None}
+
+    def clean_authors(self, record):
+        name = _text(record, 'name', 200, required=True)
+        self.count_new(name, self.authors, 'created_authors')
+        return _name_key(name), {'name': name, 'bio': record.get('bio') or None}
+
+    def clean_books(self, record):
+        isbn = normalize_isbn(record.get('isbn'))
+        row = {
+            'isbn': isbn,
+            'title': _text(record, 'title', 300, required=True),
+            'author': _text(record, 'author', 200, required=True),
+            'category': _text(record, 'category', 100),
+            'description': str(record.get('description') or ''),
+            'publication_year': _integer(record, 'publication_year', 2024, 0, self.max_year),
+            'pages': _integer(record, 'pages', 0),
+            'language': _text(record, 'language', 50) or 'English',
+            'total_copies': _integer(record, 'total_copies', 1, 1),
+        }
+        self.count_new(row['author'], self.authors, 'created_authors')
+        self.count_new(row['category'], self.categories, 'created_categories')
+        return isbn, row
+
+    # --- Writing ---
+
+    def write_categories(self, rows):
+        # Matched on the same casefolded key as the map, so "fiction" updates
+        # "Fiction" rather than inserting a second category.
+        now = timezone.now()
+        existing = []
+        new = []
+        for row in rows:
+            pk = self.categories.get(_name_key(row['name']))
+            if pk is None:
+                new.append(Category(name=row['name'], **({'icon': row['icon']} if row['icon'] else {})))
+            elif row['icon']:
+                existing.append(Category(pk=pk, icon=row['icon'], updated_at=now))
+        Category.objects.bulk_update(existing, ['icon', 'updated_at'], batch_size=self.chunk_size)
+        self.create_categories(new)
+        return len(rows)
+
+    def write_authors(self, rows):
+        existing = []
+        new = []
+        for row in rows:
+            pk = self.authors.get(_name_key(row['name']))
+            if pk is None:
+                new.append(Author(name=row['name'], bio=row['bio'] or ''))
+            elif row['bio'] is not None:
+                existing.append(Author(pk=pk, name=row['name'], bio=row['bio'], updated_at=timezone.now()))
+        Author.objects.bulk_update(existing, ['name', 'bio', 'updated_at'], batch_size=self.chunk_size)
+        for author in Author.objects.bulk_create(new):
+            self.authors[_name_key(author.name)] = author.pk
+        self.created_authors += len(new)
+        return len(rows)
+
+    def write_books(self, rows):
+        missing_authors = {}
+        missing_categories = {}
+        for row in rows:
+            if _name_key(row['author']) not in self.authors:
+                missing_authors[_name_key(row['author'])] = row['author']
+            if row['category'] and _name_key(row['category']) not in self.categories:
+                missing_categories[_name_key(row['category'])] = row['category']
+        if missing_authors:
+            for author in Author.objects.bulk_create([Author(name=name) for name in missing_authors.values()]):
+                self.authors[_name_key(author.name)] = author.pk
+            self.created_authors += len(missing_authors)
+        if missing_categories:
+            self.create_categories([Category(name=name) for name in missing_categories.values()])
+
+        books = [
+            Book(
+                isbn=row['isbn'],
+                title=row['title'],
+                author_id=self.authors[_name_key(row['author'])],
+                category_id=self.categories.get(_name_key(row['category'])) if row['category'] else None,
+                description=row['description'],
+                publication_year=row['publication_year'],
+                pages=row['pages'],
+                language=row['language'],
+                total_copies=row['total_copies'],
+                available_copies=row['total_copies'],
+            )
+            for row in rows
+        ]
+        Book.objects.bulk_create(
+            books,
+            update_conflicts=True,
+            unique_fields=['isbn'],
+            update_fields=[
+                'title', 'author', 'category', 'description', 'publication_year', 'pages', 'language',
+                'updated_at',
+            ],
+        )
+        isbns = [row['isbn'] for row in rows]
+        search.index_books(f"b.isbn IN ({', '.join(['%s'] * len(isbns))})", isbns)
+        return len(books)
+
+    def create_categories(self, categories):
+        """Insert ``categories`` not already present and count the ones actually created."""
+        if not categories:
+            return
+        known = set(self.categories)
+        # A concurrent import may have added the same name since the map was loaded.
+        Category.objects.bulk_create(categories, ignore_conflicts=True)
+        self.refresh_category_map()
+        self.created_categories += len(set(self.categories) - known)
+
+    def refresh_category_map(self):
+        self.categories = {_name_key(name): pk for pk, name in Category.objects.values_list('pk', 'name')}
+
+
+def import_fileobj(fileobj, name, kind, dry_run=False, **options):
+    """Import from an open binary file; ``name`` selects the format and gzip handling."""
+    if str(name).lower().endswith('.gz'):
+        fileobj = gzip.GzipFile(fileobj=fileobj)
+    importer = CatalogImporter(kind, dry_run=dry_run, **options)
+    return importer.run(read_records(fileobj, source_format(name)))
+
+
+def import_file(path, kind, dry_run=False, **options):
+    with open(path, 'rb') as fileobj:
+        return import_fileobj(fileobj, path, kind, dry_run=dry_run, **options)
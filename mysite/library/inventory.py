@@ -0,0 +1,233 @@
+"""
+Transactional borrow/return operations.
+
+Copies are claimed with a single conditional UPDATE
+(``available_copies = available_copies - 1 WHERE available_copies > 0``), so
+two students can never take the same last copy, and the per-student checks
+run inside the same transaction as the claim.
+
+When no copy is free, students can place a hold. A returned copy goes to the
+first waiting hold (highest priority, then oldest) instead of the shelf: the
+holder is found with one lookup on the ``hold_queue_idx`` partial index and
+claimed with a conditional UPDATE, in the same transaction as the return.
+The copy stays reserved for HOLD_PICKUP_WINDOW; an expired hold passes it on
+to the next in line (``expire_holds``).
+
+Each student's borrowing counters on UserProfile move with the same
+transactions, and the borrow limit is enforced by the conditional UPDATE
+that bumps them rather than by counting active borrowings. Borrowings
+created any other way (admin, shell, fixtures) are counted by a post_save
+receiver instead.
+"""
+
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .db import retry_on_locked
+from .models import Book, Borrowing, Hold, Notification, UserProfile
+
+MAX_ACTIVE_BORROWINGS = 5
+LOAN_PERIOD = timedelta(days=14)
+MAX_ACTIVE_HOLDS = 5
+HOLD_PICKUP_WINDOW = timedelta(days=3)
+
+
+class BorrowingError(Exception):
+    pass
+
+
+class BookUnavailable(BorrowingError):
+    pass
+
+
+class AlreadyBorrowed(BorrowingError):
+    pass
+
+
+class BorrowLimitReached(BorrowingError):
+    pass
+
+
+class AlreadyReturned(BorrowingError):
+    pass
+
+
+class BookAvailable(BorrowingError):
+    pass
+
+
+class AlreadyOnHold(BorrowingError):
+    pass
+
+
+class HoldLimitReached(BorrowingError):
+    pass
+
+
+class HoldNotActive(BorrowingError):
+    pass
+
+
+@retry_on_locked()
+def borrow(user, book):
+    """Lend one copy of ``book`` to ``user`` and return the new Borrowing."""
+    now = timezone.now()
+    with transaction.atomic():
+        # Claiming the copy first takes the write lock on SQLite before any
+        # per-student reads, so the checks below cannot interleave. A copy
+        # held for this student was already taken off the shelf.
+        from_hold = Hold.objects.filter(user=user, book=book, status=Hold.READY, expires_at__gt=now).update(
+            status=Hold.FULFILLED,
+            closed_at=now,
+        )
+        if not from_hold:
+            claimed = Book.objects.filter(pk=book.pk, available_copies__gt=0).update(
+                available_copies=F('available_copies') - 1,
+                updated_at=now,
+            )
+            if not claimed:
+                raise BookUnavailable
+
+        # Bumping the counters locks the student's profile row, which also
+        # serialises the check below against their other borrows.
+        below_limit = UserProfile.objects.filter(user=user, active_borrow_count__lt=MAX_ACTIVE_BORROWINGS)
+        if not below_limit.adjust_counters(active_borrow_count=1, total_borrow_count=1):
+            # Accounts created outside the sign-up form may have no profile yet.
+            profile = UserProfile.objects.get_for_user(user)
+            if profile.active_borrow_count >= MAX_ACTIVE_BORROWINGS or not below_limit.adjust_counters(
+                active_borrow_count=1, total_borrow_count=1,
+            ):
+                raise BorrowLimitReached
+        if Borrowing.objects.filter(user=user, book=book, returned=False).exists():
+            raise AlreadyBorrowed
+
+        borrowing = Borrowing(user=user, book=book, due_date=now + LOAN_PERIOD)
+        # Counted above; tells the post_save receiver not to count it again.
+        borrowing._counted = True
+        borrowing.save(force_insert=True)
+        if from_hold:
+            Notification.objects.filter(
+                user=user, hold__book=book, kind=Notification.HOLD_READY, read_at__isnull=True,
+            ).update(read_at=now)
+        else:
+            # A waiting student who found a copy on the shelf leaves the queue.
+            Hold.objects.filter(user=user, book=book, status=Hold.WAITING).update(
+                status=Hold.FULFILLED,
+                closed_at=now,
+            )
+        return borrowing
+
+
+@retry_on_locked()
+def return_borrowing(borrowing):
+    """Mark ``borrowing`` returned and put its copy back on the shelf."""
+    now = timezone.now()
+    with transaction.atomic():
+        updated = Borrowing.objects.filter(pk=borrowing.pk, returned=False).update(
+            returned=True,
+            return_date=now,
+        )
+        if not updated:
+            raise AlreadyReturned
+
+        # Read back after the UPDATE: mark_overdue may have flagged it since it was loaded.
+        user_id, overdue = Borrowing.objects.values_list('user_id', 'overdue').get(pk=borrowing.pk)
+        UserProfile.objects.filter(user_id=user_id).adjust_counters(
+            active_borrow_count=-1,
+            overdue_count=-1 if overdue else 0,
+        )
+        _release_copy(borrowing.book_id, now)
+        Notification.objects.filter(borrowing_id=borrowing.pk, read_at__isnull=True).update(read_at=now)
+    borrowing.returned = True
+    borrowing.return_date = now
+    return borrowing
+
+
+def _release_copy(book_id, now):
+    """
+    Give a freed copy of ``book_id`` to the next waiting hold, or put it back
+    on the shelf. Runs inside the caller's transaction; returns the hold that
+    got the copy, if any.
+    """
+    # Locking the book row first serialises releases of the same book and
+    # orders them against place_hold: a hold committed before us is in the
+    # queue below, one committed after us finds the copy on the shelf.
+    Book.objects.filter(pk=book_id).update(updated_at=now)
+    while True:
+        hold = Hold.objects.queue(book_id).first()
+        if hold is None:
+            Book.objects.filter(pk=book_id).update(available_copies=F('available_copies') + 1)
+            return None
+        expires_at = now + HOLD_PICKUP_WINDOW
+        # A concurrent cancel_hold may have withdrawn it; then try the next one.
+        if Hold.objects.filter(pk=hold.pk, status=Hold.WAITING).update(
+            status=Hold.READY,
+            ready_at=timezone.now(),
+            expires_at=expires_at,
+        ):
+            break
+    title = Book.objects.values_list('title', flat=True).get(pk=book_id)
+    Notification.objects.create(
+        user_id=hold.user_id,
+        hold=hold,
+        kind=Notification.HOLD_READY,
+        message=f'"{title}" is waiting for you. Borrow it by {expires_at:%B %d, %Y}.',
+    )
+    return hold
+
+
+@retry_on_locked()
+def place_hold(user, book, priority=0):
+    """Put ``user`` in the queue for ``book``, which must have no free copy."""
+    with transaction.atomic():
+        # Inserting first takes the write lock on SQLite; the partial unique
+        # constraint rejects a second active hold for the same book.
+        try:
+            with transaction.atomic():
+                hold = Hold.objects.create(user=user, book=book, priority=priority)
+        except IntegrityError:
+            raise AlreadyOnHold
+
+        available = Book.objects.select_for_update().filter(pk=book.pk).values_list('available_copies', flat=True)
+        if available.first():
+            raise BookAvailable
+        if Borrowing.objects.filter(user=user, book=book, returned=False).exists():
+            raise AlreadyBorrowed
+        # The new hold is already counted.
+        if Hold.objects.filter(user=user).active().count() > MAX_ACTIVE_HOLDS:
+            raise HoldLimitReached
+        return hold
+
+
+@retry_on_locked()
+def cancel_hold(hold):
+    """Withdraw ``hold``; a copy it was holding goes to the next in line."""
+    now = timezone.now()
+    with transaction.atomic():
+        was_ready = Hold.objects.filter(pk=hold.pk, status=Hold.READY).update(status=Hold.CANCELLED, closed_at=now)
+        if was_ready:
+            _release_copy(hold.book_id, now)
+        elif not Hold.objects.filter(pk=hold.pk, status=Hold.WAITING).update(status=Hold.CANCELLED, closed_at=now):
+            raise HoldNotActive
+        Notification.objects.filter(hold_id=hold.pk, read_at__isnull=True).update(read_at=now)
+    hold.status = Hold.CANCELLED
+    hold.closed_at = now
+    return hold
+
+
+@retry_on_locked()
+def expire_hold(hold_id, now):
+    """Expire one ready hold past its pickup deadline; returns whether it expired."""
+    with transaction.atomic():
+        expired = Hold.objects.filter(pk=hold_id, status=Hold.READY, expires_at__lte=now).update(
+            status=Hold.EXPIRED,
+            closed_at=now,
+        )
+        if expired:
+            book_id = Hold.objects.values_list('book_id', flat=True).get(pk=hold_id)
+            _release_copy(book_id, now)
+            Notification.objects.filter(hold_id=hold_id, read_at__isnull=True).update(read_at=now)
+    return bool(expired)
@@ -0,0 +1,220 @@
+"""
+A small database-backed job queue.
+
+Jobs are rows in ``library_job`` keyed by an idempotency key, so enqueuing
+the same work twice is a no-op. Workers (``manage.py run_jobs``) claim a job
+with a conditional UPDATE on its status, which keeps two workers from
+running the same job, and failed jobs are retried with a growing delay.
+Handlers are registered with ``@job('name')`` and must be safe to re-run.
+"""
+
+import logging
+import traceback
+import uuid
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import analytics, importer, inventory, recommendations
+from .db import retry_on_locked
+from .models import Borrowing, Hold, Job, Notification, UserProfile
+
+logger = logging.getLogger(__name__)
+
+HANDLERS = {}
+
+
+def job(name):
+    def register(func):
+        HANDLERS[name] = func
+        return func
+    return register
+
+
+def get_setting(name, default):
+    return getattr(settings, name, default)
+
+
+def enqueue(name, payload=None, key=None, run_at=None):
+    """Queue ``name`` unless a job with the same ``key`` already exists; returns (job, created)."""
+    if name not in HANDLERS:
+        raise KeyError(f'Unknown job: {name}')
+    key = key or f'{name}:{uuid.uuid4().hex}'
+    try:
+        with transaction.atomic():
+            return Job.objects.create(
+                name=name, key=key, payload=payload or {}, run_at=run_at or timezone.now(),
+            ), True
+    except IntegrityError:
+        return Job.objects.get(key=key), False
+
+
+def schedule_periodic(now=None):
+    """Enqueue one job per interval for every entry of LIBRARY_PERIODIC_JOBS."""
+    now = now or timezone.now()
+    for name, interval in get_setting('LIBRARY_PERIODIC_JOBS', {}).items():
+        slot = int(now.timestamp()) // int(interval)
+        enqueue(name, key=f'{name}:{slot}')
+
+
+def claim_next(now=None):
+    """Lock the oldest runnable job for this worker, or return None."""
+    now = now or timezone.now()
+    stale = now - timedelta(seconds=get_setting('LIBRARY_JOB_TIMEOUT', 600))
+    runnable = Q(status=Job.PENDING, run_at__lte=now) | Q(status=Job.RUNNING, locked_at__lt=stale)
+    for candidate in Job.objects.filter(runnable).order_by('run_at', 'id').values('id', 'status')[:10]:
+        claimed = Job.objects.filter(pk=candidate['id'], status=candidate['status']).filter(runnable).update(
+            status=Job.RUNNING,
+            locked_at=now,
+            attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return Job.objects.get(pk=candidate['id'])
+    return None
+
+
+def run_job(job):
+    handler = HANDLERS.get(job.name)
+    try:
+        if handler is None:
+            raise KeyError(f'Unknown job: {job.name}')
+        result = handler(**job.payload)
+    except Exception:
+        job.last_error = traceback.format_exc()
+        logger.exception('Job %s (%s) failed', job.pk, job.name)
+        if job.attempts >= get_setting('LIBRARY_JOB_MAX_ATTEMPTS', 3):
+            job.status = Job.FAILED
+            job.finished_at = timezone.now()
+        else:
+            job.status = Job.PENDING
+            job.run_at = timezone.now() + timedelta(seconds=30 * 2 ** job.attempts)
+        job.locked_at = None
+        job.save(update_fields=['status', 'run_at', 'locked_at', 'last_error', 'finished_at'])
+        return False
+
+    job.status = Job.DONE
+    job.result = result
+    job.locked_at = None
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'result', 'locked_at', 'finished_at'])
+    return True
+
+
+def run_pending(limit=None):
+    """Run runnable jobs until the queue is empty or ``limit`` jobs ran; returns the count."""
+    count = 0
+    while limit is None or count < limit:
+        job = claim_next()
+        if job is None:
+            break
+        run_job(job)
+        count += 1
+    return count
+
+
+@job('mark_overdue')
+def mark_overdue(batch_size=None):
+    """
+    Flag active borrowings past their due date and notify their students.
+
+    Walks the ``borrowing_unflagged_due_idx`` partial index in batches; the
+    notification unique constraint and the ``overdue=False`` guard make a
+    re-run after a crash pick up where the last one stopped.
+    """
+    batch_size = batch_size or get_setting('LIBRARY_JOB_BATCH_SIZE', 500)
+    now = timezone.now()
+    pending = Borrowing.objects.filter(returned=False, overdue=False, due_date__lt=now).order_by('due_date', 'id')
+    flagged = 0
+    while True:
+        batch = list(pending.values_list('id', flat=True)[:batch_size])
+        if not batch:
+            break
+        flagged += _flag_overdue(batch, now)
+    return {'flagged': flagged}
+
+
+@retry_on_locked()
+def _flag_overdue(borrowing_ids, now):
+    """
+    Flag and notify the borrowings in ``borrowing_ids`` that are still out
+    and unflagged; returns how many were flagged. Copies returned since the
+    batch was read get neither a notification nor an ``overdue_count`` bump.
+    """
+    with transaction.atomic():
+        # Re-read under lock: row locks on PostgreSQL; on SQLite the
+        # production profile's IMMEDIATE transactions hold the write lock
+        # from the start, and a lock upgrade that fails is retried.
+        still_due = list(
+            Borrowing.objects.select_for_update(of=('self',))
+            .filter(pk__in=borrowing_ids, returned=False, overdue=False)
+            .values_list('id', 'user_id', 'due_date', 'book__title')
+        )
+        if not still_due:
+            return 0
+        Notification.objects.bulk_create(
+            [
+                Notification(
+                    user_id=user_id,
+                    borrowing_id=borrowing_id,
+                    kind=Notification.OVERDUE,
+                    message=f'"{title}" was due on {due_date:%B %d, %Y}. Please return it.',
+                    created_at=now,
+                )
+                for borrowing_id, user_id, due_date, title in still_due
+            ],
+            ignore_conflicts=True,
+        )
+        flagged = Borrowing.objects.filter(pk__in=[row[0] for row in still_due]).update(overdue=True)
+        students = defaultdict(list)
+        for user_id, count in Counter(row[1] for row in still_due).items():
+            students[count].append(user_id)
+        for count, user_ids in students.items():
+            UserProfile.objects.filter(user_id__in=user_ids).adjust_counters(overdue_count=count)
+    return flagged
+
+
+@job('expire_holds')
+def expire_holds(batch_size=None):
+    """
+    Expire holds that were not picked up in time and pass their copies on.
+
+    Walks the ``hold_ready_expiry_idx`` partial index; each hold expires in
+    its own short transaction, which also hands the copy to the next holder.
+    """
+    batch_size = batch_size or get_setting('LIBRARY_JOB_BATCH_SIZE', 500)
+    now = timezone.now()
+    pending = Hold.objects.filter(status=Hold.READY, expires_at__lte=now).order_by('expires_at')
+    expired = 0
+    while True:
+        batch = list(pending.values_list('id', flat=True)[:batch_size])
+        if not batch:
+            break
+        for hold_id in batch:
+            expired += inventory.expire_hold(hold_id, now)
+    return {'expired': expired}
+
+
+@job('rollup_analytics')
+def rollup_analytics(chunk_size=None):
+    """Fold new VisitLog and Borrowing rows into the daily analytics tables."""
+    return analytics.rollup_all(chunk_size or analytics.DEFAULT_CHUNK_SIZE)
+
+
+@job('build_recommendations')
+def build_recommendations(full=False):
+    """Refresh "readers also borrowed" lists and personal recommendations."""
+    return recommendations.build(full=full)
+
+
+@job('import_catalog')
+def import_catalog(name, kind, dry_run=False):
+    """Import an uploaded catalog file from default storage (queued by the Book admin)."""
+    with default_storage.open(name, 'rb') as fileobj:
+        report = importer.import_fileobj(fileobj, name, kind, dry_run=dry_run)
+    report['errors'] = report['errors'][:50]
+    return report
@@ -0,0 +1,104 @@
+"""
+Management command to compare threaded WSGI with ASGI on the catalog pages.
+Each mode runs in its own process: WSGI with the sync views from a pool of
+threads, ASGI with the async views (library.async_views) from concurrent
+tasks on one event loop, and optionally ASGI with the sync views to separate
+the cost of the async handler from that of the views. Requests go straight
+to Django's handlers, without a server or socket in between.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from library.benchmarks import handlers
+from library.models import Author, Book, Category
+
+MODES = {
+    # name: (handler, async views)
+    'wsgi': ('wsgi', False),
+    'asgi': ('asgi', True),
+    'asgi-sync-views': ('asgi', False),
+}
+
+
+class Command(BaseCommand):
+    help = 'Load test the catalog pages under threaded WSGI and ASGI and compare throughput'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=8, help='Threads (WSGI) or in-flight requests (ASGI)')
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds per mode')
+        parser.add_argument('--modes', nargs='+', choices=MODES, default=['wsgi', 'asgi'])
+        parser.add_argument('--search-term', default='history', help='Query used for the search page')
+        parser.add_argument('--output', help='Write the results as JSON to this file')
+        parser.add_argument('--paths', nargs='+', help='Pages to request (default: the five catalog pages)')
+        parser.add_argument('--worker', choices=MODES, help='Internal: run one mode in this process')
+
+    def handle(self, *args, **options):
+        if options['worker']:
+            result = self.run_worker(options['worker'], options['paths'], options)
+            self.stdout.write(json.dumps(result))
+            return
+
+        paths = options['paths'] or self.build_paths(options['search_term'])
+        if not paths:
+            raise CommandError('The catalog is empty; run seed_data first.')
+        results = {}
+        for mode in options['modes']:
+            self.stdout.write(f'Running {mode} for {options["duration"]:.0f}s...')
+            results[mode] = self.run_mode(mode, paths, options)
+
+        self.report(results)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump({'paths': paths, 'results': results}, fh, indent=2)
+            self.stdout.write(f'Results written to {options["output"]}')
+
+    def build_paths(self, search_term):
+        book = Book.objects.order_by('-created_at').first()
+        if book is None:
+            return []
+        paths = ['/', '/books/', f'/books/?q={search_term}', f'/book/{book.id}/']
+        if Category.objects.exists():
+            paths.append('/categories/')
+        if Author.objects.exists():
+            paths.append('/authors/')
+        return paths
+
+    def run_mode(self, mode, paths, options):
+        _, async_views = MODES[mode]
+        env = dict(os.environ, LIBRARY_ASYNC_VIEWS='1' if async_views else '0')
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [str(settings.BASE_DIR), env.get('PYTHONPATH')]))
+        command = [
+            sys.executable, '-m', 'django', 'benchmark_asgi', '--worker', mode,
+            '--concurrency', str(options['concurrency']),
+            '--duration', str(options['duration']),
+            '--paths', *paths,
+        ]
+        worker = subprocess.run(command, env=env, stdout=subprocess.PIPE, text=True)
+        if worker.returncode != 0:
+            raise CommandError(f'The {mode} worker failed.')
+        return json.loads(worker.stdout.strip().splitlines()[-1])
+
+    def run_worker(self, mode, paths, options):
+        handler, async_views = MODES[mode]
+        if settings.LIBRARY_ASYNC_VIEWS != async_views:
+            raise CommandError(f'LIBRARY_ASYNC_VIEWS must be {int(async_views)} for the {mode} mode.')
+        run = handlers.run_asgi_load if handler == 'asgi' else handlers.run_wsgi_load
+        return run(paths, options['concurrency'], options['duration'])
+
+    def report(self, results):
+        self.stdout.write(
+            f"\n{'mode':<16} {'req/s':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'errors':>7}"
+        )
+        for mode, summary in results.items():
+            self.stdout.write(
+                f"{mode:<16} {summary['rps']:>8.1f} {summary['p50_ms']:>7.1f}ms "
+                f"{summary['p95_ms']:>7.1f}ms {summary['p99_ms']:>7.1f}ms {summary['errors']:>7}"
+            )
+        if {'wsgi', 'asgi'} <= results.keys() and results['wsgi']['rps']:
+            ratio = results['asgi']['rps'] / results['wsgi']['rps']
+            self.stdout.write(self.style.SUCCESS(f'\nASGI throughput: {ratio:.2f}x threaded WSGI.'))
@@ -0,0 +1,58 @@
+"""
+Management command to micro-benchmark the autocomplete suggestion index.
+Builds an in-memory index of synthetic titles (no database access) and
+times random prefix lookups against it.
+"""
+
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from library.autocomplete import BOOK, SuggestionIndex
+
+WORDS = [
+    'history', 'secret', 'garden', 'night', 'river', 'empire', 'code', 'clean', 'brief',
+    'universe', 'shadow', 'mountain', 'silent', 'city', 'glass', 'winter', 'island', 'machine',
+    'theory', 'voyage', 'kingdom', 'stone', 'ocean', 'light', 'memory', 'fire', 'storm', 'road',
+]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark prefix lookups on the autocomplete index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--titles', type=int, default=1_000_000, help='Number of synthetic titles')
+        parser.add_argument('--lookups', type=int, default=10_000, help='Number of prefix lookups to time')
+        parser.add_argument('--limit', type=int, default=8, help='Suggestions returned per lookup')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        titles = [
+            ' '.join(rng.choice(WORDS) for _ in range(rng.randint(2, 5))) + f' {i}'
+            for i in range(options['titles'])
+        ]
+
+        started = time.perf_counter()
+        index = SuggestionIndex(lambda: ((BOOK, pk, title) for pk, title in enumerate(titles)))
+        index.build()
+        self.stdout.write(f'Built index of {len(index)} titles in {time.perf_counter() - started:.2f}s')
+
+        prefixes = []
+        for _ in range(options['lookups']):
+            title = rng.choice(titles)
+            prefixes.append(title[:rng.randint(1, min(len(title), 12))])
+
+        timings = []
+        for prefix in prefixes:
+            started = time.perf_counter()
+            index.suggest(prefix, limit=options['limit'])
+            timings.append((time.perf_counter() - started) * 1_000_000)
+
+        timings.sort()
+        p99 = timings[int(len(timings) * 0.99) - 1]
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(timings)} lookups: mean {statistics.mean(timings):.1f}us, '
+            f'p50 {statistics.median(timings):.1f}us, p99 {p99:.1f}us, max {timings[-1]:.1f}us'
+        ))
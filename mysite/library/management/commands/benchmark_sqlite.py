@@ -0,0 +1,116 @@
+"""
+Management command to compare SQLite database profiles under concurrency.
+Copies the current database once per profile, then runs several worker
+processes with threads that mix catalog reads, visit-log inserts and
+borrow/return transactions against the copy, and reports throughput,
+latency and lock errors side by side. The real database is never touched.
+"""
+
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from library.benchmarks import concurrency
+
+PROFILES = ('default', 'production')
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the default and production SQLite profiles with a concurrent read/write mix'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=4, help='Worker processes per profile')
+        parser.add_argument('--threads', type=int, default=4, help='Threads per worker process')
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds per profile')
+        parser.add_argument('--write-ratio', type=float, default=0.2, help='Fraction of operations that write')
+        parser.add_argument('--profiles', nargs='+', choices=PROFILES, default=list(PROFILES))
+        parser.add_argument('--output', help='Write the results as JSON to this file')
+        parser.add_argument('--worker', action='store_true', help='Internal: run one worker process')
+        parser.add_argument('--seed', type=int, default=0, help='Internal: worker RNG seed')
+        parser.add_argument('--start-at', type=float, help='Internal: epoch time to start at')
+
+    def handle(self, *args, **options):
+        if options['worker']:
+            result = concurrency.run_worker(
+                options['threads'], options['duration'], options['write_ratio'],
+                options['seed'], options['start_at'],
+            )
+            self.stdout.write(json.dumps(result))
+            return
+
+        if connection.vendor != 'sqlite':
+            raise CommandError('This benchmark only applies to SQLite.')
+        source = str(connection.settings_dict['NAME'])
+        results = {}
+        with tempfile.TemporaryDirectory() as directory:
+            for profile in options['profiles']:
+                copy = Path(directory) / f'{profile}.sqlite3'
+                self.copy_database(source, copy, journal_mode='WAL' if profile == 'production' else 'DELETE')
+                self.stdout.write(f'Running {profile} profile for {options["duration"]:.0f}s...')
+                results[profile] = self.run_profile(profile, copy, options)
+
+        self.report(results)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump(results, fh, indent=2)
+            self.stdout.write(f'Results written to {options["output"]}')
+
+    def copy_database(self, source, target, journal_mode):
+        # The backup API gives a consistent copy even while the source is in use.
+        # The journal mode is stored in the file, so reset it for each profile.
+        src, dst = sqlite3.connect(source), sqlite3.connect(target)
+        try:
+            src.backup(dst)
+            dst.execute(f'PRAGMA journal_mode = {journal_mode}')
+        finally:
+            src.close()
+            dst.close()
+
+    def run_profile(self, profile, path, options):
+        env = dict(os.environ, DJANGO_DB_PATH=str(path), DJANGO_DB_PROFILE=profile)
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [str(settings.BASE_DIR), env.get('PYTHONPATH')]))
+        start_at = time.time() + 3.0
+        command = [
+            sys.executable, '-m', 'django', 'benchmark_sqlite', '--worker',
+            '--threads', str(options['threads']),
+            '--duration', str(options['duration']),
+            '--write-ratio', str(options['write_ratio']),
+            '--start-at', str(start_at),
+        ]
+        workers = [
+            subprocess.Popen(command + ['--seed', str(seed)], env=env, stdout=subprocess.PIPE, text=True)
+            for seed in range(options['processes'])
+        ]
+        raw = []
+        for worker in workers:
+            output, _ = worker.communicate()
+            if worker.returncode != 0:
+                raise CommandError(f'Worker for the {profile} profile failed.')
+            raw.append(json.loads(output.strip().splitlines()[-1]))
+        summary = concurrency.aggregate(raw, options['duration'])
+        summary.update(processes=options['processes'], threads=options['threads'])
+        return summary
+
+    def report(self, results):
+        self.stdout.write(
+            f"\n{'profile':<12} {'ops/s':>9} {'read p95':>9} {'visit p95':>10} {'borrow p95':>11} "
+            f"{'locked':>7} {'retries':>8}"
+        )
+        for profile, summary in results.items():
+            operations = summary['operations']
+            self.stdout.write(
+                f"{profile:<12} {summary['ops_per_s']:>9.1f} {operations['read']['p95_ms']:>8.1f}ms "
+                f"{operations['visit']['p95_ms']:>8.1f}ms {operations['borrow']['p95_ms']:>9.1f}ms "
+                f"{summary['locked_errors']:>7} {summary['retries']:>8}"
+            )
+        if {'default', 'production'} <= results.keys() and results['default']['ops_per_s']:
+            gain = results['production']['ops_per_s'] / results['default']['ops_per_s']
+            self.stdout.write(self.style.SUCCESS(f'\nProduction profile throughput: {gain:.2f}x the default.'))
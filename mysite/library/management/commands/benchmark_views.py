@@ -0,0 +1,89 @@
+"""
+Management command to benchmark every public view.
+Measures per-page latency percentiles and query counts, then runs a
+threaded load test, writes the results as JSON and optionally compares
+them against a stored baseline to catch regressions.
+"""
+
+import json
+import platform
+from datetime import datetime, timezone
+
+import django
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from library.benchmarks import runner
+from library.benchmarks.targets import build_targets
+from library.models import Book
+
+
+class Command(BaseCommand):
+    help = 'Benchmark latency, queries per request and throughput for every view'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed-scale', type=int, default=0,
+                            help='Run seed_data --scale N first when the catalog is smaller than N')
+        parser.add_argument('--username', default='student', help='Account used for logged-in pages')
+        parser.add_argument('--iterations', type=int, default=20, help='Sequential requests per page')
+        parser.add_argument('--threads', type=int, default=8, help='Load generator threads (0 to skip)')
+        parser.add_argument('--duration', type=float, default=10.0, help='Load test duration in seconds')
+        parser.add_argument('--output', default='benchmark_results.json', help='Where to write the JSON results')
+        parser.add_argument('--baseline', help='JSON results to compare against')
+        parser.add_argument('--tolerance', type=float, default=0.2,
+                            help='Allowed relative slowdown before a result counts as a regression')
+
+    def handle(self, *args, **options):
+        if options['seed_scale'] and Book.objects.count() < options['seed_scale']:
+            call_command('seed_data', scale=options['seed_scale'], stdout=self.stdout)
+
+        user = User.objects.filter(username=options['username']).first()
+        if user is None:
+            self.stdout.write(self.style.WARNING(
+                f"User {options['username']!r} not found; skipping logged-in pages."
+            ))
+        targets = build_targets()
+
+        views = runner.measure_targets(targets, user, iterations=options['iterations'])
+        self.stdout.write(f"{'view':<40} {'p50':>8} {'p95':>8} {'p99':>8} {'queries':>8}")
+        for name, stats in views.items():
+            self.stdout.write(
+                f"{name:<40} {stats['p50_ms']:>8.1f} {stats['p95_ms']:>8.1f} "
+                f"{stats['p99_ms']:>8.1f} {stats['queries']:>8}"
+                + (self.style.ERROR(f"  {stats['errors']} errors") if stats['errors'] else '')
+            )
+
+        results = {
+            'meta': {
+                'created_at': datetime.now(timezone.utc).isoformat(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'books': Book.objects.count(),
+                'iterations': options['iterations'],
+            },
+            'views': views,
+        }
+
+        if options['threads']:
+            load = runner.run_load(targets, user, threads=options['threads'], duration=options['duration'])
+            results['load'] = load
+            self.stdout.write(
+                f"\nLoad: {load['requests']} requests from {load['threads']} threads in "
+                f"{load['duration_s']:.1f}s = {load['rps']:.1f} req/s "
+                f"(p50 {load['p50_ms']:.1f}ms, p95 {load['p95_ms']:.1f}ms, p99 {load['p99_ms']:.1f}ms, "
+                f"{load['errors']} errors)"
+            )
+
+        with open(options['output'], 'w') as fh:
+            json.dump(results, fh, indent=2)
+        self.stdout.write(f"\nResults written to {options['output']}")
+
+        if options['baseline']:
+            with open(options['baseline']) as fh:
+                baseline = json.load(fh)
+            regressions = runner.compare(results, baseline, tolerance=options['tolerance'])
+            if regressions:
+                for line in regressions:
+                    self.stdout.write(self.style.ERROR(f'  {line}'))
+                raise CommandError(f'{len(regressions)} regressions against {options["baseline"]}')
+            self.stdout.write(self.style.SUCCESS('No regressions against baseline.'))
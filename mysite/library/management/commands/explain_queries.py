@@ -0,0 +1,141 @@
+"""
+Management command to check every view's queries with EXPLAIN QUERY PLAN.
+Requests each page through the Django test client, captures the SQL it
+runs and reports any full-table scans. Run it after seeding a large
+dataset (seed_data --scale) to verify the indexes are used; the test
+suite runs the same check on a small catalogue.
+
+Each page is requested twice and only the second, warm request is
+checked: the cached COUNT(*)s and home page stats read whole tables by
+design. A SCAN step reads the whole table or, with USING [COVERING] INDEX, the
+whole index. It only passes when the query orders by the index it walks
+and stops at a LIMIT, which the plan shows as no temporary B-tree for the
+ORDER BY.
+"""
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.test import Client
+from django.test.utils import setup_test_environment
+from library.db import execute_wrapper_all
+from library.models import Author, Book, Borrowing, Category
+
+# Listing pages read these small lookup tables in full by design.
+DEFAULT_ALLOWED_SCANS = ('library_category', 'django_content_type')
+
+
+class Command(BaseCommand):
+    help = 'Run EXPLAIN QUERY PLAN for the queries of each view and report full-table scans'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', default='student', help='Student account used for logged-in pages')
+        parser.add_argument(
+            '--allow', nargs='*', default=list(DEFAULT_ALLOWED_SCANS),
+            help='Tables that may be scanned in full',
+        )
+        parser.add_argument('--verbose-plans', action='store_true', help='Print every query plan')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('EXPLAIN QUERY PLAN checks are only implemented for SQLite.')
+
+        setup_test_environment()
+        allowed = set(options['allow'])
+        client = Client()
+        failures = []
+
+        for label, url, user in self.get_targets(options['username']):
+            status_code, plans, scans = self.check_page(client, url, user, allowed)
+            if options['verbose_plans']:
+                for sql, plan in plans:
+                    self.stdout.write(f'  {sql}\n    ' + '\n    '.join(plan))
+            status = self.style.SUCCESS('ok') if not scans else self.style.ERROR(f'{len(scans)} scans')
+            self.stdout.write(f'{label:<28} {status_code} {len(plans):>3} queries  {status}')
+            for table, sql in scans:
+                self.stdout.write(f'    SCAN {table}: {sql[:160]}')
+            failures.extend(scans)
+
+        if failures:
+            raise CommandError(f'{len(failures)} full-table scans found.')
+        self.stdout.write(self.style.SUCCESS('No full-table scans found.'))
+
+    def get_targets(self, username):
+        user = User.objects.filter(username=username).first()
+        book = Book.objects.order_by('-created_at').first()
+        author = Author.objects.first()
+        category = Category.objects.first()
+        targets = [
+            ('home', '/', None),
+            ('all_books', '/books/', None),
+            ('all_books oldest', '/books/?sort=oldest', None),
+            ('all_books highest_rated', '/books/?sort=highest_rated', None),
+            ('authors', '/authors/', None),
+            ('categories', '/categories/', None),
+        ]
+        if category:
+            targets += [
+                ('all_books category', f'/books/?category={category.id}', None),
+                ('category_books', f'/category/{category.id}/', None),
+            ]
+        if book:
+            targets.append(('book_detail', f'/book/{book.id}/', None))
+        if author:
+            targets.append(('author_detail', f'/author/{author.id}/', None))
+        if user:
+            targets += [
+                ('profile', '/profile/', user),
+                ('my_books', '/my-books/', user),
+            ]
+            if book:
+                targets.append(('book_detail (student)', f'/book/{book.id}/', user))
+            borrowing = Borrowing.objects.filter(user=user).first()
+            if borrowing:
+                targets.append(('add_review', f'/book/{borrowing.book_id}/review/', user))
+        return targets
+
+    def check_page(self, client, url, user, allowed):
+        """Request ``url`` twice; return the second status, (sql, plan) pairs and (table, sql) full scans."""
+        if user is not None:
+            client.force_login(user)
+        else:
+            client.logout()
+        captured = []
+
+        def capture(execute, sql, params, many, context):
+            if not many and sql.lstrip().upper().startswith('SELECT'):
+                captured.append((sql, params, context['connection'].alias))
+            return execute(sql, params, many, context)
+
+        # The cached counts and home stats scan by design; check a warm page.
+        client.get(url)
+        with execute_wrapper_all(capture):
+            response = client.get(url)
+        plans, scans = [], []
+        for sql, params, alias in captured:
+            plan = self.explain(sql, params, alias)
+            plans.append((sql, plan))
+            scans.extend((table, sql) for table in self.full_scan_tables(sql, plan) if table not in allowed)
+        return response.status_code, plans, scans
+
+    def explain(self, sql, params, using=DEFAULT_DB_ALIAS):
+        with connections[using].cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def full_scan_tables(self, sql, plan):
+        # "SCAN t" reads every row and "SCAN t USING [COVERING] INDEX i" every
+        # index entry, unless the walk is in ORDER BY order and a LIMIT ends it.
+        upper = sql.upper()
+        stops_early = (
+            ' ORDER BY ' in upper and ' LIMIT ' in upper
+            and not any('TEMP B-TREE FOR ORDER BY' in step for step in plan)
+        )
+        tables = []
+        for step in plan:
+            if not step.startswith('SCAN ') or stops_early:
+                continue
+            table = step.split()[1]
+            if not table.startswith('CONSTANT'):
+                tables.append(table)
+        return tables
@@ -0,0 +1,48 @@
+"""
+Management command to export a library table as CSV or JSON Lines.
+Uses the same streaming encoder as the /export/<dataset>/ endpoint, so
+memory stays flat on tables of any size.
+"""
+
+import sys
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from library import exports
+
+
+class Command(BaseCommand):
+    help = 'Export books, borrowings, reviews or visits as CSV or JSON Lines'
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(exports.DATASETS))
+        parser.add_argument('--format', choices=sorted(exports.FORMATS), default='csv')
+        parser.add_argument('--from', dest='start', type=date.fromisoformat, help='First day (YYYY-MM-DD)')
+        parser.add_argument('--to', dest='end', type=date.fromisoformat, help='Last day (YYYY-MM-DD)')
+        parser.add_argument('--category', type=int, help='Only rows for this category id')
+        parser.add_argument('--gzip', action='store_true', help='Compress the output')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Rows fetched per query')
+        parser.add_argument('--output', '-o', help='Output file (default: stdout)')
+
+    def handle(self, *args, **options):
+        try:
+            chunks = exports.stream_export(
+                options['dataset'], options['format'], options['start'], options['end'],
+                options['category'], options['gzip'], options['chunk_size'],
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        output = open(options['output'], 'wb') if options['output'] else sys.stdout.buffer
+        written = 0
+        try:
+            for chunk in chunks:
+                output.write(chunk)
+                written += len(chunk)
+        finally:
+            if options['output']:
+                output.close()
+            else:
+                output.flush()
+        if options['output']:
+            self.stderr.write(self.style.SUCCESS(f'Wrote {written} bytes to {options["output"]}.'))
@@ -0,0 +1,64 @@
+"""
+Management command to backfill responsive image derivatives.
+Walks the uploaded media directories and generates the WebP/JPEG
+thumbnails for every image in parallel with a process pool.
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import connections
+from library import images
+
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.gif', '.webp', '.bmp', '.tif', '.tiff'}
+
+
+def _generate(name):
+    manifest = images.generate_derivatives(name)
+    return sum(len(paths) for paths in manifest['sources'].values())
+
+
+class Command(BaseCommand):
+    help = 'Generate thumbnails for existing cover, author and profile images'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+        parser.add_argument(
+            '--dirs', nargs='*', default=['books', 'authors', 'profiles'],
+            help='Media subdirectories to process',
+        )
+
+    def handle(self, *args, **options):
+        names = []
+        for directory in options['dirs']:
+            if not default_storage.exists(directory):
+                continue
+            _, files = default_storage.listdir(directory)
+            names.extend(
+                f'{directory}/{filename}' for filename in files
+                if os.path.splitext(filename)[1].lower() in IMAGE_EXTENSIONS
+            )
+        if not names:
+            self.stdout.write('No images found.')
+            return
+
+        # Worker processes are forked; don't let them inherit open DB connections.
+        connections.close_all()
+        started = time.perf_counter()
+        derivatives = errors = 0
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            futures = {pool.submit(_generate, name): name for name in names}
+            for future in as_completed(futures):
+                try:
+                    derivatives += future.result()
+                except Exception as exc:
+                    errors += 1
+                    self.stderr.write(f'  {futures[future]}: {exc}')
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Processed {len(names)} images ({derivatives} derivatives, {errors} errors) '
+            f'in {elapsed:.2f}s with {options["workers"]} workers.'
+        ))
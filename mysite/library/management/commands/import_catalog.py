@@ -0,0 +1,53 @@
+"""
+Management command to bulk import categories, authors or books.
+Reads CSV or JSON Lines (optionally gzipped), reports invalid rows by line
+number without stopping, and upserts valid rows in chunks. Use --dry-run to
+validate a file without writing anything.
+
+Book columns: isbn, title, author, category, description, publication_year,
+pages, language, total_copies. Missing authors and categories are created.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from library import importer
+
+
+class Command(BaseCommand):
+    help = 'Import categories, authors or books from a CSV/JSONL file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=importer.KINDS)
+        parser.add_argument('path', help='.csv, .jsonl, optionally .gz')
+        parser.add_argument('--dry-run', action='store_true', help='Validate only, write nothing')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Rows per upsert batch')
+        parser.add_argument('--max-errors', type=int, default=100, help='Invalid rows to list in the report')
+
+    def handle(self, *args, **options):
+        def progress(rows, rate):
+            self.stdout.write(f'\r  {rows} rows ({rate:,.0f} rows/s)', ending='')
+            self.stdout.flush()
+
+        try:
+            report = importer.import_file(
+                options['path'], options['kind'], dry_run=options['dry_run'],
+                chunk_size=options['chunk_size'], max_errors=options['max_errors'], progress=progress,
+            )
+        except OSError as exc:
+            raise CommandError(f'Cannot read {options["path"]}: {exc}')
+        self.stdout.write('')
+
+        for line_number, message in report['errors']:
+            self.stderr.write(f'  line {line_number}: {message}')
+        if report['error_count'] > len(report['errors']):
+            self.stderr.write(f'  ... and {report["error_count"] - len(report["errors"])} more')
+
+        action = 'Validated' if report['dry_run'] else 'Imported'
+        summary = (
+            f'{action} {report["written"]} of {report["rows"]} rows in {report["seconds"]:.1f}s '
+            f'({report["rows_per_second"]:,} rows/s); {report["error_count"]} invalid'
+        )
+        if report['created_authors'] or report['created_categories']:
+            verb = 'would create' if report['dry_run'] else 'created'
+            summary += f'; {verb} {report["created_authors"]} authors, {report["created_categories"]} categories'
+        style = self.style.WARNING if report['error_count'] else self.style.SUCCESS
+        self.stdout.write(style(summary + '.'))
@@ -0,0 +1,82 @@
+"""
+Management command to archive and delete old VisitLog rows.
+Rows older than --days (LIBRARY_VISIT_LOG_RETENTION_DAYS by default) are
+written to a gzipped JSON Lines file and deleted in small chunks, each in
+its own short transaction, so page views never wait long on the write
+lock. Only rows already folded into the daily analytics are removed; the
+analytics rollup runs first unless --skip-rollup is given.
+"""
+
+import gzip
+import json
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from library import analytics
+from library.models import VisitLog
+
+ARCHIVE_FIELDS = ('id', 'path', 'method', 'ip_address', 'user_id', 'timestamp')
+
+
+class Command(BaseCommand):
+    help = 'Archive and delete VisitLog rows older than the retention period'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=getattr(settings, 'LIBRARY_VISIT_LOG_RETENTION_DAYS', 90),
+            help='Keep this many days of raw visit logs',
+        )
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Rows deleted per transaction')
+        parser.add_argument('--sleep', type=float, default=0.05, help='Seconds to pause between chunks')
+        parser.add_argument(
+            '--archive-dir', default=getattr(settings, 'LIBRARY_VISIT_LOG_ARCHIVE_DIR', None),
+            help='Directory for the .jsonl.gz archive',
+        )
+        parser.add_argument('--no-archive', action='store_true', help='Delete without writing an archive')
+        parser.add_argument('--skip-rollup', action='store_true', help='Do not run the analytics rollup first')
+
+    def handle(self, *args, **options):
+        if not options['skip_rollup']:
+            analytics.rollup_visits()
+        now = timezone.now()
+        cutoff = now - timedelta(days=options['days'])
+        # Only rows the rollup has already counted may go.
+        expired = VisitLog.objects.filter(timestamp__lt=cutoff, id__lte=analytics.rolled_up_visit_id())
+
+        archive = None
+        if not options['no_archive']:
+            directory = Path(options['archive_dir'] or settings.BASE_DIR / 'archive')
+            directory.mkdir(parents=True, exist_ok=True)
+            path = directory / f'visitlog-{now:%Y%m%d-%H%M%S}.jsonl.gz'
+            archive = gzip.open(path, 'wt', encoding='utf-8')
+
+        deleted = 0
+        try:
+            while True:
+                rows = list(expired.order_by('timestamp').values(*ARCHIVE_FIELDS)[:options['chunk_size']])
+                if not rows:
+                    break
+                if archive is not None:
+                    for row in rows:
+                        row['timestamp'] = row['timestamp'].isoformat()
+                        archive.write(json.dumps(row) + '\n')
+                    archive.flush()
+                with transaction.atomic():
+                    deleted += VisitLog.objects.filter(pk__in=[row['id'] for row in rows]).delete()[0]
+                if options['sleep']:
+                    time.sleep(options['sleep'])
+        finally:
+            if archive is not None:
+                archive.close()
+
+        if archive is not None:
+            if deleted:
+                self.stdout.write(f'Archived to {path}')
+            else:
+                path.unlink()
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} visit logs older than {cutoff:%Y-%m-%d}.'))
@@ -0,0 +1,15 @@
+"""
+Management command to rebuild the denormalized rating columns on Book.
+Useful after bulk imports or raw SQL edits that bypass the Review signals.
+"""
+
+from django.core.management.base import BaseCommand
+from library.models import Book
+
+
+class Command(BaseCommand):
+    help = 'Recompute rating_sum, rating_count and rating_avg for every book'
+
+    def handle(self, *args, **options):
+        updated = Book.objects.all().refresh_ratings()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt rating aggregates for {updated} books.'))
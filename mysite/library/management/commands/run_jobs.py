@@ -0,0 +1,47 @@
+"""
+Management command that runs the background job worker.
+Enqueues the periodic jobs from LIBRARY_PERIODIC_JOBS (overdue detection
+by default) and executes queued jobs outside the request path. Run one
+long-lived worker, or use --once from cron.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from library import jobs
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs and schedule the periodic ones'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Process the queue once and exit')
+        parser.add_argument('--enqueue', metavar='JOB', help='Queue a single job by name before running')
+        parser.add_argument('--no-schedule', action='store_true', help='Do not enqueue periodic jobs')
+        parser.add_argument(
+            '--sleep', type=float, default=getattr(settings, 'LIBRARY_JOB_POLL_INTERVAL', 5),
+            help='Seconds to wait when the queue is empty',
+        )
+
+    def handle(self, *args, **options):
+        if options['enqueue']:
+            try:
+                job, created = jobs.enqueue(options['enqueue'])
+            except KeyError as exc:
+                raise CommandError(str(exc.args[0]))
+            self.stdout.write(f'Queued {job.name} (#{job.pk}).')
+
+        try:
+            while True:
+                if not options['no_schedule']:
+                    jobs.schedule_periodic()
+                count = jobs.run_pending()
+                if count:
+                    self.stdout.write(f'Ran {count} job(s).')
+                if options['once']:
+                    break
+                time.sleep(options['sleep'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS('Worker stopped.'))
@@ -1,19 +1,67 @@
 """
 Management command to seed the database with realistic test data.
 Creates authors, categories, books, a test student, and sample reviews.
+
+With --scale N it instead generates a production-sized synthetic dataset of
+N books plus proportional authors, students, borrowings, reviews and visit
+logs, deterministically from --seed, for load and capacity testing.
 """
 
-from django.core.management.base import BaseCommand
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import accumulate
+
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import User
-from library.models import Author, Category, Book, UserProfile, Borrowing, Review
+from django.db import transaction
+from django.db.models import Count
+from library import search
+from library.models import Author, Category, Book, UserProfile, Borrowing, Review, VisitLog
 from django.utils import timezone
-from datetime import timedelta
+from django.utils.text import capfirst
+
+WORDS = [
+    'Silent', 'Garden', 'History', 'Empire', 'River', 'Night', 'Secret', 'Code', 'Universe', 'Shadow',
+    'Mountain', 'City', 'Glass', 'Winter', 'Island', 'Machine', 'Theory', 'Voyage', 'Kingdom', 'Stone',
+    'Ocean', 'Light', 'Memory', 'Fire', 'Storm', 'Road', 'Mind', 'Time', 'Science', 'Art', 'War',
+    'Peace', 'Dream', 'Journey', 'Truth', 'Origin', 'Future', 'Forest', 'Star', 'Law',
+]
+FIRST_NAMES = [
+    'Ahmed', 'Sara', 'Omar', 'Lina', 'John', 'Maria', 'Wei', 'Aisha', 'Carlos', 'Yuki',
+    'Fatima', 'David', 'Elena', 'Hassan', 'Priya', 'Noah', 'Leila', 'Ivan', 'Grace', 'Samir',
+]
+LAST_NAMES = [
+    'Smith', 'Haddad', 'Garcia', 'Chen', 'Khan', 'Novak', 'Silva', 'Tanaka', 'Muller', 'Rossi',
+    'Ali', 'Brown', 'Kim', 'Nasser', 'Lopez', 'Ivanova', 'Singh', 'Dubois', 'Okafor', 'Jensen',
+]
+LANGUAGES = ['English'] * 8 + ['Arabic', 'French', 'Spanish', 'German']
+# Books fetched and updated per query when reconciling inventory; stays under
+# the 999 bound parameters of older SQLite builds.
+RECONCILE_CHUNK = 500
 
 
 class Command(BaseCommand):
     help = 'Seed database with realistic library data'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale', type=int, default=0,
+            help='Generate a synthetic dataset with this many books instead of the demo data',
+        )
+        parser.add_argument('--seed', type=int, default=42, help='RNG seed for --scale mode')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Rows per bulk_create batch')
+        parser.add_argument('--authors', type=int, help='Authors to create (default: scale / 10)')
+        parser.add_argument('--users', type=int, help='Students to create (default: scale / 5)')
+        parser.add_argument('--borrowings', type=int, help='Borrowings to create (default: scale * 2)')
+        parser.add_argument('--visits', type=int, help='Visit logs to create (default: scale * 5)')
+
     def handle(self, *args, **options):
+        if options['scale']:
+            return self.handle_scale(options)
+
         self.stdout.write('Seeding database...')
 
         # --- Create Categories ---
@@ -280,6 +328,7 @@ class Command(BaseCommand):
                     comment=review['comment'],
                 )
                 self.stdout.write(f'  Created review for: {review["book"].title}')
+            UserProfile.objects.filter(user=student).refresh_counters()
 
         # --- Create admin superuser ---
         if not User.objects.filter(username='admin').exists():
@@ -296,3 +345,220 @@ class Command(BaseCommand):
         self.stdout.write(self.style.SUCCESS('Test accounts:'))
         self.stdout.write(self.style.SUCCESS('  Student: username=student, password=student123'))
         self.stdout.write(self.style.SUCCESS('  Admin:   username=admin, password=admin123'))
+
+    # --- Synthetic dataset (--scale) ---
+
+    def handle_scale(self, options):
+        scale = options['scale']
+        self.rng = random.Random(options['seed'])
+        self.chunk_size = options['chunk_size']
+        self.prefix = f"load{options['seed']}"
+        if User.objects.filter(username__startswith=f'{self.prefix}_').exists():
+            raise CommandError(f'A dataset with --seed {options["seed"]} already exists.')
+
+        n_authors = options['authors'] or max(scale // 10, 1)
+        n_users = options['users'] or max(scale // 5, 1)
+        n_borrowings = options['borrowings'] if options['borrowings'] is not None else scale * 2
+        n_visits = options['visits'] if options['visits'] is not None else scale * 5
+        self.now = timezone.now()
+        started = time.perf_counter()
+
+        category_ids = self.seed_categories()
+        author_ids = self.bulk_insert(Author, n_authors, self.make_author)
+        book_ids = self.bulk_insert(
+            Book, scale, lambda i: self.make_book(i, author_ids, category_ids),
+            auto_now_fields=['created_at'],
+        )
+        password = make_password('student123')
+        user_ids = self.bulk_insert(User, n_users, lambda i: self.make_user(i, password))
+        self.bulk_insert(UserProfile, n_users, lambda i: UserProfile(user_id=user_ids[i]))
+
+        # Zipf-like popularity: a small head of books receives most of the traffic.
+        self.book_ids = book_ids
+        self.book_weights = list(accumulate(1 / (rank + 1) ** 1.1 for rank in range(len(book_ids))))
+        self.user_ids = user_ids
+        self.reviewed = set()
+        self.active = {}
+        self.active_pairs = set()
+        self.review_pairs = []
+        self.bulk_insert(Borrowing, n_borrowings, self.make_borrowing, auto_now_fields=['borrow_date'])
+        self.bulk_insert(Review, len(self.review_pairs), self.make_review, auto_now_fields=['created_at'])
+        self.bulk_insert(VisitLog, n_visits, self.make_visit)
+
+        self.stdout.write('Reconciling inventory, ratings, profile counters and search index...')
+        self.reconcile_inventory()
+        Book.objects.all().refresh_ratings()
+        UserProfile.objects.all().refresh_counters()
+        search.rebuild_index()
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'\nSynthetic dataset created in {elapsed:.1f}s. '
+            f'Students log in as {self.prefix}_user<N> / student123.'
+        ))
+
+    def bulk_insert(self, model, total, factory, auto_now_fields=()):
+        """Create ``total`` rows in chunked transactions and return their ids."""
+        ids = []
+        started = time.perf_counter()
+        with self.preserve_timestamps(model, auto_now_fields):
+            for offset in range(0, total, self.chunk_size):
+                objs = [factory(i) for i in range(offset, min(offset + self.chunk_size, total))]
+                with transaction.atomic():
+                    created = model.objects.bulk_create(objs)
+                if created and created[0].pk is None:
+                    created_ids = model.objects.order_by('-pk').values_list('pk', flat=True)[:len(objs)]
+                    ids.extend(sorted(created_ids))
+                else:
+                    ids.extend(obj.pk for obj in created)
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f'\r  {capfirst(model._meta.verbose_name_plural)}: {len(ids)}/{total} '
+                    f'({len(ids) / max(elapsed, 1e-9):,.0f} rows/s)',
+                    ending='',
+                )
+        self.stdout.write('')
+        return ids
+
+    @contextmanager
+    def preserve_timestamps(self, model, field_names):
+        # auto_now_add would stamp every generated row with the insert time.
+        fields = [model._meta.get_field(name) for name in field_names]
+        for field in fields:
+            field.auto_now_add = False
+        try:
+            yield
+        finally:
+            for field in fields:
+                field.auto_now_add = True
+
+    def random_past(self, days):
+        return self.now - timedelta(seconds=self.rng.randint(0, days * 86400))
+
+    def seed_categories(self):
+        names = [
+            ('Fiction', 'fas fa-feather-alt'), ('Science', 'fas fa-flask'),
+            ('Technology', 'fas fa-laptop-code'), ('History', 'fas fa-landmark'),
+            ('Philosophy', 'fas fa-brain'), ('Biography', 'fas fa-user-tie'),
+            ('Self-Help', 'fas fa-hands-helping'), ('Mathematics', 'fas fa-calculator'),
+        ]
+        return [
+            Category.objects.get_or_create(name=name, defaults={'icon': icon})[0].pk
+            for name, icon in names
+        ]
+
+    def make_author(self, i):
+        rng = self.rng
+        return Author(
+            name=f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i}',
+            bio=' '.join(rng.choice(WORDS).lower() for _ in range(rng.randint(10, 40))),
+        )
+
+    def make_book(self, i, author_ids, category_ids):
+        rng = self.rng
+        copies = rng.randint(1, 6)
+        return Book(
+            title=' '.join(rng.choice(WORDS) for _ in range(rng.randint(2, 5))) + f' {i}',
+            author_id=rng.choice(author_ids),
+            category_id=rng.choice(category_ids),
+            description=' '.join(rng.choice(WORDS).lower() for _ in range(rng.randint(20, 80))),
+            publication_year=rng.randint(1900, 2025),
+            pages=rng.randint(80, 900),
+            language=rng.choice(LANGUAGES),
+            total_copies=copies,
+            available_copies=copies,
+            created_at=self.random_past(5 * 365),
+        )
+
+    def make_user(self, i, password):
+        rng = self.rng
+        return User(
+            username=f'{self.prefix}_user{i}',
+            email=f'{self.prefix}_user{i}@example.com',
+            password=password,
+            first_name=rng.choice(FIRST_NAMES),
+            last_name=rng.choice(LAST_NAMES),
+        )
+
+    def make_borrowing(self, i):
+        rng = self.rng
+        user_id = rng.choice(self.user_ids)
+        book_id = rng.choices(self.book_ids, cum_weights=self.book_weights)[0]
+        borrow_date = self.random_past(365)
+        due_date = borrow_date + timedelta(days=14)
+        # Recent loans are still out, up to the 5-book limit per student and
+        # never two copies of the same book.
+        active = (
+            (self.now - borrow_date).days < 21
+            and self.active.get(user_id, 0) < 5
+            and (user_id, book_id) not in self.active_pairs
+            and rng.random() < 0.6
+        )
+        if active:
+            self.active[user_id] = self.active.get(user_id, 0) + 1
+            self.active_pairs.add((user_id, book_id))
+        if (user_id, book_id) not in self.reviewed and rng.random() < 0.35:
+            self.reviewed.add((user_id, book_id))
+            self.review_pairs.append((user_id, book_id, borrow_date))
+        return Borrowing(
+            user_id=user_id,
+            book_id=book_id,
+            borrow_date=borrow_date,
+            due_date=due_date,
+            returned=not active,
+            return_date=None if active else min(borrow_date + timedelta(days=rng.randint(1, 20)), self.now),
+        )
+
+    def make_review(self, i):
+        rng = self.rng
+        user_id, book_id, borrow_date = self.review_pairs[i]
+        # Each book has a stable "quality" so ratings cluster per title.
+        quality = (book_id * 2654435761) % 5
+        rating = min(max(round(rng.gauss(1 + quality, 0.8)), 1), 5)
+        return Review(
+            user_id=user_id,
+            book_id=book_id,
+            rating=rating,
+            comment=' '.join(rng.choice(WORDS).lower() for _ in range(rng.randint(5, 30))),
+            created_at=min(borrow_date + timedelta(days=rng.randint(1, 30)), self.now),
+        )
+
+    def make_visit(self, i):
+        rng = self.rng
+        roll = rng.random()
+        if roll < 0.5:
+            book_id = rng.choices(self.book_ids, cum_weights=self.book_weights)[0]
+            path = f'/book/{book_id}/'
+        elif roll < 0.75:
+            path = '/books/'
+        elif roll < 0.9:
+            path = '/'
+        else:
+            path = rng.choice(['/authors/', '/categories/', '/my-books/', '/profile/'])
+        user_id = rng.choice(self.user_ids) if rng.random() < 0.4 else None
+        return VisitLog(
+            path=path,
+            method='GET',
+            ip_address=f'10.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}',
+            user_id=user_id,
+            timestamp=self.random_past(90),
+        )
+
+    def reconcile_inventory(self):
+        """Make total/available copies agree with the generated active loans."""
+        # A range over the seeded ids, not an IN list: SQLite caps bound parameters.
+        active = (
+            Borrowing.objects.filter(returned=False, book__id__range=(min(self.book_ids), max(self.book_ids)))
+            .values('book_id').annotate(n=Count('id')).order_by()
+        )
+        active_counts = {row['book_id']: row['n'] for row in active}
+        book_ids = sorted(active_counts)
+        for start in range(0, len(book_ids), RECONCILE_CHUNK):
+            chunk = book_ids[start:start + RECONCILE_CHUNK]
+            books = list(Book.objects.filter(pk__in=chunk).only('id', 'total_copies'))
+            for book in books:
+                out = active_counts[book.pk]
+                book.total_copies = max(book.total_copies, out)
+                book.available_copies = book.total_copies - out
+            with transaction.atomic():
+                Book.objects.bulk_update(books, ['total_copies', 'available_copies'])
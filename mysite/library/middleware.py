@@ -1,27 +1,179 @@
-from .models import VisitLog
+import threading
+import time
+from collections import Counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils import timezone
+
+from .db import execute_wrapper_all
+from .templatetags.library_filters import track_book_cards
+from .visit_log import get_visit_log_writer
 
 
 class VisitLoggingMiddleware:
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        self.writer = get_visit_log_writer()
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
 
     def __call__(self, request):
-        if not request.path.startswith('/static/') and not request.path.startswith('/media/'):
-            try:
-                VisitLog.objects.create(
-                    path=request.path,
-                    method=request.method,
-                    ip_address=self.get_client_ip(request),
-                    user=request.user if request.user.is_authenticated else None,
-                )
-            except Exception:
-                pass 
+        if self.is_async:
+            return self.__acall__(request)
+        if self.should_log(request):
+            user = request.user if request.user.is_authenticated else None
+            self.log_visit(request, user)
 
         response = self.get_response(request)
         return response
 
+    async def __acall__(self, request):
+        if self.should_log(request):
+            user = await self.get_user_async(request)
+            if self.writer.background:
+                self.log_visit(request, user)
+            else:
+                await sync_to_async(self.log_visit)(request, user)
+
+        response = await self.get_response(request)
+        return response
+
+    def should_log(self, request):
+        return not request.path.startswith('/static/') and not request.path.startswith('/media/')
+
+    def log_visit(self, request, user):
+        self.writer.enqueue({
+            'path': request.path[:500],
+            'method': request.method,
+            'ip_address': self.get_client_ip(request),
+            'user_id': user.pk if user is not None else None,
+            'timestamp': timezone.now(),
+        })
+
+    async def get_user_async(self, request):
+        if hasattr(request, 'auser'):
+            user = await request.auser()
+            return user if user.is_authenticated else None
+        return await sync_to_async(
+            lambda: request.user if request.user.is_authenticated else None
+        )()
+
     def get_client_ip(self, request):
         x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
         if x_forwarded_for:
             return x_forwarded_for.split(',')[0].strip()
         return request.META.get('REMOTE_ADDR')
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+_report_lock = threading.Lock()
+_query_report = {}
+
+
+def get_query_report():
+    """Return a snapshot of the aggregated per-view query statistics."""
+    with _report_lock:
+        return {
+            name: dict(stats, duplicates=dict(stats['duplicates']))
+            for name, stats in _query_report.items()
+        }
+
+
+def reset_query_report():
+    with _report_lock:
+        _query_report.clear()
+
+
+def _record_view(view_name, stats):
+    with _report_lock:
+        entry = _query_report.setdefault(view_name, {
+            'requests': 0,
+            'queries': 0,
+            'max_queries': 0,
+            'sql_ms': 0.0,
+            'total_ms': 0.0,
+            'duplicates': Counter(),
+        })
+        entry['requests'] += 1
+        entry['queries'] += stats['queries']
+        entry['max_queries'] = max(entry['max_queries'], stats['queries'])
+        entry['sql_ms'] += stats['sql_ms']
+        entry['total_ms'] += stats['total_ms']
+        entry['duplicates'].update(stats['duplicates'])
+
+
+class QueryBudgetMiddleware:
+    """
+    Opt-in per-view SQL instrumentation, enabled with LIBRARY_QUERY_INSTRUMENTATION.
+
+    Counts queries and SQL time for each request, flags statements that repeat
+    with different parameters (the N+1 pattern), reports the numbers as a
+    Server-Timing header and aggregates them per URL name. With
+    LIBRARY_QUERY_BUDGET_STRICT set, a view that runs more queries than its
+    budget raises QueryBudgetExceeded so the test run fails.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'LIBRARY_QUERY_INSTRUMENTATION', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.default_budget = getattr(settings, 'LIBRARY_QUERY_BUDGET', None)
+        self.view_budgets = getattr(settings, 'LIBRARY_QUERY_BUDGETS', {})
+        self.duplicate_threshold = getattr(settings, 'LIBRARY_QUERY_DUPLICATE_THRESHOLD', 3)
+        self.strict = getattr(settings, 'LIBRARY_QUERY_BUDGET_STRICT', False)
+
+    def __call__(self, request):
+        executed = []
+
+        def record(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                executed.append((sql, time.perf_counter() - start))
+
+        start = time.perf_counter()
+        with execute_wrapper_all(record), track_book_cards() as cards:
+            response = self.get_response(request)
+        total = time.perf_counter() - start
+
+        match = getattr(request, 'resolver_match', None)
+        view_name = (match.view_name if match else None) or request.path
+        fingerprints = Counter(sql for sql, _ in executed)
+        stats = {
+            'queries': len(executed),
+            'sql_ms': sum(duration for _, duration in executed) * 1000,
+            'total_ms': total * 1000,
+            'duplicates': {
+                sql: count for sql, count in fingerprints.items()
+                if count >= self.duplicate_threshold
+            },
+        }
+        _record_view(view_name, stats)
+
+        response['Server-Timing'] = ', '.join([
+            'db;dur=%.1f;desc="%d queries"' % (stats['sql_ms'], stats['queries']),
+            'app;dur=%.1f' % (stats['total_ms'] - stats['sql_ms']),
+            'total;dur=%.1f' % stats['total_ms'],
+            'cards;dur=%.1f;desc="%d hits, %d misses"' % (
+                cards['render_seconds'] * 1000, cards['hits'], cards['misses'],
+            ),
+        ])
+        if stats['duplicates']:
+            response['X-Duplicate-Queries'] = str(sum(stats['duplicates'].values()))
+
+        budget = self.view_budgets.get(view_name, self.default_budget)
+        if self.strict and budget is not None and stats['queries'] > budget:
+            raise QueryBudgetExceeded(
+                f"{view_name} ran {stats['queries']} queries (budget {budget})"
+            )
+        return response
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:22
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0002_book_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='visitlog',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Timestamp'),
+        ),
+    ]
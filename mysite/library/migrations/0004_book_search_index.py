@@ -0,0 +1,46 @@
+from django.db import OperationalError, migrations
+
+# The DDL is spelled out here rather than imported from library.search, so
+# this migration keeps creating the same table whatever that module becomes.
+CREATE_FTS_TABLE = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS library_book_fts USING fts5(
+        title, author, category, description,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+"""
+
+FILL_FTS_TABLE = """
+    INSERT INTO library_book_fts (rowid, title, author, category, description)
+    SELECT b.id, b.title, a.name, COALESCE(c.name, ''), b.description
+    FROM library_book b
+    JOIN library_author a ON a.id = b.author_id
+    LEFT JOIN library_category c ON c.id = b.category_id
+"""
+
+
+def create_search_index(apps, schema_editor):
+    # Only SQLite builds with FTS5 get the table; search falls back to an
+    # in-memory index everywhere else.
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    try:
+        schema_editor.execute(CREATE_FTS_TABLE)
+    except OperationalError:
+        return
+    schema_editor.execute(FILL_FTS_TABLE)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS library_book_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0003_visitlog_timestamp_default'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0004_book_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['-created_at'], name='book_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['category', '-created_at'], name='book_category_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['author', '-created_at'], name='book_author_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['-rating_avg', '-created_at'], name='book_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='borrowing',
+            index=models.Index(fields=['user', 'returned', '-borrow_date'], name='borrowing_user_returned_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='borrowing',
+            index=models.Index(fields=['user', 'book', 'returned'], name='borrowing_user_book_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='borrowing',
+            index=models.Index(condition=models.Q(('returned', False)), fields=['book'], name='borrowing_active_book_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='borrowing',
+            index=models.Index(condition=models.Q(('returned', False)), fields=['due_date'], name='borrowing_active_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['book', '-created_at'], name='review_book_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='visitlog',
+            index=models.Index(fields=['-timestamp'], name='visitlog_timestamp_idx'),
+        ),
+        # home counts students with is_staff = False on every request.
+        migrations.RunSQL(
+            'CREATE INDEX library_user_is_staff_idx ON auth_user (is_staff)',
+            'DROP INDEX library_user_is_staff_idx',
+        ),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:37
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0007_background_jobs'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyCirculationStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Date')),
+                ('borrows', models.PositiveIntegerField(default=0, verbose_name='Borrows')),
+                ('returns', models.PositiveIntegerField(default=0, verbose_name='Returns')),
+            ],
+            options={
+                'verbose_name': 'Daily Circulation Stat',
+                'verbose_name_plural': 'Daily Circulation Stats',
+                'ordering': ['-date', '-borrows'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyVisitStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Date')),
+                ('path', models.CharField(max_length=500, verbose_name='URL Path')),
+                ('user_type', models.CharField(choices=[('anonymous', 'Anonymous'), ('student', 'Student'), ('staff', 'Staff')], max_length=10, verbose_name='User Type')),
+                ('views', models.PositiveIntegerField(default=0, verbose_name='Views')),
+            ],
+            options={
+                'verbose_name': 'Daily Visit Stat',
+                'verbose_name_plural': 'Daily Visit Stats',
+                'ordering': ['-date', '-views'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True, verbose_name='Name')),
+                ('last_id', models.BigIntegerField(default=0, verbose_name='Last Processed ID')),
+                ('last_timestamp', models.DateTimeField(blank=True, null=True, verbose_name='Last Processed Timestamp')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Rollup Watermark',
+                'verbose_name_plural': 'Rollup Watermarks',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='borrowing',
+            index=models.Index(condition=models.Q(('return_date__isnull', False)), fields=['return_date'], name='borrowing_return_date_idx'),
+        ),
+        migrations.AddField(
+            model_name='dailycirculationstat',
+            name='book',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='circulation_stats', to='library.book', verbose_name='Book'),
+        ),
+        migrations.AddField(
+            model_name='dailycirculationstat',
+            name='category',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='circulation_stats', to='library.category', verbose_name='Category'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailyvisitstat',
+            constraint=models.UniqueConstraint(fields=('date', 'path', 'user_type'), name='dailyvisitstat_key_uniq'),
+        ),
+        migrations.AddIndex(
+            model_name='dailycirculationstat',
+            index=models.Index(fields=['category', 'date'], name='circulation_category_date_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailycirculationstat',
+            constraint=models.UniqueConstraint(fields=('date', 'book'), name='dailycirculationstat_key_uniq'),
+        ),
+    ]
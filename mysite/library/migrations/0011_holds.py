@@ -0,0 +1,66 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:56
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0010_recommendations'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='notification',
+            name='borrowing',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to='library.borrowing', verbose_name='Borrowing'),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='kind',
+            field=models.CharField(choices=[('overdue', 'Overdue'), ('hold_ready', 'Hold Ready')], max_length=20, verbose_name='Kind'),
+        ),
+        migrations.CreateModel(
+            name='Hold',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('waiting', 'Waiting'), ('ready', 'Ready for Pickup'), ('fulfilled', 'Fulfilled'), ('cancelled', 'Cancelled'), ('expired', 'Expired')], default='waiting', max_length=10, verbose_name='Status')),
+                ('priority', models.SmallIntegerField(default=0, help_text='Higher priorities are served first; equal priorities in the order the holds were placed.', verbose_name='Priority')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Placed At')),
+                ('ready_at', models.DateTimeField(blank=True, null=True, verbose_name='Ready At')),
+                ('expires_at', models.DateTimeField(blank=True, null=True, verbose_name='Pickup Deadline')),
+                ('closed_at', models.DateTimeField(blank=True, null=True, verbose_name='Closed At')),
+                ('book', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='holds', to='library.book', verbose_name='Book')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='holds', to=settings.AUTH_USER_MODEL, verbose_name='Student')),
+            ],
+            options={
+                'verbose_name': 'Hold',
+                'verbose_name_plural': 'Holds',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='hold',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to='library.hold', verbose_name='Hold'),
+        ),
+        migrations.AddConstraint(
+            model_name='notification',
+            constraint=models.UniqueConstraint(fields=('hold', 'kind'), name='notification_hold_kind_uniq'),
+        ),
+        migrations.AddIndex(
+            model_name='hold',
+            index=models.Index(condition=models.Q(('status', 'waiting')), fields=['book', '-priority', 'id'], name='hold_queue_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='hold',
+            index=models.Index(condition=models.Q(('status', 'ready')), fields=['expires_at'], name='hold_ready_expiry_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='hold',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['waiting', 'ready'])), fields=('user', 'book'), name='hold_active_user_book_uniq'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:01
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    UserProfile = apps.get_model('library', 'UserProfile')
+    Borrowing = apps.get_model('library', 'Borrowing')
+    Review = apps.get_model('library', 'Review')
+
+    def count(queryset):
+        rows = queryset.filter(user=OuterRef('user_id')).order_by().values('user')
+        return Coalesce(Subquery(rows.annotate(total=Count('id')).values('total')), 0)
+
+    UserProfile.objects.update(
+        active_borrow_count=count(Borrowing.objects.filter(returned=False)),
+        total_borrow_count=count(Borrowing.objects.all()),
+        review_count=count(Review.objects.all()),
+        overdue_count=count(Borrowing.objects.filter(returned=False, overdue=True)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0011_holds'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='active_borrow_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Currently Borrowed'),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='overdue_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Overdue'),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Reviews Written'),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='total_borrow_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Total Borrowed'),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0012_profile_counters'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='book',
+            name='book_created_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='book',
+            name='book_category_created_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='book',
+            name='book_author_created_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='book',
+            name='book_rating_idx',
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['-created_at', '-id'], name='book_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['category', '-created_at', '-id'], name='book_category_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['author', '-created_at', '-id'], name='book_author_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['-rating_avg', '-id'], name='book_rating_idx'),
+        ),
+    ]
@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models import Avg, Case, Count, F, OuterRef, Q, Subquery, Sum, When
+from django.db.models.functions import Coalesce, Greatest, Now
 from django.contrib.auth.models import User
 from django.utils import timezone
 from datetime import timedelta
@@ -9,11 +11,17 @@ class Author(models.Model):
     bio = models.TextField(blank=True, verbose_name="Biography")
     photo = models.ImageField(upload_to='authors/', blank=True, null=True, verbose_name="Photo")
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['name']
         verbose_name = "Author"
         verbose_name_plural = "Authors"
+        indexes = [
+            models.Index(fields=['updated_at'], name='author_updated_idx'),
+            # The authors page is keyset-paginated on (name, id).
+            models.Index(fields=['name', 'id'], name='author_name_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -26,11 +34,15 @@ class Category(models.Model):
     name = models.CharField(max_length=100, unique=True, verbose_name="Category Name")
     icon = models.CharField(max_length=50, default='fas fa-book', verbose_name="Icon Class")
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['name']
         verbose_name = "Category"
         verbose_name_plural = "Categories"
+        indexes = [
+            models.Index(fields=['updated_at'], name='category_updated_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -39,8 +51,30 @@ class Category(models.Model):
         return self.books.count()
 
 
+class BookQuerySet(models.QuerySet):
+    CARD_FIELDS = (
+        'id', 'title', 'cover_image', 'available_copies', 'rating_avg', 'rating_count',
+        'created_at', 'updated_at', 'author__id', 'author__name', 'category__id', 'category__name',
+    )
+
+    def for_cards(self):
+        """Only the columns and relations the book card partials render."""
+        return self.select_related('author', 'category').only(*self.CARD_FIELDS)
+
+    def refresh_ratings(self):
+        """Recompute the denormalized rating columns from the reviews table in one UPDATE."""
+        reviews = Review.objects.filter(book=OuterRef('pk')).order_by().values('book')
+        return self.update(
+            updated_at=Now(),
+            rating_sum=Coalesce(Subquery(reviews.annotate(total=Sum('rating')).values('total')), 0),
+            rating_count=Coalesce(Subquery(reviews.annotate(total=Count('id')).values('total')), 0),
+            rating_avg=Coalesce(Subquery(reviews.annotate(total=Avg('rating')).values('total')), 0.0),
+        )
+
+
 class Book(models.Model):
     title = models.CharField(max_length=300, verbose_name="Book Title")
+    isbn = models.CharField(max_length=20, unique=True, null=True, blank=True, verbose_name="ISBN")
     author = models.ForeignKey(Author, on_delete=models.CASCADE, related_name='books', verbose_name="Author")
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, related_name='books', verbose_name="Category")
     description = models.TextField(blank=True, verbose_name="Description")
@@ -50,13 +84,25 @@ class Book(models.Model):
     language = models.CharField(max_length=50, default='English', verbose_name="Language")
     total_copies = models.PositiveIntegerField(default=1, verbose_name="Total Copies")
     available_copies = models.PositiveIntegerField(default=1, verbose_name="Available Copies")
+    rating_sum = models.PositiveIntegerField(default=0, editable=False, verbose_name="Rating Sum")
+    rating_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Rating Count")
+    rating_avg = models.FloatField(default=0, editable=False, verbose_name="Average Rating")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = BookQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
         verbose_name = "Book"
         verbose_name_plural = "Books"
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='book_created_idx'),
+            models.Index(fields=['category', '-created_at', '-id'], name='book_category_created_idx'),
+            models.Index(fields=['author', '-created_at', '-id'], name='book_author_created_idx'),
+            models.Index(fields=['-rating_avg', '-id'], name='book_rating_idx'),
+            models.Index(fields=['updated_at'], name='book_updated_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -67,22 +113,68 @@ class Book(models.Model):
 
     @property
     def average_rating(self):
-        reviews = self.reviews.all()
-        if reviews.exists():
-            return round(reviews.aggregate(avg=models.Avg('rating'))['avg'], 1)
-        return 0
-
-    @property
-    def rating_count(self):
-        return self.reviews.count()
+        return round(self.rating_avg, 1)
+
+
+class UserProfileQuerySet(models.QuerySet):
+    @staticmethod
+    def counter_values():
+        """The true value of each maintained counter, as subqueries on the profile's user."""
+        def count(queryset):
+            rows = queryset.filter(user=OuterRef('user_id')).order_by().values('user')
+            return Coalesce(Subquery(rows.annotate(total=Count('id')).values('total')), 0)
+
+        return {
+            'active_borrow_count': count(Borrowing.objects.filter(returned=False)),
+            'total_borrow_count': count(Borrowing.objects.all()),
+            'review_count': count(Review.objects.all()),
+            'overdue_count': count(Borrowing.objects.filter(returned=False, overdue=True)),
+        }
+
+    def adjust_counters(self, **deltas):
+        """Shift counters by ``deltas`` in one UPDATE, never below zero; returns the rows changed."""
+        return self.update(**{
+            name: Greatest(F(name) + delta, 0) for name, delta in deltas.items() if delta
+        })
+
+    def refresh_counters(self):
+        """Recompute the maintained counters from the borrowing and review tables in one UPDATE."""
+        return self.update(**self.counter_values())
+
+    def drifted(self):
+        """Profiles whose counters disagree with the tables, annotated with ``actual_<counter>``."""
+        mismatch = Q()
+        for name in self.model.COUNTERS:
+            mismatch |= ~Q(**{name: F(f'actual_{name}')})
+        actual = {f'actual_{name}': value for name, value in self.counter_values().items()}
+        return self.annotate(**actual).filter(mismatch)
+
+    def get_for_user(self, user):
+        """The profile of ``user``, created with reconciled counters if it is missing."""
+        profile, created = self.get_or_create(user=user)
+        if created:
+            self.filter(pk=profile.pk).refresh_counters()
+            profile.refresh_from_db(fields=self.model.COUNTERS)
+        return profile
 
 
 class UserProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
     phone = models.CharField(max_length=20, blank=True, verbose_name="Phone Number")
     profile_picture = models.ImageField(upload_to='profiles/', blank=True, null=True, verbose_name="Profile Picture")
+    # Maintained by library.inventory, the Review and Borrowing signals and
+    # mark_overdue; reconcile_profile_counters repairs drift from writes that
+    # bypass them.
+    active_borrow_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Currently Borrowed")
+    total_borrow_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Total Borrowed")
+    review_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Reviews Written")
+    overdue_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Overdue")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    COUNTERS = ('active_borrow_count', 'total_borrow_count', 'review_count', 'overdue_count')
+
+    objects = UserProfileQuerySet.as_manager()
+
     class Meta:
         verbose_name = "User Profile"
         verbose_name_plural = "User Profiles"
@@ -90,14 +182,6 @@ class UserProfile(models.Model):
     def __str__(self):
         return f"Profile: {self.user.username}"
 
-    @property
-    def currently_borrowed_count(self):
-        return self.user.borrowings.filter(returned=False).count()
-
-    @property
-    def total_borrowed_count(self):
-        return self.user.borrowings.count()
-
 
 class Borrowing(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='borrowings', verbose_name="Student")
@@ -106,11 +190,20 @@ class Borrowing(models.Model):
     due_date = models.DateTimeField(verbose_name="Due Date")
     return_date = models.DateTimeField(null=True, blank=True, verbose_name="Return Date")
     returned = models.BooleanField(default=False, verbose_name="Returned")
+    overdue = models.BooleanField(default=False, editable=False, verbose_name="Flagged Overdue")
 
     class Meta:
         ordering = ['-borrow_date']
         verbose_name = "Borrowing"
         verbose_name_plural = "Borrowings"
+        indexes = [
+            models.Index(fields=['user', 'returned', '-borrow_date'], name='borrowing_user_returned_idx'),
+            models.Index(fields=['user', 'book', 'returned'], name='borrowing_user_book_idx'),
+            models.Index(fields=['book'], condition=models.Q(returned=False), name='borrowing_active_book_idx'),
+            models.Index(fields=['due_date'], condition=models.Q(returned=False), name='borrowing_active_due_idx'),
+            models.Index(fields=['due_date'], condition=models.Q(returned=False, overdue=False), name='borrowing_unflagged_due_idx'),
+            models.Index(fields=['return_date'], condition=models.Q(return_date__isnull=False), name='borrowing_return_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.book.title}"
@@ -134,6 +227,16 @@ class Borrowing(models.Model):
         return 0
 
 
+class ReviewQuerySet(models.QuerySet):
+    def for_display(self):
+        """Reviews with their author and profile picture loaded in the same query."""
+        return self.select_related('user', 'user__profile').only(
+            'id', 'book_id', 'rating', 'comment', 'created_at',
+            'user__id', 'user__username', 'user__first_name', 'user__last_name',
+            'user__profile__id', 'user__profile__profile_picture',
+        )
+
+
 class Review(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='reviews', verbose_name="Student")
     book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='reviews', verbose_name="Book")
@@ -141,11 +244,16 @@ class Review(models.Model):
     comment = models.TextField(blank=True, verbose_name="Comment")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Review Date")
 
+    objects = ReviewQuerySet.as_manager()
+
     class Meta:
         unique_together = ('user', 'book')
         ordering = ['-created_at']
         verbose_name = "Review"
         verbose_name_plural = "Reviews"
+        indexes = [
+            models.Index(fields=['book', '-created_at'], name='review_book_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.book.title} ({self.rating}/5)"
@@ -172,12 +280,252 @@ class VisitLog(models.Model):
     method = models.CharField(max_length=10, verbose_name="HTTP Method")
     ip_address = models.GenericIPAddressField(null=True, blank=True, verbose_name="IP Address")
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, verbose_name="User")
-    timestamp = models.DateTimeField(auto_now_add=True, verbose_name="Timestamp")
+    timestamp = models.DateTimeField(default=timezone.now, verbose_name="Timestamp")
 
     class Meta:
         ordering = ['-timestamp']
         verbose_name = "Visit Log"
         verbose_name_plural = "Visit Logs"
+        indexes = [
+            models.Index(fields=['-timestamp'], name='visitlog_timestamp_idx'),
+        ]
 
     def __str__(self):
         return f"{self.path} - {self.timestamp}"
+
+
+class HoldQuerySet(models.QuerySet):
+    ACTIVE = ('waiting', 'ready')
+
+    def active(self):
+        return self.filter(status__in=self.ACTIVE)
+
+    def queue(self, book_id):
+        """Waiting holds for ``book_id`` in service order; walks ``hold_queue_idx``."""
+        return self.filter(book_id=book_id, status='waiting').order_by('-priority', 'id')
+
+    def with_position(self):
+        """Annotate ``position``: 1 for the next holder in line, None unless waiting."""
+        ahead = self.model.objects.filter(
+            Q(priority__gt=OuterRef('priority')) | Q(priority=OuterRef('priority'), id__lt=OuterRef('id')),
+            book_id=OuterRef('book_id'),
+            status='waiting',
+        ).order_by().values('book_id').annotate(total=Count('id')).values('total')
+        return self.annotate(position=Case(
+            When(status='waiting', then=Coalesce(Subquery(ahead), 0) + 1),
+            default=None,
+            output_field=models.IntegerField(),
+        ))
+
+
+class Hold(models.Model):
+    WAITING = 'waiting'
+    READY = 'ready'
+    FULFILLED = 'fulfilled'
+    CANCELLED = 'cancelled'
+    EXPIRED = 'expired'
+    STATUS_CHOICES = [
+        (WAITING, 'Waiting'), (READY, 'Ready for Pickup'), (FULFILLED, 'Fulfilled'),
+        (CANCELLED, 'Cancelled'), (EXPIRED, 'Expired'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='holds', verbose_name="Student")
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='holds', verbose_name="Book")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=WAITING, verbose_name="Status")
+    priority = models.SmallIntegerField(
+        default=0, verbose_name="Priority",
+        help_text="Higher priorities are served first; equal priorities in the order the holds were placed.",
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Placed At")
+    ready_at = models.DateTimeField(null=True, blank=True, verbose_name="Ready At")
+    expires_at = models.DateTimeField(null=True, blank=True, verbose_name="Pickup Deadline")
+    closed_at = models.DateTimeField(null=True, blank=True, verbose_name="Closed At")
+
+    objects = HoldQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Hold"
+        verbose_name_plural = "Holds"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'book'], condition=models.Q(status__in=['waiting', 'ready']),
+                name='hold_active_user_book_uniq',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['book', '-priority', 'id'], condition=models.Q(status='waiting'), name='hold_queue_idx'),
+            models.Index(fields=['expires_at'], condition=models.Q(status='ready'), name='hold_ready_expiry_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.book.title} ({self.status})"
+
+    @property
+    def is_ready(self):
+        """Ready and still inside its pickup window; expire_holds may not have caught up yet."""
+        return self.status == self.READY and self.expires_at > timezone.now()
+
+    @property
+    def is_lapsed(self):
+        return self.status == self.READY and not self.is_ready
+
+
+class Notification(models.Model):
+    OVERDUE = 'overdue'
+    HOLD_READY = 'hold_ready'
+    KIND_CHOICES = [(OVERDUE, 'Overdue'), (HOLD_READY, 'Hold Ready')]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications', verbose_name="Student")
+    borrowing = models.ForeignKey(Borrowing, on_delete=models.CASCADE, null=True, blank=True, related_name='notifications', verbose_name="Borrowing")
+    hold = models.ForeignKey(Hold, on_delete=models.CASCADE, null=True, blank=True, related_name='notifications', verbose_name="Hold")
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, verbose_name="Kind")
+    message = models.CharField(max_length=500, verbose_name="Message")
+    created_at = models.DateTimeField(default=timezone.now, verbose_name="Created At")
+    read_at = models.DateTimeField(null=True, blank=True, verbose_name="Read At")
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Notification"
+        verbose_name_plural = "Notifications"
+        constraints = [
+            models.UniqueConstraint(fields=['borrowing', 'kind'], name='notification_borrowing_kind_uniq'),
+            models.UniqueConstraint(fields=['hold', 'kind'], name='notification_hold_kind_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-created_at'], condition=models.Q(read_at__isnull=True), name='notification_unread_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.get_kind_display()}"
+
+
+class Job(models.Model):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [(PENDING, 'Pending'), (RUNNING, 'Running'), (DONE, 'Done'), (FAILED, 'Failed')]
+
+    name = models.CharField(max_length=100, verbose_name="Job Name")
+    key = models.CharField(max_length=200, unique=True, verbose_name="Idempotency Key")
+    payload = models.JSONField(default=dict, blank=True, verbose_name="Payload")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING, verbose_name="Status")
+    run_at = models.DateTimeField(default=timezone.now, verbose_name="Run At")
+    attempts = models.PositiveIntegerField(default=0, verbose_name="Attempts")
+    locked_at = models.DateTimeField(null=True, blank=True, verbose_name="Locked At")
+    result = models.JSONField(null=True, blank=True, verbose_name="Result")
+    last_error = models.TextField(blank=True, verbose_name="Last Error")
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Finished At")
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Job"
+        verbose_name_plural = "Jobs"
+        indexes = [
+            models.Index(fields=['status', 'run_at'], name='job_status_run_at_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.status})"
+
+
+class DailyVisitStat(models.Model):
+    ANONYMOUS = 'anonymous'
+    STUDENT = 'student'
+    STAFF = 'staff'
+    USER_TYPE_CHOICES = [(ANONYMOUS, 'Anonymous'), (STUDENT, 'Student'), (STAFF, 'Staff')]
+
+    date = models.DateField(verbose_name="Date")
+    path = models.CharField(max_length=500, verbose_name="URL Path")
+    user_type = models.CharField(max_length=10, choices=USER_TYPE_CHOICES, verbose_name="User Type")
+    views = models.PositiveIntegerField(default=0, verbose_name="Views")
+
+    class Meta:
+        ordering = ['-date', '-views']
+        verbose_name = "Daily Visit Stat"
+        verbose_name_plural = "Daily Visit Stats"
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'path', 'user_type'], name='dailyvisitstat_key_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.path} ({self.user_type}): {self.views}"
+
+
+class DailyCirculationStat(models.Model):
+    date = models.DateField(verbose_name="Date")
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='circulation_stats', verbose_name="Book")
+    category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True, related_name='circulation_stats', verbose_name="Category")
+    borrows = models.PositiveIntegerField(default=0, verbose_name="Borrows")
+    returns = models.PositiveIntegerField(default=0, verbose_name="Returns")
+
+    class Meta:
+        ordering = ['-date', '-borrows']
+        verbose_name = "Daily Circulation Stat"
+        verbose_name_plural = "Daily Circulation Stats"
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'book'], name='dailycirculationstat_key_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['category', 'date'], name='circulation_category_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.book_id}: {self.borrows} borrows, {self.returns} returns"
+
+
+class RollupWatermark(models.Model):
+    name = models.CharField(max_length=100, unique=True, verbose_name="Name")
+    last_id = models.BigIntegerField(default=0, verbose_name="Last Processed ID")
+    last_timestamp = models.DateTimeField(null=True, blank=True, verbose_name="Last Processed Timestamp")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Rollup Watermark"
+        verbose_name_plural = "Rollup Watermarks"
+
+    def __str__(self):
+        return self.name
+
+
+class BookNeighbor(models.Model):
+    """Precomputed "readers also borrowed" list for a book (library.recommendations)."""
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='neighbors', verbose_name="Book")
+    neighbor = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='neighbor_of', verbose_name="Similar Book")
+    rank = models.PositiveSmallIntegerField(verbose_name="Rank")
+    score = models.FloatField(verbose_name="Similarity")
+    co_occurrences = models.PositiveIntegerField(verbose_name="Shared Readers")
+    computed_at = models.DateTimeField(verbose_name="Computed At")
+
+    class Meta:
+        ordering = ['book', 'rank']
+        verbose_name = "Book Neighbor"
+        verbose_name_plural = "Book Neighbors"
+        constraints = [
+            models.UniqueConstraint(fields=['book', 'rank'], name='bookneighbor_book_rank_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.book_id} -> {self.neighbor_id} ({self.score:.3f})"
+
+
+class UserRecommendation(models.Model):
+    """Precomputed personal recommendations for a student (library.recommendations)."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='recommendations', verbose_name="Student")
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='recommended_to', verbose_name="Book")
+    rank = models.PositiveSmallIntegerField(verbose_name="Rank")
+    score = models.FloatField(verbose_name="Score")
+    computed_at = models.DateTimeField(verbose_name="Computed At")
+
+    class Meta:
+        ordering = ['user', 'rank']
+        verbose_name = "User Recommendation"
+        verbose_name_plural = "User Recommendations"
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'rank'], name='userrecommendation_user_rank_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} -> {self.book_id} ({self.score:.3f})"
@@ -0,0 +1,233 @@
+"""
+Keyset (cursor) pagination.
+
+Instead of COUNT(*) + OFFSET, each page is fetched with a WHERE clause that
+continues after the last row of the previous page on the ordering key, so
+deep pages cost the same as the first one. Cursors are opaque url-safe
+tokens carrying the boundary row's key values; a cursor whose values do not
+fit the ordering fields (tampered or stale) falls back to the first page.
+
+``EstimatedCountPaginator`` keeps OFFSET pages (the admin needs them) but
+replaces the exact COUNT(*) on large tables with an estimate.
+"""
+
+import base64
+import hashlib
+import json
+from datetime import datetime
+
+from django.conf import settings
+from django.core.exceptions import EmptyResultSet, ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Max, Min, Q
+from django.utils.functional import cached_property
+
+from .stats import acached_value, cached_value
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(values, direction):
+    payload = [direction] + [
+        {'dt': value.isoformat()} if isinstance(value, datetime) else value for value in values
+    ]
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        direction, *values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = [datetime.fromisoformat(v['dt']) if isinstance(v, dict) else v for v in values]
+    except (ValueError, TypeError, KeyError):
+        raise InvalidCursor(token)
+    if direction not in ('next', 'prev'):
+        raise InvalidCursor(token)
+    return direction, values
+
+
+class KeysetPage:
+    def __init__(self, object_list, has_next, has_previous, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+
+class KeysetPaginator:
+    """
+    Paginate ``queryset`` on ``ordering`` (e.g. ``['-created_at', '-id']``).
+
+    The last ordering field must be unique (normally the primary key) so every
+    row has a distinct position.
+    """
+
+    def __init__(self, queryset, ordering, per_page):
+        self.queryset = queryset
+        self.ordering = list(ordering)
+        self.fields = [field.lstrip('-') for field in self.ordering]
+        self.per_page = per_page
+
+    def _after(self, values, reverse=False):
+        # Lexicographic "comes after" for a mixed asc/desc key:
+        # (a > x) OR (a = x AND b > y) OR ...
+        condition = Q()
+        for position, field in enumerate(self.ordering):
+            descending = field.startswith('-') != reverse
+            lookup = 'lt' if descending else 'gt'
+            term = Q(**{f'{self.fields[position]}__{lookup}': values[position]})
+            for previous in range(position):
+                term &= Q(**{self.fields[previous]: values[previous]})
+            condition |= term
+        # The redundant bound on the leading field lets the database range-scan
+        # the ordering's index instead of splitting the ORs and sorting.
+        descending = self.ordering[0].startswith('-') != reverse
+        return Q(**{f"{self.fields[0]}__{'lte' if descending else 'gte'}": values[0]}) & condition
+
+    def _coerce(self, values):
+        """Convert decoded cursor values to the ordering fields' types, or raise InvalidCursor."""
+        if len(values) != len(self.fields):
+            raise InvalidCursor(values)
+        coerced = []
+        for name, value in zip(self.fields, values):
+            field = self.queryset.model._meta.get_field(name)
+            # The seek conditions compare with < and >, which never match NULL.
+            if value is None:
+                raise InvalidCursor(values)
+            try:
+                value = field.to_python(value)
+                field.run_validators(value)
+            except (ValidationError, TypeError, ValueError):
+                raise InvalidCursor(values)
+            coerced.append(value)
+        return coerced
+
+    def _key(self, obj):
+        return [getattr(obj, field) for field in self.fields]
+
+    def _page_query(self, cursor):
+        direction, values = 'next', None
+        if cursor:
+            try:
+                direction, values = decode_cursor(cursor)
+                values = self._coerce(values)
+            except InvalidCursor:
+                direction, values = 'next', None
+
+        reverse = direction == 'prev'
+        ordering = self.ordering
+        if reverse:
+            ordering = [field[1:] if field.startswith('-') else f'-{field}' for field in ordering]
+        queryset = self.queryset.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(self._after(values, reverse=reverse))
+        return queryset[:self.per_page + 1], reverse, values is not None
+
+    def _make_page(self, rows, reverse, has_cursor):
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if reverse:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, has_cursor
+
+        next_cursor = encode_cursor(self._key(rows[-1]), 'next') if rows and has_next else None
+        previous_cursor = encode_cursor(self._key(rows[0]), 'prev') if rows and has_previous else None
+        return KeysetPage(rows, has_next, has_previous, next_cursor, previous_cursor)
+
+    def get_page(self, cursor=None):
+        queryset, reverse, has_cursor = self._page_query(cursor)
+        return self._make_page(list(queryset), reverse, has_cursor)
+
+    async def aget_page(self, cursor=None):
+        queryset, reverse, has_cursor = self._page_query(cursor)
+        return self._make_page([row async for row in queryset], reverse, has_cursor)
+
+
+def _count_key(queryset):
+    try:
+        sql, params = queryset.order_by().query.sql_with_params()
+    except EmptyResultSet:
+        # e.g. ``id__in=[]`` from a search without hits: nothing to count.
+        return None
+    return 'library:count:' + hashlib.sha1(f'{sql}|{params}'.encode()).hexdigest()
+
+
+def cached_count(queryset, ttl=60):
+    """COUNT(*) for ``queryset``, cached per distinct query for ``ttl`` seconds."""
+    key = _count_key(queryset)
+    return 0 if key is None else cached_value(key, queryset.count, ttl=ttl)
+
+
+async def acached_count(queryset, ttl=60):
+    key = _count_key(queryset)
+    return 0 if key is None else await acached_value(key, queryset.acount, ttl=ttl)
+
+
+def estimate_rows(model, using='default'):
+    """Cheap row-count estimate for ``model``'s table, or None if the backend has none."""
+    connection = connections[using]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [model._meta.db_table])
+            row = cursor.fetchone()
+        return max(row[0], 0) if row and row[0] >= 0 else None
+    if connection.vendor == 'sqlite':
+        # Row counts recorded by the last ANALYZE, when there has been one.
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")
+            if cursor.fetchone():
+                cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1', [model._meta.db_table])
+                row = cursor.fetchone()
+                if row:
+                    return int(row[0].split()[0])
+    if model._meta.pk.get_internal_type() in ('AutoField', 'BigAutoField'):
+        # Two index lookups; overestimates by the number of deleted rows.
+        bounds = model._default_manager.using(using).order_by().aggregate(low=Min('pk'), high=Max('pk'))
+        if bounds['high'] is None:
+            return 0
+        return bounds['high'] - bounds['low'] + 1
+    return None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator for very large admin changelists.
+
+    Counts up to LIBRARY_ADMIN_EXACT_COUNT_LIMIT rows exactly with a LIMITed
+    count. Past that, an unfiltered list uses ``estimate_rows`` and a filtered
+    one a COUNT(*) cached by ``cached_count``.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        limit = getattr(settings, 'LIBRARY_ADMIN_EXACT_COUNT_LIMIT', 10000)
+        if not queryset.query.where:
+            estimate = estimate_rows(queryset.model, queryset.db)
+            if estimate is not None and estimate > limit:
+                return estimate
+        counted = queryset.order_by()[:limit + 1].count()
+        if counted <= limit:
+            return counted
+        return cached_count(queryset)
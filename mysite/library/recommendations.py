@@ -0,0 +1,311 @@
+"""
+Item-to-item recommendations from borrowing and review co-occurrence.
+
+A student's basket is every book they borrowed or reviewed with at least
+LIBRARY_RECOMMENDATION_MIN_RATING stars. Two books co-occur once for each
+basket holding both; their similarity is the cosine
+``shared / sqrt(readers_a * readers_b)``, so a handful of very popular books
+does not show up everywhere. The best LIBRARY_RECOMMENDATION_NEIGHBORS
+neighbours of each book are stored as ``BookNeighbor`` rows, and each
+student's ``UserRecommendation`` rows sum the neighbour scores of the books
+in their basket, leaving out books they already know. Pages read either
+list with a single indexed join (``similar_books``, ``recommended_for``).
+
+The co-occurrence product runs on SciPy sparse matrices when NumPy and SciPy
+are installed and on plain dictionaries otherwise; both produce the same
+lists.
+
+``build`` is incremental. Borrowings and reviews added since the last run
+(tracked with ``RollupWatermark``) mark their students as changed; only the
+books in those students' baskets and the students themselves are
+recomputed. Such a run loads only the baskets of the readers of those books,
+plus a grouped count of readers for every book in them, so its cost follows
+the neighbourhood of the changes rather than the size of the tables. Scores
+of other rows that mention one of those books drift until the next full run
+(``full=True``, or the first run), which loads every basket and also picks
+up deleted borrowings and reviews.
+"""
+
+import heapq
+import math
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Exists, Max, OuterRef
+from django.utils import timezone
+
+from .models import Book, BookNeighbor, Borrowing, Review, RollupWatermark, UserRecommendation
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:
+    np = sparse = None
+
+BORROWINGS_WATERMARK = 'recommendations:borrowings'
+REVIEWS_WATERMARK = 'recommendations:reviews'
+
+ENGINES = ('auto', 'scipy', 'python')
+
+# Target books per sparse product; bounds the size of the dense-ish result.
+MATRIX_BLOCK = 2000
+WRITE_CHUNK = 500
+# Ids per ``__in`` filter when loading part of the baskets.
+READ_CHUNK = 500
+
+
+def get_setting(name, default):
+    return getattr(settings, name, default)
+
+
+def similar_books(book_id, limit=6):
+    """Books most often borrowed by readers of ``book_id``, best first."""
+    return Book.objects.for_cards().filter(neighbor_of__book_id=book_id).order_by('neighbor_of__rank')[:limit]
+
+
+def recommended_for(user, limit=6):
+    """Precomputed personal recommendations for ``user``, best first."""
+    return Book.objects.for_cards().filter(recommended_to__user=user).order_by('recommended_to__rank')[:limit]
+
+
+def _chunks(ids):
+    ids = sorted(ids)
+    for start in range(0, len(ids), READ_CHUNK):
+        yield ids[start:start + READ_CHUNK]
+
+
+def _basket_pairs(min_rating, **filters):
+    """``(user_id, book_id)`` of the borrowings and well-rated reviews matching ``filters``."""
+    for queryset in (Borrowing.objects.all(), Review.objects.filter(rating__gte=min_rating)):
+        yield from queryset.filter(**filters).order_by().values_list('user_id', 'book_id').iterator(chunk_size=10000)
+
+
+def load_baskets(min_rating, users=None):
+    """Map each student id (of ``users``, or everyone) to the set of book ids they borrowed or rated well."""
+    baskets = defaultdict(set)
+    groups = [{}] if users is None else ({'user_id__in': group} for group in _chunks(users))
+    for filters in groups:
+        for user_id, book_id in _basket_pairs(min_rating, **filters):
+            baskets[user_id].add(book_id)
+    return baskets
+
+
+def load_readers(min_rating, books):
+    """Ids of the students with any of ``books`` in their basket."""
+    readers = set()
+    for group in _chunks(books):
+        readers.update(user_id for user_id, _ in _basket_pairs(min_rating, book_id__in=group))
+    return readers
+
+
+def count_readers(min_rating, books):
+    """Number of baskets holding each of ``books``, counted in the database."""
+    counts = Counter()
+    # A student who borrowed a book and also reviewed it is one reader.
+    borrowed = Borrowing.objects.filter(user_id=OuterRef('user_id'), book_id=OuterRef('book_id'))
+    for group in _chunks(books):
+        querysets = (
+            Borrowing.objects.filter(book_id__in=group),
+            Review.objects.filter(book_id__in=group, rating__gte=min_rating).exclude(Exists(borrowed)),
+        )
+        for queryset in querysets:
+            counts.update(dict(
+                queryset.order_by().values('book_id')
+                .annotate(readers=Count('user_id', distinct=True)).values_list('book_id', 'readers')
+            ))
+    return counts
+
+
+def _ranked(candidates, k):
+    # candidates: (score, co_occurrences, book_id); ties go to the lower id.
+    return heapq.nlargest(k, candidates, key=lambda item: (item[0], item[1], -item[2]))
+
+
+def neighbors_python(baskets, books, k, min_support, reader_counts=None):
+    """
+    ``{book_id: [(score, co_occurrences, neighbor_id), ...]}`` for ``books``.
+
+    ``baskets`` must hold every reader of ``books``. When it holds only
+    those, ``reader_counts`` gives each book's reader total across all
+    baskets.
+    """
+    readers = defaultdict(list)
+    for user_id, basket in baskets.items():
+        for book_id in basket:
+            readers[book_id].append(user_id)
+    if reader_counts is None:
+        reader_counts = {book_id: len(users) for book_id, users in readers.items()}
+    result = {}
+    for book_id in books:
+        counts = Counter()
+        for user_id in readers.get(book_id, ()):
+            counts.update(baskets[user_id])
+        counts.pop(book_id, None)
+        own = reader_counts.get(book_id, 0)
+        result[book_id] = _ranked(
+            [
+                (count / math.sqrt(own * reader_counts[other]), count, other)
+                for other, count in counts.items() if count >= min_support
+            ],
+            k,
+        )
+    return result
+
+
+def neighbors_scipy(baskets, books, k, min_support, reader_counts=None):
+    """Same as ``neighbors_python``, computing ``X[:, books].T @ X`` on sparse matrices."""
+    book_ids = np.array(sorted({book_id for basket in baskets.values() for book_id in basket}), dtype=np.int64)
+    column = {int(book_id): index for index, book_id in enumerate(book_ids)}
+    rows, cols = [], []
+    for row, basket in enumerate(baskets.values()):
+        rows.extend([row] * len(basket))
+        cols.extend(column[book_id] for book_id in basket)
+    matrix = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.float64), (rows, cols)), shape=(len(baskets), len(book_ids)),
+    )
+    if reader_counts is None:
+        readers = np.asarray(matrix.sum(axis=0)).ravel()
+    else:
+        readers = np.array([reader_counts[int(book_id)] for book_id in book_ids], dtype=np.float64)
+    by_column = matrix.tocsc()
+
+    result = {book_id: [] for book_id in books}
+    targets = [book_id for book_id in books if book_id in column]
+    for start in range(0, len(targets), MATRIX_BLOCK):
+        block = np.array([column[book_id] for book_id in targets[start:start + MATRIX_BLOCK]], dtype=np.int64)
+        co_occurrence = (by_column[:, block].T @ matrix).tocsr()
+        for row, target in enumerate(block):
+            begin, end = co_occurrence.indptr[row], co_occurrence.indptr[row + 1]
+            others = co_occurrence.indices[begin:end]
+            counts = co_occurrence.data[begin:end]
+            keep = (others != target) & (counts >= min_support)
+            others, counts = others[keep], counts[keep]
+            if not len(others):
+                continue
+            scores = counts / np.sqrt(readers[target] * readers[others])
+            order = np.lexsort((book_ids[others], -counts, -scores))[:k]
+            result[int(book_ids[target])] = [
+                (float(scores[i]), int(counts[i]), int(book_ids[others[i]])) for i in order
+            ]
+    return result
+
+
+def personal_recommendations(baskets, users, neighbors, k):
+    """``{user_id: [(score, 0, book_id), ...]}`` from the neighbour lists of each basket."""
+    result = {}
+    for user_id in users:
+        basket = baskets.get(user_id, ())
+        scores = defaultdict(float)
+        for book_id in basket:
+            for score, _, other in neighbors.get(book_id, ()):
+                if other not in basket:
+                    scores[other] += score
+        result[user_id] = _ranked([(score, 0, book_id) for book_id, score in scores.items()], k)
+    return result
+
+
+def _replace(model, owner_field, lists, computed_at, make):
+    """Swap the stored rows of each owner for its new list, a chunk per transaction."""
+    owners = list(lists)
+    written = 0
+    for start in range(0, len(owners), WRITE_CHUNK):
+        chunk = owners[start:start + WRITE_CHUNK]
+        rows = [
+            make(owner, rank, entry, computed_at)
+            for owner in chunk
+            for rank, entry in enumerate(lists[owner], 1)
+        ]
+        with transaction.atomic():
+            model.objects.filter(**{f'{owner_field}__in': chunk}).delete()
+            model.objects.bulk_create(rows)
+        written += len(rows)
+    return written
+
+
+def _make_neighbor(book_id, rank, entry, computed_at):
+    score, count, neighbor_id = entry
+    return BookNeighbor(
+        book_id=book_id, neighbor_id=neighbor_id, rank=rank, score=score,
+        co_occurrences=count, computed_at=computed_at,
+    )
+
+
+def _make_recommendation(user_id, rank, entry, computed_at):
+    score, _, book_id = entry
+    return UserRecommendation(user_id=user_id, book_id=book_id, rank=rank, score=score, computed_at=computed_at)
+
+
+def _changed_users(watermarks, uppers, min_rating):
+    users = set(
+        Borrowing.objects.filter(id__gt=watermarks[BORROWINGS_WATERMARK], id__lte=uppers[BORROWINGS_WATERMARK])
+        .order_by().values_list('user_id', flat=True).distinct()
+    )
+    users.update(
+        Review.objects.filter(
+            id__gt=watermarks[REVIEWS_WATERMARK], id__lte=uppers[REVIEWS_WATERMARK], rating__gte=min_rating,
+        ).order_by().values_list('user_id', flat=True).distinct()
+    )
+    return users
+
+
+def build(full=False, engine='auto', k=None, min_support=None):
+    """Recompute stored neighbours and personal recommendations; returns a report."""
+    started = time.perf_counter()
+    k = k or get_setting('LIBRARY_RECOMMENDATION_NEIGHBORS', 10)
+    per_user = get_setting('LIBRARY_RECOMMENDATIONS_PER_USER', 12)
+    min_support = min_support or get_setting('LIBRARY_RECOMMENDATION_MIN_SUPPORT', 2)
+    min_rating = get_setting('LIBRARY_RECOMMENDATION_MIN_RATING', 3)
+    if engine == 'auto':
+        engine = 'scipy' if sparse is not None else 'python'
+    elif engine == 'scipy' and sparse is None:
+        raise ImportError('The scipy engine needs NumPy and SciPy installed.')
+
+    uppers = {
+        BORROWINGS_WATERMARK: Borrowing.objects.aggregate(last=Max('id'))['last'] or 0,
+        REVIEWS_WATERMARK: Review.objects.aggregate(last=Max('id'))['last'] or 0,
+    }
+    watermarks = dict(
+        RollupWatermark.objects.filter(name__in=uppers).values_list('name', 'last_id')
+    )
+    full = full or len(watermarks) < len(uppers)
+
+    if full:
+        baskets = load_baskets(min_rating)
+        users = set(baskets)
+        books = {book_id for basket in baskets.values() for book_id in basket}
+        reader_counts = None
+    else:
+        users = _changed_users(watermarks, uppers, min_rating)
+        books = {book_id for basket in load_baskets(min_rating, users).values() for book_id in basket}
+        # Every co-occurrence of those books is in their readers' baskets.
+        baskets = load_baskets(min_rating, load_readers(min_rating, books))
+        reader_counts = count_readers(min_rating, {book_id for basket in baskets.values() for book_id in basket})
+
+    compute = neighbors_scipy if engine == 'scipy' else neighbors_python
+    neighbors = compute(baskets, sorted(books), k, min_support, reader_counts)
+    recommendations = personal_recommendations(baskets, sorted(users), neighbors, per_user)
+
+    computed_at = timezone.now()
+    neighbor_rows = _replace(BookNeighbor, 'book_id', neighbors, computed_at, _make_neighbor)
+    recommendation_rows = _replace(UserRecommendation, 'user_id', recommendations, computed_at, _make_recommendation)
+    if full:
+        # Books and students that dropped out of every basket keep no rows.
+        BookNeighbor.objects.filter(computed_at__lt=computed_at).delete()
+        UserRecommendation.objects.filter(computed_at__lt=computed_at).delete()
+
+    with transaction.atomic():
+        for name, last_id in uppers.items():
+            RollupWatermark.objects.update_or_create(name=name, defaults={'last_id': last_id})
+
+    return {
+        'mode': 'full' if full else 'incremental',
+        'engine': engine,
+        'students': len(users),
+        'books': len(books),
+        'baskets_loaded': len(baskets),
+        'neighbor_rows': neighbor_rows,
+        'recommendation_rows': recommendation_rows,
+        'seconds': round(time.perf_counter() - started, 3),
+    }
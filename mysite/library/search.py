@@ -0,0 +1,241 @@
+"""
+Full-text search over the book catalog.
+
+On SQLite builds with FTS5 the catalog is mirrored into the
+``library_book_fts`` virtual table (rowid = book id), created by migration
+0004, and ranked with BM25.
+Other databases fall back to a per-process inverted index that implements
+the same ranking in Python.
+"""
+
+import math
+import re
+import threading
+from bisect import bisect_left
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import connection
+
+FTS_TABLE = 'library_book_fts'
+
+# Column weights for bm25(): title, author, category, description.
+FIELD_WEIGHTS = (10.0, 5.0, 2.0, 1.0)
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+_INDEX_SELECT = f"""
+    INSERT INTO {FTS_TABLE} (rowid, title, author, category, description)
+    SELECT b.id, b.title, a.name, COALESCE(c.name, ''), b.description
+    FROM library_book b
+    JOIN library_author a ON a.id = b.author_id
+    LEFT JOIN library_category c ON c.id = b.category_id
+"""
+
+_fts_state = {}
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall((text or '').lower())
+
+
+def fts_available():
+    """Whether the FTS5 table exists on the default database (cached per database)."""
+    if connection.vendor != 'sqlite':
+        return False
+    key = str(connection.settings_dict['NAME'])
+    if key not in _fts_state:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE]
+            )
+            _fts_state[key] = cursor.fetchone() is not None
+    return _fts_state[key]
+
+
+def _build_match(tokens):
+    # Every token must match; the last one is a prefix so partial words still hit.
+    terms = ['"%s"' % token for token in tokens]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def search_book_ids(query, category_id=None, limit=None):
+    """Return ids of books matching ``query``, best BM25 match first."""
+    tokens = tokenize(query)
+    if not tokens:
+        return []
+    if limit is None:
+        limit = getattr(settings, 'LIBRARY_SEARCH_MAX_RESULTS', 1000)
+    if not fts_available():
+        return inverted_index.search(tokens, category_id=category_id, limit=limit)
+
+    sql = (
+        f"SELECT f.rowid FROM {FTS_TABLE} f "
+        "JOIN library_book b ON b.id = f.rowid "
+        f"WHERE {FTS_TABLE} MATCH %s"
+    )
+    params = [_build_match(tokens)]
+    if category_id:
+        sql += " AND b.category_id = %s"
+        params.append(category_id)
+    sql += f" ORDER BY bm25({FTS_TABLE}, {', '.join(map(str, FIELD_WEIGHTS))}) LIMIT %s"
+    params.append(limit)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def index_books(where, params=()):
+    """Re-index the books selected by a WHERE clause on ``library_book b``."""
+    if fts_available():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {FTS_TABLE} WHERE rowid IN (SELECT b.id FROM library_book b WHERE {where})",
+                params,
+            )
+            cursor.execute(f"{_INDEX_SELECT} WHERE {where}", params)
+    elif inverted_index.is_built:
+        inverted_index.add_books(_fetch_documents(where, params))
+
+
+def remove_book(book_id):
+    if fts_available():
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [book_id])
+    elif inverted_index.is_built:
+        inverted_index.remove(book_id)
+
+
+def rebuild_index():
+    """Rebuild the whole search index; returns the number of indexed books."""
+    _fts_state.clear()
+    if fts_available():
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+            cursor.execute(_INDEX_SELECT)
+            cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+            cursor.execute(f"SELECT COUNT(*) FROM {FTS_TABLE}")
+            return cursor.fetchone()[0]
+    inverted_index.reset()
+    inverted_index.build()
+    return len(inverted_index.doc_lengths)
+
+
+def _fetch_documents(where='1 = 1', params=()):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT b.id, b.category_id, b.title, a.name, COALESCE(c.name, ''), b.description "
+            "FROM library_book b "
+            "JOIN library_author a ON a.id = b.author_id "
+            "LEFT JOIN library_category c ON c.id = b.category_id "
+            f"WHERE {where}",
+            params,
+        )
+        for book_id, category_id, *fields in cursor.fetchall():
+            yield book_id, category_id, fields
+
+
+class InvertedIndex:
+    """In-memory BM25 index used when FTS5 is not available."""
+
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.is_built = False
+            self.postings = defaultdict(dict)
+            self.doc_lengths = {}
+            self.doc_terms = {}
+            self.categories = {}
+            self.total_length = 0.0
+            self._sorted_terms = None
+
+    def build(self):
+        with self._lock:
+            if not self.is_built:
+                self.add_books(_fetch_documents())
+                self.is_built = True
+
+    def add_books(self, documents):
+        with self._lock:
+            for book_id, category_id, fields in documents:
+                self.remove(book_id)
+                weighted = Counter()
+                for weight, text in zip(FIELD_WEIGHTS, fields):
+                    for token in tokenize(text):
+                        weighted[token] += weight
+                for term, frequency in weighted.items():
+                    self.postings[term][book_id] = frequency
+                length = sum(weighted.values())
+                self.doc_lengths[book_id] = length
+                self.doc_terms[book_id] = list(weighted)
+                self.categories[book_id] = category_id
+                self.total_length += length
+            self._sorted_terms = None
+
+    def remove(self, book_id):
+        with self._lock:
+            if book_id not in self.doc_lengths:
+                return
+            for term in self.doc_terms.pop(book_id):
+                self.postings[term].pop(book_id, None)
+                if not self.postings[term]:
+                    del self.postings[term]
+            self.total_length -= self.doc_lengths.pop(book_id)
+            self.categories.pop(book_id, None)
+            self._sorted_terms = None
+
+    def _expand_prefix(self, prefix):
+        if self._sorted_terms is None:
+            self._sorted_terms = sorted(self.postings)
+        terms = self._sorted_terms
+        position = bisect_left(terms, prefix)
+        while position < len(terms) and terms[position].startswith(prefix):
+            yield terms[position]
+            position += 1
+
+    def search(self, tokens, category_id=None, limit=1000):
+        self.build()
+        with self._lock:
+            doc_count = len(self.doc_lengths)
+            if not doc_count:
+                return []
+            average_length = self.total_length / doc_count
+            scores = None
+            for position, token in enumerate(tokens):
+                terms = [token]
+                if position == len(tokens) - 1:
+                    terms = list(self._expand_prefix(token))
+                token_scores = defaultdict(float)
+                for term in terms:
+                    postings = self.postings.get(term, {})
+                    idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                    for book_id, frequency in postings.items():
+                        norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[book_id] / average_length)
+                        token_scores[book_id] += idf * frequency * (self.k1 + 1) / (frequency + norm)
+                if scores is None:
+                    scores = token_scores
+                else:
+                    scores = {
+                        book_id: score + token_scores[book_id]
+                        for book_id, score in scores.items() if book_id in token_scores
+                    }
+                if not scores:
+                    return []
+            if category_id:
+                scores = {
+                    book_id: score for book_id, score in scores.items()
+                    if str(self.categories.get(book_id)) == str(category_id)
+                }
+            ranked = sorted(scores.items(), key=lambda item: (-item[1], -item[0]))
+            return [book_id for book_id, _ in ranked[:limit]]
+
+
+inverted_index = InvertedIndex()
+
@@ -0,0 +1,159 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import conditional, images, search, stats
+from .autocomplete import AUTHOR, BOOK, suggestion_index
+from .models import Author, Book, Borrowing, Category, Review, UserProfile
+
+SEARCH_FIELDS = {'title', 'description', 'author', 'author_id', 'category', 'category_id'}
+
+
+@receiver(pre_save, sender=Review)
+def note_review_book_change(sender, instance, update_fields=None, **kwargs):
+    # A review moved to another book takes its rating off the old one as well.
+    instance._previous_book_id = None
+    if instance.pk is None or (update_fields is not None and not {'book', 'book_id'} & set(update_fields)):
+        return
+    previous = Review.objects.filter(pk=instance.pk).values_list('book_id', flat=True).first()
+    if previous is not None and previous != instance.book_id:
+        instance._previous_book_id = previous
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def update_book_ratings(sender, instance, **kwargs):
+    book_ids = [instance.book_id]
+    if getattr(instance, '_previous_book_id', None):
+        book_ids.append(instance._previous_book_id)
+    Book.objects.filter(pk__in=book_ids).refresh_ratings()
+
+
+@receiver(post_save, sender=Review)
+def count_review(sender, instance, created=False, **kwargs):
+    if created:
+        UserProfile.objects.filter(user_id=instance.user_id).adjust_counters(review_count=1)
+
+
+@receiver(post_delete, sender=Review)
+def uncount_review(sender, instance, **kwargs):
+    UserProfile.objects.filter(user_id=instance.user_id).adjust_counters(review_count=-1)
+
+
+@receiver(post_save, sender=Borrowing)
+def count_borrowing(sender, instance, created=False, **kwargs):
+    # inventory.borrow bumps the counters itself, where it enforces the limit.
+    if not created or getattr(instance, '_counted', False):
+        return
+    active = not instance.returned
+    UserProfile.objects.filter(user_id=instance.user_id).adjust_counters(
+        active_borrow_count=1 if active else 0,
+        total_borrow_count=1,
+        overdue_count=1 if active and instance.overdue else 0,
+    )
+
+
+@receiver(post_delete, sender=Borrowing)
+def uncount_borrowing(sender, instance, **kwargs):
+    active = not instance.returned
+    UserProfile.objects.filter(user_id=instance.user_id).adjust_counters(
+        active_borrow_count=-1 if active else 0,
+        total_borrow_count=-1,
+        overdue_count=-1 if active and instance.overdue else 0,
+    )
+
+
+@receiver(post_save, sender=Book)
+def index_book(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not SEARCH_FIELDS.intersection(update_fields):
+        return
+    search.index_books('b.id = %s', [instance.pk])
+    suggestion_index.add(BOOK, instance.pk, instance.title)
+
+
+@receiver(post_delete, sender=Book)
+def unindex_book(sender, instance, **kwargs):
+    search.remove_book(instance.pk)
+    suggestion_index.remove(BOOK, instance.pk)
+
+
+@receiver(post_save, sender=Author)
+def index_author_books(sender, instance, created=False, **kwargs):
+    suggestion_index.add(AUTHOR, instance.pk, instance.name)
+    if not created:
+        search.index_books('b.author_id = %s', [instance.pk])
+
+
+@receiver(post_delete, sender=Author)
+def unindex_author(sender, instance, **kwargs):
+    suggestion_index.remove(AUTHOR, instance.pk)
+
+
+@receiver(post_save, sender=Category)
+def index_category_books(sender, instance, created=False, **kwargs):
+    if not created:
+        search.index_books('b.category_id = %s', [instance.pk])
+
+
+@receiver(post_delete, sender=Category)
+def index_uncategorized_books(sender, instance, **kwargs):
+    search.index_books('b.category_id IS NULL')
+
+
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
+@receiver(post_save, sender=Author)
+@receiver(post_delete, sender=Author)
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_home_stats(sender, **kwargs):
+    stats.invalidate(stats.HOME_STATS_KEY)
+
+
+@receiver(pre_save, sender=User)
+def note_staff_change(sender, instance, update_fields=None, **kwargs):
+    # Logins save only last_login; skip the lookup when is_staff is not written.
+    instance._staff_changed = False
+    if instance.pk is None or (update_fields is not None and 'is_staff' not in update_fields):
+        return
+    was_staff = User.objects.filter(pk=instance.pk).values_list('is_staff', flat=True).first()
+    instance._staff_changed = was_staff is not None and was_staff != instance.is_staff
+
+
+@receiver(post_save, sender=User)
+def invalidate_student_count(sender, instance, created=False, **kwargs):
+    # The home page counts non-staff users, so only new users and staff changes matter.
+    if created or getattr(instance, '_staff_changed', False):
+        stats.invalidate(stats.HOME_STATS_KEY)
+
+
+@receiver(post_delete, sender=Book)
+@receiver(post_delete, sender=Author)
+@receiver(post_delete, sender=Category)
+def count_catalog_deletion(sender, **kwargs):
+    conditional.count_deletion(sender)
+
+
+IMAGE_FIELDS = {Book: 'cover_image', Author: 'photo', UserProfile: 'profile_picture'}
+
+
+@receiver(pre_save, sender=Book)
+@receiver(pre_save, sender=Author)
+@receiver(pre_save, sender=UserProfile)
+def note_new_image(sender, instance, **kwargs):
+    # A newly assigned upload is still uncommitted here; the field writes it
+    # to storage after this signal. Files already stored are left alone.
+    field = getattr(instance, IMAGE_FIELDS[sender])
+    instance._new_image = bool(field) and not field._committed
+
+
+@receiver(post_save, sender=Book)
+@receiver(post_save, sender=Author)
+@receiver(post_save, sender=UserProfile)
+def generate_image_derivatives(sender, instance, update_fields=None, **kwargs):
+    field_name = IMAGE_FIELDS[sender]
+    if update_fields is not None and field_name not in update_fields:
+        return
+    if getattr(instance, '_new_image', False):
+        images.process_upload(getattr(instance, field_name))
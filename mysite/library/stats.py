@@ -0,0 +1,203 @@
+"""
+Cached home page statistics.
+
+The counts and leaderboards on the home page change far less often than the
+page is viewed, so they are computed once and kept in the Django cache
+(LIBRARY_STATS_CACHE alias). Model signals mark the entry stale by bumping a
+generation counter stored next to it; while one request recomputes it under
+a cache lock, concurrent requests keep serving the previous value instead of
+stampeding the database.
+"""
+
+import asyncio
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+
+from .models import Author, Book
+
+HOME_STATS_KEY = 'library:home-stats'
+
+
+def get_cache():
+    return caches[getattr(settings, 'LIBRARY_STATS_CACHE', 'default')]
+
+
+def _generation_key(key):
+    return f'{key}:generation'
+
+
+def _is_fresh(entry, generation):
+    return entry is not None and entry['fresh_until'] > time.time() and entry.get('generation') == generation
+
+
+def cached_value(key, compute, ttl, stale_ttl=None, lock_timeout=30, wait=5.0):
+    """
+    Return the cached result of ``compute()``, recomputing it at most once at a time.
+
+    Entries are stored with a soft expiry: past it (or after ``invalidate``) the
+    first caller to grab the lock recomputes while everyone else gets the stale
+    value. Only a completely cold cache makes callers wait for the lock holder.
+    """
+    cache = get_cache()
+    generation_key = _generation_key(key)
+    cached = cache.get_many([key, generation_key])
+    entry, generation = cached.get(key), cached.get(generation_key)
+    if _is_fresh(entry, generation):
+        return entry['value']
+
+    lock_key = f'{key}:lock'
+    if cache.add(lock_key, 1, lock_timeout):
+        try:
+            value = compute()
+            # Tagged with the generation read before computing: an invalidation
+            # that lands meanwhile leaves this entry stale.
+            entry = {'value': value, 'fresh_until': time.time() + ttl, 'generation': generation}
+            cache.set(key, entry, stale_ttl or ttl * 10)
+        finally:
+            cache.delete(lock_key)
+        return value
+
+    if entry is not None:
+        return entry['value']
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry['value']
+    return compute()
+
+
+async def acached_value(key, compute, ttl, stale_ttl=None, lock_timeout=30, wait=5.0):
+    """``cached_value`` for async callers; ``compute`` is a coroutine function."""
+    cache = get_cache()
+    generation_key = _generation_key(key)
+    cached = await cache.aget_many([key, generation_key])
+    entry, generation = cached.get(key), cached.get(generation_key)
+    if _is_fresh(entry, generation):
+        return entry['value']
+
+    lock_key = f'{key}:lock'
+    if await cache.aadd(lock_key, 1, lock_timeout):
+        try:
+            value = await compute()
+            entry = {'value': value, 'fresh_until': time.time() + ttl, 'generation': generation}
+            await cache.aset(key, entry, stale_ttl or ttl * 10)
+        finally:
+            await cache.adelete(lock_key)
+        return value
+
+    if entry is not None:
+        return entry['value']
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+        entry = await cache.aget(key)
+        if entry is not None:
+            return entry['value']
+    return await compute()
+
+
+def get_generation(key):
+    """The current generation counter of ``key``, started at 0 if it has none."""
+    cache = get_cache()
+    generation_key = _generation_key(key)
+    generation = cache.get(generation_key)
+    if generation is None:
+        cache.add(generation_key, 0, None)
+        generation = cache.get(generation_key)
+    return generation
+
+
+def bump_generation(key):
+    """Advance the generation counter of ``key`` and return the new value."""
+    cache = get_cache()
+    generation_key = _generation_key(key)
+    cache.add(generation_key, 0, None)
+    try:
+        return cache.incr(generation_key)
+    except ValueError:
+        # Evicted between the add and the incr; any other value is a change too.
+        generation = time.time_ns()
+        cache.set(generation_key, generation, None)
+        return generation
+
+
+def invalidate(key):
+    """
+    Mark a cached entry stale without dropping it, so readers keep a value to serve.
+
+    Bumps the key's generation rather than rewriting the entry, so a
+    recompute already in flight cannot store over the invalidation.
+    """
+    bump_generation(key)
+
+
+def compute_home_stats():
+    return {
+        'latest_ids': list(Book.objects.values_list('id', flat=True)[:6]),
+        'top_rated_ids': list(
+            Book.objects.filter(rating_count__gt=0).order_by('-rating_avg', '-id').values_list('id', flat=True)[:3]
+        ),
+        'total_books': Book.objects.count(),
+        'total_authors': Author.objects.count(),
+        'total_students': User.objects.filter(is_staff=False).count(),
+    }
+
+
+async def acompute_home_stats():
+    # Awaited in turn: the async ORM runs them one at a time on one thread anyway.
+    latest_ids = await _alist(Book.objects.values_list('id', flat=True)[:6])
+    top_rated_ids = await _alist(
+        Book.objects.filter(rating_count__gt=0).order_by('-rating_avg', '-id').values_list('id', flat=True)[:3]
+    )
+    total_books = await Book.objects.acount()
+    total_authors = await Author.objects.acount()
+    total_students = await User.objects.filter(is_staff=False).acount()
+    return {
+        'latest_ids': latest_ids,
+        'top_rated_ids': top_rated_ids,
+        'total_books': total_books,
+        'total_authors': total_authors,
+        'total_students': total_students,
+    }
+
+
+async def _alist(queryset):
+    return [row async for row in queryset]
+
+
+def get_home_stats():
+    """Counts plus latest/top-rated books; only the book rows are read per request."""
+    stats = cached_value(
+        HOME_STATS_KEY,
+        compute_home_stats,
+        ttl=getattr(settings, 'LIBRARY_HOME_STATS_TTL', 300),
+    )
+    books = Book.objects.for_cards().in_bulk(stats['latest_ids'] + stats['top_rated_ids'])
+    return {
+        'latest_books': [books[pk] for pk in stats['latest_ids'] if pk in books],
+        'top_rated_books': [books[pk] for pk in stats['top_rated_ids'] if pk in books],
+        'total_books': stats['total_books'],
+        'total_authors': stats['total_authors'],
+        'total_students': stats['total_students'],
+    }
+
+
+async def aget_home_stats():
+    stats = await acached_value(
+        HOME_STATS_KEY,
+        acompute_home_stats,
+        ttl=getattr(settings, 'LIBRARY_HOME_STATS_TTL', 300),
+    )
+    books = await Book.objects.for_cards().ain_bulk(stats['latest_ids'] + stats['top_rated_ids'])
+    return {
+        'latest_books': [books[pk] for pk in stats['latest_ids'] if pk in books],
+        'top_rated_books': [books[pk] for pk in stats['top_rated_ids'] if pk in books],
+        'total_books': stats['total_books'],
+        'total_authors': stats['total_authors'],
+        'total_students': stats['total_students'],
+    }
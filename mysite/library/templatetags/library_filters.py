@@ -1,9 +1,26 @@
 
+import hashlib
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
 from django import template
+from django.conf import settings
+from django.core.cache import caches
+from django.template.loader import render_to_string
+from django.utils.html import format_html
 from django.utils.safestring import mark_safe
 
+from library import images
+
 register = template.Library()
 
+_card_stats_lock = threading.Lock()
+_card_stats = {'hits': 0, 'misses': 0, 'render_seconds': 0.0}
+# Counters for the request being rendered in this context (track_book_cards).
+_request_card_stats = ContextVar('request_card_stats', default=None)
+
 
 @register.filter(name='book_status')
 def book_status(book):
@@ -26,3 +43,99 @@ def empty_star_range(value):
         return range(5 - int(value))
     except (ValueError, TypeError):
         return range(5)
+
+
+def book_card_cache_key(book, options):
+    # Any change that alters the card's markup changes the key, so stale
+    # entries are simply never read again and age out of the cache.
+    version = '|'.join(str(part) for part in (
+        book.updated_at.timestamp() if book.updated_at else '',
+        book.rating_count,
+        book.rating_avg,
+        book.available_copies,
+        book.author.name if options['show_author'] else '',
+        book.category.name if options['show_category'] and book.category else '',
+        options['featured'],
+    ))
+    digest = hashlib.sha1(version.encode()).hexdigest()[:16]
+    return f'library:book-card:{book.pk}:{digest}'
+
+
+@register.simple_tag
+def book_card(book, show_author=False, show_category=False, featured=False):
+    """Render the shared book card partial, caching the HTML per book version."""
+    options = {'show_author': show_author, 'show_category': show_category, 'featured': featured}
+    cache = caches[getattr(settings, 'LIBRARY_STATS_CACHE', 'default')]
+    key = book_card_cache_key(book, options)
+    html = cache.get(key)
+    if html is not None:
+        _count_card(hits=1)
+        return mark_safe(html)
+
+    started = time.perf_counter()
+    html = render_to_string('library/partials/book_card.html', dict(options, book=book))
+    elapsed = time.perf_counter() - started
+    cache.set(key, html, getattr(settings, 'LIBRARY_BOOK_CARD_TTL', 3600))
+    _count_card(misses=1, render_seconds=elapsed)
+    return mark_safe(html)
+
+
+def _count_card(**amounts):
+    with _card_stats_lock:
+        for stats in (_card_stats, _request_card_stats.get()):
+            if stats is not None:
+                for key, amount in amounts.items():
+                    stats[key] += amount
+
+
+@contextmanager
+def track_book_cards():
+    """Collect card hits, misses and render time for the code run inside the block only."""
+    stats = {'hits': 0, 'misses': 0, 'render_seconds': 0.0}
+    token = _request_card_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _request_card_stats.reset(token)
+
+
+def get_book_card_stats():
+    """Hit/miss counters plus the render time the hits are estimated to have saved."""
+    with _card_stats_lock:
+        stats = dict(_card_stats)
+    average = stats['render_seconds'] / stats['misses'] if stats['misses'] else 0.0
+    stats['saved_seconds'] = stats['hits'] * average
+    return stats
+
+
+@register.simple_tag
+def responsive_image(field, alt='', sizes='100vw', class_name='', style='', width=320):
+    """
+    <picture> markup with WebP/JPEG srcsets for an image field.
+
+    Falls back to the original file when the derivatives have not been made.
+    """
+    if not field:
+        return ''
+    class_attr = format_html(' class="{}"', class_name) if class_name else ''
+    if style:
+        class_attr = format_html('{} style="{}"', class_attr, style)
+    try:
+        manifest = images.get_manifest(field.name, field.storage)
+    except Exception:
+        manifest = None
+    if manifest is None:
+        return format_html('<img src="{}" alt="{}"{} loading="lazy">', field.url, alt, class_attr)
+
+    storage = field.storage
+
+    def srcset(ext):
+        return ', '.join(f'{storage.url(path)} {w}w' for w, path in manifest['sources'][ext])
+
+    jpeg = manifest['sources']['jpeg']
+    fallback = min(jpeg, key=lambda source: abs(source[0] - width))[1]
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" alt="{}"{} loading="lazy" decoding="async"></picture>',
+        srcset('webp'), sizes, storage.url(fallback), srcset('jpeg'), sizes, alt, class_attr,
+    )
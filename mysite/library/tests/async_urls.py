@@ -0,0 +1,14 @@
+"""URLconf that serves the async catalog views, as LIBRARY_ASYNC_VIEWS does."""
+
+from django.urls import path
+
+from library import async_views
+from library.urls import urlpatterns as library_urlpatterns
+
+urlpatterns = [
+    path('', async_views.home, name='home'),
+    path('books/', async_views.all_books, name='all_books'),
+    path('book/<int:id>/', async_views.book_detail, name='book_detail'),
+    path('categories/', async_views.categories_page, name='categories'),
+    path('authors/', async_views.authors_page, name='authors'),
+] + library_urlpatterns
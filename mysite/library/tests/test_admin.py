@@ -0,0 +1,90 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from library.admin import BorrowingAdmin, MethodListFilter
+from library.models import Borrowing, VisitLog
+
+from .utils import LibraryTestCase, make_books, make_student
+
+
+class AdminTestCase(LibraryTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(User.objects.create_superuser(username='admin', password='secret'))
+
+    def changelist(self, model, query=''):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/admin/library/{model}/{query}')
+        self.assertEqual(response.status_code, 200)
+        return response.context['cl'], [query['sql'] for query in queries]
+
+
+class BorrowingChangelistTests(AdminTestCase):
+    def setUp(self):
+        super().setUp()
+        student = make_student()
+        now = timezone.now()
+        books = make_books(3)
+        self.late = Borrowing.objects.create(user=student, book=books[0], due_date=now - timedelta(days=1))
+        self.on_time = Borrowing.objects.create(user=student, book=books[1], due_date=now + timedelta(days=1))
+        self.returned = Borrowing.objects.create(
+            user=student, book=books[2], due_date=now - timedelta(days=1), returned=True, return_date=now,
+        )
+
+    def test_overdue_column_comes_from_the_annotation(self):
+        cl, queries = self.changelist('borrowing')
+        self.assertEqual({row.pk: row._is_overdue for row in cl.result_list}, {
+            self.late.pk: True, self.on_time.pk: False, self.returned.pk: False,
+        })
+        # The flag is computed in the one query that reads the page's rows.
+        row_queries = [sql for sql in queries if sql.startswith('SELECT "library_borrowing"."id"')]
+        self.assertEqual(len(row_queries), 1)
+        self.assertIn('"_is_overdue"', row_queries[0])
+
+    def test_overdue_column_sorts_in_the_database(self):
+        # Column numbers include the action checkbox in front of list_display.
+        column = BorrowingAdmin.list_display.index('is_overdue') + 1
+        cl, _ = self.changelist('borrowing', f'?o=-{column}')
+        self.assertEqual(cl.result_list[0].pk, self.late.pk)
+        cl, _ = self.changelist('borrowing', f'?o={column}')
+        self.assertEqual(cl.result_list[len(cl.result_list) - 1].pk, self.late.pk)
+
+
+class VisitLogChangelistTests(AdminTestCase):
+    def setUp(self):
+        super().setUp()
+        now = timezone.now()
+        logs = VisitLog.objects.bulk_create(
+            VisitLog(path=f'/page/{index}', method='POST' if index % 2 else 'GET', timestamp=now)
+            for index in range(6)
+        )
+        VisitLog.objects.filter(pk=logs[2].pk).delete()
+
+    def test_method_filter_uses_fixed_choices(self):
+        cl, queries = self.changelist('visitlog', '?method=POST')
+        self.assertEqual(sorted(log.method for log in cl.result_list), ['POST'] * 3)
+        self.assertFalse([sql for sql in queries if 'DISTINCT' in sql and 'library_visitlog' in sql])
+        method_filter = next(spec for spec in cl.filter_specs if isinstance(spec, MethodListFilter))
+        self.assertIn(('PATCH', 'PATCH'), method_filter.lookup_choices)
+
+    def test_small_lists_are_counted_exactly(self):
+        cl, _ = self.changelist('visitlog')
+        # The five rows left plus the visit this request logged.
+        self.assertEqual(cl.paginator.count, 6)
+
+    @override_settings(LIBRARY_ADMIN_EXACT_COUNT_LIMIT=2)
+    def test_large_unfiltered_lists_use_the_estimate(self):
+        cl, queries = self.changelist('visitlog')
+        # The id range still includes the deleted row.
+        self.assertEqual(cl.paginator.count, 7)
+        self.assertFalse([sql for sql in queries if 'COUNT(*)' in sql and 'library_visitlog' in sql])
+
+    @override_settings(LIBRARY_ADMIN_EXACT_COUNT_LIMIT=2)
+    def test_large_filtered_lists_are_counted_exactly(self):
+        cl, _ = self.changelist('visitlog', '?method=POST')
+        self.assertEqual(cl.paginator.count, 3)
@@ -0,0 +1,110 @@
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+
+from library import analytics
+from library.models import Borrowing, DailyCirculationStat, DailyVisitStat, RollupWatermark, VisitLog
+
+from .utils import LibraryTestCase, make_books, make_student
+
+DAY_ONE = datetime(2026, 3, 1, 12, tzinfo=dt_timezone.utc)
+DAY_TWO = DAY_ONE + timedelta(days=1)
+
+
+def watermark(name):
+    return RollupWatermark.objects.get(name=name)
+
+
+class VisitRollupTests(LibraryTestCase):
+    def setUp(self):
+        super().setUp()
+        self.student = make_student()
+        self.staff = make_student('librarian', is_staff=True)
+
+    def log(self, when, user=None, path='/books/', count=1):
+        VisitLog.objects.bulk_create(
+            VisitLog(path=path, method='GET', user=user, timestamp=when) for _ in range(count)
+        )
+
+    def totals(self):
+        return {
+            (stat.date, stat.path, stat.user_type): stat.views
+            for stat in DailyVisitStat.objects.all()
+        }
+
+    def test_visits_are_counted_once_per_day_path_and_user_type(self):
+        self.log(DAY_ONE, count=3)
+        self.log(DAY_ONE, user=self.student, count=2)
+        self.log(DAY_ONE, user=self.staff)
+        self.log(DAY_TWO, path='/', count=2)
+        # Chunks of two ids split the same (date, path, user_type) across statements.
+        analytics.rollup_visits(chunk_size=2)
+        self.assertEqual(self.totals(), {
+            (date(2026, 3, 1), '/books/', 'anonymous'): 3,
+            (date(2026, 3, 1), '/books/', 'student'): 2,
+            (date(2026, 3, 1), '/books/', 'staff'): 1,
+            (date(2026, 3, 2), '/', 'anonymous'): 2,
+        })
+        self.assertEqual(watermark(analytics.VISITS).last_id, VisitLog.objects.order_by('-id').first().id)
+
+        self.assertEqual(analytics.rollup_visits(), 0)
+        self.log(DAY_ONE, count=4)
+        analytics.rollup_visits()
+        self.assertEqual(self.totals()[(date(2026, 3, 1), '/books/', 'anonymous')], 7)
+        self.assertEqual(sum(self.totals().values()), 12)
+        self.assertEqual(analytics.rolled_up_visit_id(), VisitLog.objects.order_by('-id').first().id)
+
+
+class CirculationRollupTests(LibraryTestCase):
+    def setUp(self):
+        super().setUp()
+        self.books = make_books(2)
+        self.student = make_student()
+
+    def borrowing(self, book, borrowed, returned=None):
+        borrowing = Borrowing.objects.create(
+            user=self.student, book=book, due_date=borrowed + timedelta(days=14),
+            returned=returned is not None, return_date=returned,
+        )
+        Borrowing.objects.filter(pk=borrowing.pk).update(borrow_date=borrowed)
+        return borrowing
+
+    def stats(self):
+        return {
+            (stat.date, stat.book_id): (stat.borrows, stat.returns, stat.category_id)
+            for stat in DailyCirculationStat.objects.all()
+        }
+
+    def test_borrows_and_returns_share_the_daily_rows(self):
+        book, other = self.books
+        self.borrowing(book, DAY_ONE, returned=DAY_TWO)
+        self.borrowing(book, DAY_ONE)
+        self.borrowing(other, DAY_TWO, returned=DAY_TWO + timedelta(hours=1))
+
+        analytics.rollup_borrows(chunk_size=1)
+        analytics.rollup_returns(now=DAY_TWO + timedelta(days=1))
+        self.assertEqual(self.stats(), {
+            (date(2026, 3, 1), book.pk): (2, 0, book.category_id),
+            (date(2026, 3, 2), book.pk): (0, 1, book.category_id),
+            (date(2026, 3, 2), other.pk): (1, 1, other.category_id),
+        })
+        self.assertEqual(watermark(analytics.BORROWS).last_id, Borrowing.objects.order_by('-id').first().id)
+
+        self.assertEqual(analytics.rollup_borrows(), 0)
+        self.borrowing(other, DAY_TWO)
+        analytics.rollup_borrows()
+        self.assertEqual(self.stats()[(date(2026, 3, 2), other.pk)], (2, 1, other.category_id))
+
+    def test_returns_wait_until_they_have_settled(self):
+        returned_at = DAY_TWO
+        self.borrowing(self.books[0], DAY_ONE, returned=returned_at)
+
+        # Within SETTLE_TIME of the return: left for the next run.
+        self.assertEqual(analytics.rollup_returns(now=returned_at + analytics.SETTLE_TIME / 2), 0)
+        self.assertEqual(watermark(analytics.RETURNS).last_timestamp, returned_at - analytics.SETTLE_TIME / 2)
+        self.assertFalse(DailyCirculationStat.objects.exists())
+
+        later = returned_at + timedelta(hours=1)
+        self.assertEqual(analytics.rollup_returns(now=later), 1)
+        self.assertEqual(watermark(analytics.RETURNS).last_timestamp, later - analytics.SETTLE_TIME)
+        # Nothing new since the watermark: the same return is not counted again.
+        self.assertEqual(analytics.rollup_returns(now=later + timedelta(hours=1)), 0)
+        self.assertEqual(self.stats(), {(date(2026, 3, 2), self.books[0].pk): (0, 1, self.books[0].category_id)})
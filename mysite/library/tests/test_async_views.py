@@ -0,0 +1,89 @@
+from asgiref.sync import sync_to_async
+from django.test import override_settings
+
+from library import inventory
+from library.models import Book
+
+from .utils import LibraryTestCase, make_books, make_student
+
+amake_student = sync_to_async(make_student)
+aborrow = sync_to_async(inventory.borrow)
+aplace_hold = sync_to_async(inventory.place_hold)
+
+
+@override_settings(ROOT_URLCONF='library.tests.async_urls')
+class AsyncCatalogTests(LibraryTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.books = make_books(12, copies=1)
+        cls.other = make_books(3, description='A treatise on nebulous cartography.')
+
+    def ids(self, response):
+        return [book.id for book in response.context['page_obj']]
+
+    async def test_list_pages_match_the_sync_view(self):
+        paths = [
+            '/books/', '/books/?sort=oldest', '/books/?sort=highest_rated',
+            f'/books/?category={self.other[0].category_id}', '/books/?q=nebulous',
+        ]
+        for path in paths:
+            with self.subTest(path=path):
+                response = await self.async_client.get(path)
+                self.assertEqual(response.status_code, 200)
+                with override_settings(ROOT_URLCONF='mysite.urls'):
+                    expected = await self.async_client.get(path)
+                self.assertEqual(self.ids(response), self.ids(expected))
+                self.assertEqual(response.context['total_count'], expected.context['total_count'])
+
+    async def test_list_follows_the_next_cursor(self):
+        first = await self.async_client.get('/books/')
+        self.assertEqual(len(first.context['page_obj']), 9)
+        second = await self.async_client.get(f"/books/?{first.context['next_query']}")
+        newest = [book.id async for book in Book.objects.order_by('-created_at', '-id')]
+        self.assertEqual(self.ids(first) + self.ids(second), newest)
+
+    async def test_search_sorted_by_relevance(self):
+        response = await self.async_client.get('/books/?q=nebulous')
+        self.assertEqual(response.context['sort_by'], 'relevance')
+        self.assertEqual(sorted(self.ids(response)), sorted(book.id for book in self.other))
+
+    async def test_detail_for_anonymous_and_borrowing_student(self):
+        book = self.books[0]
+        response = await self.async_client.get(f'/book/{book.id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['book'], book)
+        self.assertFalse(response.context['user_currently_borrowed'])
+
+        student = await amake_student('reader')
+        other = await amake_student('waiting')
+        await aborrow(student, book)
+        await aplace_hold(other, book)
+        await self.async_client.aforce_login(student)
+        response = await self.async_client.get(f'/book/{book.id}/')
+        self.assertTrue(response.context['user_has_borrowed'])
+        self.assertTrue(response.context['user_currently_borrowed'])
+        self.assertIsNone(response.context['user_hold'])
+
+        await self.async_client.aforce_login(other)
+        response = await self.async_client.get(f'/book/{book.id}/')
+        self.assertEqual(response.context['user_hold'].position, 1)
+
+    async def test_missing_book_is_404(self):
+        response = await self.async_client.get('/book/999999/')
+        self.assertEqual(response.status_code, 404)
+
+    async def test_repeat_anonymous_request_is_304(self):
+        for path in ('/books/', f'/book/{self.books[0].id}/', '/categories/', '/authors/'):
+            with self.subTest(path=path):
+                first = await self.async_client.get(path)
+                self.assertEqual(first.status_code, 200)
+                repeat = await self.async_client.get(path, headers={'if-none-match': first['ETag']})
+                self.assertEqual(repeat.status_code, 304)
+                self.assertEqual(repeat.templates, [])
+
+    async def test_logged_in_requests_are_not_conditional(self):
+        await self.async_client.aforce_login(await amake_student('reader'))
+        response = await self.async_client.get('/books/')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response)
+
@@ -0,0 +1,84 @@
+from library import autocomplete
+from library.autocomplete import AUTHOR, BOOK, SUGGESTIONS_KEY, SuggestionIndex, suggestion_index
+from library.models import Author, Book
+
+from .utils import LibraryTestCase, make_books
+
+
+class AutocompleteEndpointTests(LibraryTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = Author.objects.create(name='Émile Zola')
+        cls.books = make_books(3, author=cls.author)
+        Book.objects.filter(pk=cls.books[0].pk).update(title='Straße der Ölsucher')
+
+    def setUp(self):
+        super().setUp()
+        suggestion_index.reset()
+
+    def suggest(self, **params):
+        response = self.client.get('/books/autocomplete/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()['suggestions']
+
+    def test_books_and_authors_link_to_their_pages(self):
+        self.assertEqual(self.suggest(q='émile'), [
+            {'type': AUTHOR, 'id': self.author.pk, 'label': 'Émile Zola', 'url': f'/author/{self.author.pk}/'},
+        ])
+        book = self.books[1]
+        self.assertEqual(self.suggest(q=book.title)[0]['url'], f'/book/{book.pk}/')
+
+    def test_empty_and_blank_queries_return_nothing(self):
+        self.assertEqual(self.suggest(), [])
+        self.assertEqual(self.suggest(q='   '), [])
+        self.assertFalse(suggestion_index.is_built)
+
+    def test_unicode_prefixes_match_case_insensitively(self):
+        for query in ('STRASSE', 'straße der öl', '  strasse   der  '):
+            with self.subTest(query=query):
+                self.assertEqual([s['id'] for s in self.suggest(q=query)], [self.books[0].pk])
+        self.assertEqual(self.suggest(q='emile'), [])
+
+    def test_limit_is_clamped(self):
+        make_books(25, author=self.author)
+        self.assertEqual(len(self.suggest(q='book')), 8)
+        self.assertEqual(len(self.suggest(q='book', limit=2)), 2)
+        self.assertEqual(len(self.suggest(q='book', limit=0)), 1)
+        self.assertEqual(len(self.suggest(q='book', limit=500)), 20)
+        self.assertEqual(len(self.suggest(q='book', limit='many')), 8)
+
+
+class SharedInvalidationTests(LibraryTestCase):
+    def setUp(self):
+        super().setUp()
+        self.loads = 0
+
+        def loader():
+            self.loads += 1
+            return autocomplete.load_catalog()
+
+        # Two processes' indexes, sharing the cache.
+        self.index = SuggestionIndex(loader, shared_key=SUGGESTIONS_KEY)
+        self.other = SuggestionIndex(autocomplete.load_catalog, shared_key=SUGGESTIONS_KEY)
+        self.book = make_books(1)[0]
+        self.index.build()
+        self.other.build()
+
+    def test_changes_made_elsewhere_rebuild_the_index(self):
+        Book.objects.filter(pk=self.book.pk).update(title='Renamed')
+        self.other.add(BOOK, self.book.pk, 'Renamed')
+        self.assertEqual([s['label'] for s in self.index.suggest('ren')], ['Renamed'])
+        self.assertEqual(self.loads, 2)
+
+    def test_importer_invalidation_reaches_every_index(self):
+        Book.objects.filter(pk=self.book.pk).update(title='Imported')
+        self.other.invalidate()
+        self.assertEqual([s['label'] for s in self.index.suggest('imp')], ['Imported'])
+        self.assertEqual([s['label'] for s in self.other.suggest('imp')], ['Imported'])
+
+    def test_own_changes_are_patched_without_a_rebuild(self):
+        self.index.add(BOOK, self.book.pk, 'Patched')
+        self.index.remove(AUTHOR, self.book.author_id)
+        self.assertEqual([s['label'] for s in self.index.suggest('pat')], ['Patched'])
+        self.assertEqual(self.index.suggest('test author'), [])
+        self.assertEqual(self.loads, 1)
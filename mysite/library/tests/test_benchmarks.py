@@ -0,0 +1,78 @@
+import json
+import shutil
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase
+
+from library.benchmarks import runner
+
+from .utils import LibraryTestCase, make_books
+
+
+def view(p95_ms, queries):
+    return {'p95_ms': p95_ms, 'queries': queries}
+
+
+class CompareTests(SimpleTestCase):
+    baseline = {
+        'views': {'home': view(10.0, 3), 'authors': view(20.0, 4)},
+        'load': {'rps': 100.0},
+    }
+
+    def test_results_within_tolerance_pass(self):
+        results = {'views': {'home': view(11.9, 3), 'authors': view(15.0, 2)}, 'load': {'rps': 81.0}}
+        self.assertEqual(runner.compare(results, self.baseline, tolerance=0.2), [])
+
+    def test_slower_pages_more_queries_and_lower_throughput_are_reported(self):
+        results = {'views': {'home': view(12.5, 3), 'authors': view(20.0, 5)}, 'load': {'rps': 79.0}}
+        self.assertEqual(runner.compare(results, self.baseline, tolerance=0.2), [
+            'home: p95 10.0ms -> 12.5ms',
+            'authors: queries 4 -> 5',
+            'load: 100.0 -> 79.0 req/s',
+        ])
+
+    def test_views_or_load_missing_on_either_side_are_skipped(self):
+        results = {'views': {'home': view(10.0, 3), 'new page': view(500.0, 40)}}
+        self.assertEqual(runner.compare(results, self.baseline), [])
+        self.assertEqual(runner.compare(results, {}), [])
+
+
+class BenchmarkCommandTests(LibraryTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        make_books(3)
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.output = Path(directory) / 'results.json'
+        self.baseline = Path(directory) / 'baseline.json'
+
+    def benchmark(self, **options):
+        call_command(
+            'benchmark_views', iterations=1, threads=0, output=str(self.output), stdout=StringIO(), **options,
+        )
+        return json.loads(self.output.read_text())
+
+    def write_baseline(self, results, **changes):
+        for name, fields in changes.items():
+            results['views'][name].update(fields)
+        self.baseline.write_text(json.dumps(results))
+
+    def test_results_are_compared_with_the_baseline(self):
+        results = self.benchmark()
+        self.assertIn('home', results['views'])
+        # Generous latency so only the query counts can regress.
+        for stats in results['views'].values():
+            stats['p95_ms'] = 1e6
+        self.write_baseline(results)
+        self.benchmark(baseline=str(self.baseline))
+
+        self.write_baseline(results, home={'queries': results['views']['home']['queries'] - 1})
+        with self.assertRaisesMessage(CommandError, '1 regressions against'):
+            self.benchmark(baseline=str(self.baseline))
@@ -0,0 +1,171 @@
+"""
+Concurrency tests for the inventory operations.
+
+Worker threads race borrows, returns, holds and pickups against one book
+through library.inventory, each on its own database connection, and the
+tests then check the invariants that the conditional UPDATEs and locks are
+there to protect.
+"""
+
+import threading
+import time
+from collections import Counter
+
+from django.db import OperationalError, connections
+from django.db.models import Count, Q
+from django.test import TransactionTestCase
+
+from library import inventory
+from library.models import Book, Borrowing, Hold, UserProfile
+
+from .utils import make_books, make_student
+
+
+def run_workers(target, chunks):
+    errors = []
+
+    def worker(chunk):
+        try:
+            target(chunk)
+        except Exception as exc:
+            errors.append(exc)
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=worker, args=(chunk,)) for chunk in chunks]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+
+
+def retry_locked(func, *args, attempts=50):
+    # The in-memory test database uses shared-cache table locks, which fail
+    # at once instead of waiting out the busy timeout like a database file.
+    for attempt in range(attempts):
+        try:
+            return func(*args)
+        except OperationalError:
+            if attempt == attempts - 1:
+                raise
+            time.sleep(0.005)
+
+
+class HoldQueueConcurrencyTests(TransactionTestCase):
+    threads = 4
+    students = 12
+    copies = 3
+    rounds = 2
+    timeout = 60.0
+
+    def test_returns_holds_and_pickups_keep_the_queue_consistent(self):
+        book = make_books(1, copies=self.copies)[0]
+        students = [make_student(f'holder-{index}') for index in range(self.students)]
+        # Every copy starts on loan, so the other students have to queue.
+        initial = {student.pk: inventory.borrow(student, book) for student in students[:self.copies]}
+        violations = []
+        lock = threading.Lock()
+        deadline = time.perf_counter() + self.timeout
+
+        def check():
+            # One statement, so the three numbers come from the same snapshot.
+            row = Book.objects.filter(pk=book.pk).annotate(
+                out=Count('borrowings', filter=Q(borrowings__returned=False), distinct=True),
+                reserved=Count('holds', filter=Q(holds__status=Hold.READY), distinct=True),
+            ).values('available_copies', 'out', 'reserved').get()
+            if row['available_copies'] + row['out'] + row['reserved'] != self.copies:
+                with lock:
+                    violations.append(row)
+
+        def step(state):
+            if state['borrowing'] is not None:
+                inventory.return_borrowing(state['borrowing'])
+                state['borrowing'] = None
+                state['cycles'] += 1
+            elif state['hold'] is None:
+                try:
+                    state['hold'] = inventory.place_hold(state['user'], book)
+                except inventory.BookAvailable:
+                    try:
+                        state['borrowing'] = inventory.borrow(state['user'], book)
+                    except inventory.BookUnavailable:
+                        pass
+            elif Hold.objects.filter(pk=state['hold'].pk, status=Hold.READY).exists():
+                state['borrowing'] = inventory.borrow(state['user'], book)
+                state['hold'] = None
+            else:
+                return
+            check()
+
+        def work(assigned):
+            pending = [
+                {'user': student, 'borrowing': initial.get(student.pk), 'hold': None, 'cycles': 0}
+                for student in assigned
+            ]
+            while pending and time.perf_counter() < deadline:
+                for state in pending:
+                    try:
+                        step(state)
+                    except OperationalError:
+                        pass
+                pending = [state for state in pending if state['cycles'] < self.rounds]
+                time.sleep(0.001)
+
+        run_workers(work, [students[i::self.threads] for i in range(self.threads)])
+
+        book.refresh_from_db()
+        self.assertEqual(violations, [])
+        served = list(
+            Hold.objects.filter(book=book, ready_at__isnull=False).order_by('ready_at', 'id').values_list('id', flat=True)
+        )
+        # All holds share one priority, so they must be served in the order placed.
+        self.assertEqual(served, sorted(served))
+        cycles = Counter(Borrowing.objects.filter(book=book).values_list('user_id', flat=True))
+        self.assertEqual({student.pk: cycles[student.pk] for student in students}, {student.pk: self.rounds for student in students})
+        self.assertFalse(Hold.objects.filter(book=book).active().exists())
+        self.assertEqual(book.available_copies, self.copies)
+        self.assertFalse(UserProfile.objects.drifted().exists())
+
+
+class BorrowingConcurrencyTests(TransactionTestCase):
+    threads = 6
+    students = 12
+    copies = 2
+    rounds = 3
+
+    def test_concurrent_borrowers_never_oversell(self):
+        book = make_books(1, copies=self.copies)[0]
+        students = [make_student(f'borrower-{index}') for index in range(self.students)]
+        active_counts = []
+        turned_away = []
+        lock = threading.Lock()
+
+        def work(assigned):
+            for _ in range(self.rounds):
+                for student in assigned:
+                    try:
+                        borrowing = inventory.borrow(student, book)
+                    except inventory.BookUnavailable:
+                        turned_away.append(student.pk)
+                        continue
+                    except OperationalError:
+                        continue
+                    active = retry_locked(Borrowing.objects.filter(book=book, returned=False).count)
+                    with lock:
+                        active_counts.append(active)
+                    # Keep the copy for a moment so that loans overlap.
+                    time.sleep(0.005)
+                    retry_locked(inventory.return_borrowing, borrowing)
+
+        run_workers(work, [students[i::self.threads] for i in range(self.threads)])
+
+        book.refresh_from_db()
+        # Some borrowers found no copy left, so the last copy was contended.
+        self.assertTrue(active_counts)
+        self.assertTrue(turned_away)
+        self.assertLessEqual(max(active_counts), self.copies)
+        outstanding = Borrowing.objects.filter(book=book, returned=False).count()
+        self.assertEqual(book.available_copies + outstanding, self.copies)
+        self.assertFalse(UserProfile.objects.drifted().exists())
@@ -0,0 +1,112 @@
+import shutil
+import sqlite3
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.db import OperationalError, transaction
+from django.db.utils import ConnectionHandler
+from django.test import SimpleTestCase
+
+from library import db
+
+
+class ProductionProfileTests(SimpleTestCase):
+    # The aliases below belong to a separate ConnectionHandler on a temporary file.
+    databases = {'default'}
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.path = str(Path(directory) / 'db.sqlite3')
+        self.connections = ConnectionHandler(db.sqlite_production_databases(self.path, timeout=0.1))
+        self.addCleanup(self.connections.close_all)
+        with self.connections[db.WRITER].cursor() as cursor:
+            cursor.execute('CREATE TABLE item (id INTEGER PRIMARY KEY, name TEXT)')
+
+    def pragma(self, alias, name):
+        with self.connections[alias].cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_writer_pragmas(self):
+        self.assertEqual(self.pragma(db.WRITER, 'journal_mode'), 'wal')
+        self.assertEqual(self.pragma(db.WRITER, 'synchronous'), 1)  # NORMAL
+        self.assertEqual(self.pragma(db.WRITER, 'temp_store'), 2)  # MEMORY
+        self.assertEqual(self.pragma(db.WRITER, 'query_only'), 0)
+
+    def test_reader_is_query_only(self):
+        self.assertEqual(self.pragma(db.READER, 'query_only'), 1)
+        with self.assertRaises(OperationalError):
+            with self.connections[db.READER].cursor() as cursor:
+                cursor.execute("INSERT INTO item (name) VALUES ('x')")
+
+    def test_writer_transactions_take_the_write_lock_up_front(self):
+        other = sqlite3.connect(self.path, timeout=0)
+        self.addCleanup(other.close)
+        with mock.patch('django.db.transaction.connections', self.connections), transaction.atomic(using=db.WRITER):
+            # Nothing written yet, but BEGIN IMMEDIATE already holds the lock.
+            with self.connections[db.WRITER].cursor() as cursor:
+                cursor.execute('SELECT COUNT(*) FROM item')
+            with self.assertRaisesMessage(sqlite3.OperationalError, 'database is locked'):
+                other.execute("INSERT INTO item (name) VALUES ('x')")
+        other.execute("INSERT INTO item (name) VALUES ('x')")
+
+    def test_router_reads_from_the_replica_outside_writer_transactions(self):
+        router = db.PrimaryReplicaRouter()
+        with mock.patch.object(db, 'connections', self.connections):
+            self.assertEqual(router.db_for_read(None), db.READER)
+            self.assertEqual(router.db_for_write(None), db.WRITER)
+            with mock.patch('django.db.transaction.connections', self.connections), transaction.atomic(using=db.WRITER):
+                self.assertEqual(router.db_for_read(None), db.WRITER)
+        self.assertTrue(router.allow_migrate(db.WRITER, 'library'))
+        self.assertFalse(router.allow_migrate(db.READER, 'library'))
+
+    def test_router_without_a_replica_reads_from_the_writer(self):
+        self.assertEqual(db.PrimaryReplicaRouter().db_for_read(None), db.WRITER)
+
+
+class RetryOnLockedTests(SimpleTestCase):
+    databases = {'default'}
+
+    def setUp(self):
+        patcher = mock.patch.dict(db.retry_stats, {'retries': 0, 'gave_up': 0})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def flaky(self, *errors):
+        calls = []
+
+        @db.retry_on_locked(attempts=3, delay=0)
+        def write():
+            calls.append(1)
+            if len(calls) <= len(errors):
+                raise errors[len(calls) - 1]
+            return 'done'
+        return write, calls
+
+    def test_lock_errors_are_retried(self):
+        write, calls = self.flaky(OperationalError('database is locked'), OperationalError('database is locked'))
+        self.assertEqual(write(), 'done')
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(db.retry_stats, {'retries': 2, 'gave_up': 0})
+
+    def test_gives_up_after_the_last_attempt(self):
+        write, calls = self.flaky(*[OperationalError('database is locked')] * 3)
+        with self.assertRaises(OperationalError):
+            write()
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(db.retry_stats, {'retries': 2, 'gave_up': 1})
+
+    def test_other_errors_are_not_retried(self):
+        write, calls = self.flaky(OperationalError('no such table: item'))
+        with self.assertRaises(OperationalError):
+            write()
+        self.assertEqual(len(calls), 1)
+
+    def test_inner_transactions_are_not_retried(self):
+        write, calls = self.flaky(OperationalError('database is locked'))
+        with transaction.atomic():
+            with self.assertRaises(OperationalError):
+                write()
+        self.assertEqual(len(calls), 1)
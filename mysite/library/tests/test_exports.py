@@ -0,0 +1,37 @@
+import csv
+import io
+import json
+
+from library import exports
+from library.models import Review
+
+from .utils import LibraryTestCase, make_books, make_student
+
+PAYLOADS = ['=HYPERLINK("http://evil.example","x")', '+1+2', '-2+3', '@SUM(A1)', '\t=1', '\r=1']
+
+
+class CsvInjectionTests(LibraryTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = make_student('librarian', is_staff=True)
+        book = make_books(1)[0]
+        for index, payload in enumerate(PAYLOADS):
+            Review.objects.create(user=make_student(f'reader{index}'), book=book, rating=3, comment=payload)
+
+    def export(self, fmt):
+        self.client.force_login(self.staff)
+        response = self.client.get(f'/export/reviews/?format={fmt}')
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_cells_that_look_like_formulas_are_quoted(self):
+        rows = list(csv.DictReader(io.StringIO(self.export('csv'), newline='')))
+        self.assertEqual([row['comment'] for row in rows], ["'" + payload for payload in PAYLOADS])
+
+    def test_jsonl_keeps_the_text_as_stored(self):
+        lines = self.export('jsonl').splitlines()
+        self.assertEqual([json.loads(line)['comment'] for line in lines], PAYLOADS)
+
+    def test_numbers_and_plain_text_are_unchanged(self):
+        output = b''.join(exports.iter_csv(['a', 'b', 'c'], [(-3, 'plain', None)])).decode()
+        self.assertEqual(output.splitlines(), ['a,b,c', '-3,plain,'])
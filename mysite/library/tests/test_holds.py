@@ -0,0 +1,34 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+from library import inventory
+from library.models import Hold
+
+from .utils import LibraryTestCase, make_books, make_student
+
+
+class HoldPageTests(LibraryTestCase):
+    def setUp(self):
+        super().setUp()
+        self.book = make_books(1, copies=1)[0]
+        self.reader = make_student('reader')
+        self.holder = make_student('holder')
+        loan = inventory.borrow(self.reader, self.book)
+        self.hold = inventory.place_hold(self.holder, self.book)
+        inventory.return_borrowing(loan)
+        self.client.force_login(self.holder)
+
+    def test_ready_hold_offers_the_copy(self):
+        response = self.client.get(f'/book/{self.book.id}/')
+        self.assertContains(response, 'A copy is held for you')
+        self.assertContains(response, f'/borrow/{self.book.id}/')
+
+    def test_lapsed_hold_not_yet_expired_by_the_job(self):
+        Hold.objects.filter(pk=self.hold.pk).update(expires_at=timezone.now() - timedelta(minutes=1))
+        for path in (f'/book/{self.book.id}/', '/my-books/'):
+            with self.subTest(path=path):
+                response = self.client.get(path)
+                self.assertNotContains(response, 'A copy is held for you')
+                self.assertNotContains(response, f'/borrow/{self.book.id}/')
+                self.assertContains(response, 'ickup window ended')
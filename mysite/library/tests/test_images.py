@@ -0,0 +1,142 @@
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from PIL import Image
+
+from library import images
+from library.models import Book, UserProfile
+from library.templatetags.library_filters import responsive_image
+
+from .utils import LibraryTestCase, make_books, make_student
+
+
+def image_upload(fmt='JPEG', size=(120, 80), name='photo.jpg', exif=None):
+    buffer = BytesIO()
+    options = {'exif': exif} if exif is not None else {}
+    Image.new('RGB', size, (200, 30, 30)).save(buffer, fmt, **options)
+    return SimpleUploadedFile(name, buffer.getvalue())
+
+
+class ImageTestCase(LibraryTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls._media_root = tempfile.mkdtemp()
+        cls._media = override_settings(MEDIA_ROOT=cls._media_root)
+        cls._media.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._media.disable()
+        shutil.rmtree(cls._media_root, ignore_errors=True)
+        super().tearDownClass()
+
+
+class ProfilePictureUploadTests(ImageTestCase):
+    def setUp(self):
+        super().setUp()
+        self.student = make_student(email='ada@example.com')
+        self.client.force_login(self.student)
+
+    def upload(self, picture):
+        return self.client.post('/profile/edit/', {
+            'full_name': 'Ada Lovelace', 'email': 'ada@example.com', 'profile_picture': picture,
+        })
+
+    def picture(self):
+        return UserProfile.objects.get(user=self.student).profile_picture
+
+    def test_upload_is_reencoded_upright_without_exif(self):
+        exif = Image.Exif()
+        exif[0x0112] = 6  # Orientation: rotate 90 degrees clockwise to display.
+        exif[0x010F] = 'Secret Camera Co.'
+        response = self.upload(image_upload(size=(120, 80), exif=exif.tobytes()))
+        self.assertRedirects(response, '/profile/', fetch_redirect_response=False)
+
+        picture = self.picture()
+        with picture.open('rb'), Image.open(picture) as saved:
+            self.assertEqual(saved.format, 'JPEG')
+            self.assertEqual(saved.size, (80, 120))
+            self.assertEqual(dict(saved.getexif()), {})
+            self.assertNotIn('exif', saved.info)
+        self.assertIsNotNone(images.get_manifest(picture.name, picture.storage))
+
+    def test_rejected_uploads_leave_the_profile_unchanged(self):
+        cases = [
+            ({'LIBRARY_UPLOAD_MAX_BYTES': 100}, image_upload(), 'smaller than'),
+            ({'LIBRARY_UPLOAD_MAX_DIMENSION': 100}, image_upload(size=(120, 80)), 'at most 100 pixels'),
+            ({}, image_upload('GIF', name='photo.gif'), 'JPEG, PNG or WebP'),
+            ({}, image_upload('BMP', name='photo.bmp'), 'JPEG, PNG or WebP'),
+        ]
+        for limits, picture, message in cases:
+            with self.subTest(name=picture.name, limits=limits), override_settings(**limits):
+                response = self.upload(picture)
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, message)
+                self.assertFalse(self.picture())
+
+    def test_png_keeps_its_format(self):
+        self.upload(image_upload('PNG', name='photo.png'))
+        picture = self.picture()
+        self.assertTrue(picture.name.endswith('.png'))
+        with picture.open('rb'), Image.open(picture) as saved:
+            self.assertEqual(saved.format, 'PNG')
+
+
+class DerivativeRegenerationTests(ImageTestCase):
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(images, 'generate_derivatives', wraps=images.generate_derivatives)
+        self.generate = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_only_new_files_are_processed(self):
+        book = make_books(1)[0]
+        book.cover_image = image_upload(name='cover.jpg')
+        book.save()
+        self.assertEqual(self.generate.call_count, 1)
+
+        book.title = 'Renamed'
+        book.save()
+        Book.objects.get(pk=book.pk).save()
+        self.assertEqual(self.generate.call_count, 1)
+
+        book.cover_image = image_upload(name='cover.jpg')
+        book.save()
+        self.assertEqual(self.generate.call_count, 2)
+
+    def test_profile_edit_without_a_new_picture_skips_the_derivatives(self):
+        student = make_student(email='ada@example.com')
+        self.client.force_login(student)
+        data = {'full_name': 'Ada Lovelace', 'email': 'ada@example.com'}
+        self.client.post('/profile/edit/', {**data, 'profile_picture': image_upload()})
+        self.assertEqual(self.generate.call_count, 1)
+        self.client.post('/profile/edit/', {**data, 'phone': '555-0100'})
+        self.assertEqual(self.generate.call_count, 1)
+        self.assertTrue(UserProfile.objects.get(user=student).profile_picture)
+
+
+class ResponsiveImageTests(ImageTestCase):
+    def setUp(self):
+        super().setUp()
+        self.profile = UserProfile.objects.get(user=make_student())
+        # Store a file without going through the post_save derivatives.
+        self.profile.profile_picture.save('legacy.jpg', image_upload(size=(700, 500)), save=False)
+        UserProfile.objects.filter(pk=self.profile.pk).update(profile_picture=self.profile.profile_picture.name)
+
+    def test_missing_derivatives_fall_back_without_reading_the_original(self):
+        with mock.patch.object(images, 'content_hash', side_effect=AssertionError('original was read')):
+            html = responsive_image(self.profile.profile_picture)
+        self.assertTrue(html.startswith('<img src="/media/profiles/legacy'))
+
+    def test_saved_derivatives_are_used(self):
+        # What generate_thumbnails does for files stored before derivatives existed.
+        images.generate_derivatives(self.profile.profile_picture.name)
+        with mock.patch.object(images, 'content_hash', side_effect=AssertionError('original was read')):
+            html = responsive_image(self.profile.profile_picture)
+        self.assertTrue(html.startswith('<picture>'))
+        self.assertIn('-640w.webp', html)
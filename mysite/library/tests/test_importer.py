@@ -0,0 +1,77 @@
+import json
+from io import BytesIO
+
+from library.importer import import_fileobj
+from library.models import Author, Book, Category
+
+from .utils import LibraryTestCase
+
+
+def jsonl(*records):
+    lines = [record if isinstance(record, str) else json.dumps(record) for record in records]
+    return BytesIO('\n'.join(lines).encode())
+
+
+def book(isbn, title='Dune', author='Frank Herbert', category='Fiction', **fields):
+    return {'isbn': isbn, 'title': title, 'author': author, 'category': category, **fields}
+
+
+class CatalogImportTests(LibraryTestCase):
+    def run_import(self, kind, *records, dry_run=False):
+        return import_fileobj(jsonl(*records), f'{kind}.jsonl', kind, dry_run=dry_run)
+
+    def test_bad_lines_are_reported_and_skipped(self):
+        report = self.run_import(
+            'books',
+            book('9780441013593'),
+            '{not json',
+            '["a list"]',
+            book('12345'),
+            book('9780441172719', title=''),
+            book('9780441172719', title='Children of Dune', pages='many'),
+            book('9780441172719', title='Children of Dune'),
+        )
+        self.assertEqual((report['rows'], report['valid'], report['written']), (7, 2, 2))
+        self.assertEqual([line for line, message in report['errors']], [2, 3, 4, 5, 6])
+        self.assertIn('invalid JSON', report['errors'][0][1])
+        self.assertEqual(report['errors'][2][1], "invalid isbn '12345'")
+        self.assertEqual(report['errors'][4][1], 'pages must be an integer')
+        self.assertEqual(Book.objects.count(), 2)
+
+    def test_reimport_updates_rows_in_place(self):
+        self.run_import('books', book('9780441013593', total_copies=3))
+        Book.objects.update(available_copies=1)
+        report = self.run_import('books', book('9780441013593', title='Dune (Revised)', total_copies=9))
+        self.assertEqual((report['created_authors'], report['created_categories']), (0, 0))
+        self.assertEqual(
+            list(Book.objects.values_list('title', 'total_copies', 'available_copies')), [('Dune (Revised)', 3, 1)],
+        )
+
+    def test_category_names_match_case_insensitively(self):
+        Category.objects.create(name='Fiction')
+        report = self.run_import('categories', {'name': 'fiction', 'icon': 'fas fa-dragon'}, {'name': 'Poetry'})
+        self.assertEqual(report['created_categories'], 1)
+        self.assertEqual(
+            list(Category.objects.order_by('name').values_list('name', 'icon')),
+            [('Fiction', 'fas fa-dragon'), ('Poetry', 'fas fa-book')],
+        )
+        self.run_import('books', book('9780441013593', category='FICTION'))
+        self.assertEqual(Category.objects.count(), 2)
+
+    def test_dry_run_counts_match_a_real_run(self):
+        Author.objects.create(name='Frank Herbert')
+        cases = [
+            ('categories', [{'name': 'Fiction'}, {'name': 'Poetry'}]),
+            ('authors', [{'name': 'frank herbert'}, {'name': 'Ursula K. Le Guin'}]),
+            ('books', [book('9780441013593'), book('9780441172719', author='N. K. Jemisin', category='Fantasy')]),
+        ]
+        for kind, records in cases:
+            with self.subTest(kind=kind):
+                dry = self.run_import(kind, *records, dry_run=True)
+                real = self.run_import(kind, *records)
+                counts = ('valid', 'written', 'created_authors', 'created_categories')
+                self.assertEqual({key: dry[key] for key in counts}, {key: real[key] for key in counts})
+        self.assertEqual(
+            list(Category.objects.order_by('name').values_list('name', flat=True)), ['Fantasy', 'Fiction', 'Poetry'],
+        )
+        self.assertEqual(Author.objects.count(), 3)
@@ -0,0 +1,38 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.utils import timezone
+
+from library import inventory, jobs
+from library.models import Borrowing, Notification, UserProfile
+
+from .utils import LibraryTestCase, make_books, make_student
+
+
+class MarkOverdueTests(LibraryTestCase):
+    def setUp(self):
+        super().setUp()
+        self.student = make_student()
+        self.borrowings = [inventory.borrow(self.student, book) for book in make_books(3)]
+        Borrowing.objects.update(due_date=timezone.now() - timedelta(days=1))
+
+    def test_flags_and_notifies_overdue_borrowings(self):
+        self.assertEqual(jobs.mark_overdue(), {'flagged': 3})
+        self.assertEqual(Notification.objects.filter(kind=Notification.OVERDUE).count(), 3)
+        self.assertEqual(UserProfile.objects.get(user=self.student).overdue_count, 3)
+        self.assertEqual(jobs.mark_overdue(), {'flagged': 0})
+
+    def test_copy_returned_after_the_batch_was_read_is_not_notified(self):
+        returned = self.borrowings[0]
+        flag_overdue = jobs._flag_overdue
+
+        def return_then_flag(borrowing_ids, now):
+            inventory.return_borrowing(returned)
+            return flag_overdue(borrowing_ids, now)
+
+        with mock.patch.object(jobs, '_flag_overdue', return_then_flag):
+            self.assertEqual(jobs.mark_overdue(), {'flagged': 2})
+        self.assertFalse(Notification.objects.filter(borrowing=returned).exists())
+        self.assertFalse(Borrowing.objects.get(pk=returned.pk).overdue)
+        profile = UserProfile.objects.get(user=self.student)
+        self.assertEqual((profile.active_borrow_count, profile.overdue_count), (2, 2))
@@ -0,0 +1,33 @@
+import ast
+from pathlib import Path
+from unittest import skipUnless
+
+from django.db import connection
+
+from library import search
+
+from .utils import LibraryTestCase, make_books
+
+MIGRATIONS = Path(__file__).resolve().parent.parent / 'migrations'
+
+
+class MigrationTests(LibraryTestCase):
+    def test_migrations_do_not_import_app_code(self):
+        for path in sorted(MIGRATIONS.glob('[0-9]*.py')):
+            for node in ast.walk(ast.parse(path.read_text())):
+                if isinstance(node, ast.ImportFrom):
+                    modules = [node.module or '']
+                elif isinstance(node, ast.Import):
+                    modules = [alias.name for alias in node.names]
+                else:
+                    continue
+                for module in modules:
+                    with self.subTest(migration=path.name, module=module):
+                        self.assertFalse(module == 'library' or module.startswith('library.'))
+
+    @skipUnless(connection.vendor == 'sqlite', 'The FTS5 table only exists on SQLite')
+    def test_search_table_is_created(self):
+        search._fts_state.clear()
+        self.assertTrue(search.fts_available())
+        book = make_books(1, description='A nebulous cartography of the stars.')[0]
+        self.assertEqual(search.search_book_ids('nebul'), [book.id])
@@ -0,0 +1,138 @@
+import base64
+import json
+
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import override_settings
+
+from library.models import Author, Book
+from library.pagination import KeysetPaginator, encode_cursor
+from library.views import AUTHORS_PER_PAGE, BOOK_SORT_KEYS
+
+from .utils import LibraryTestCase, make_books
+
+
+def raw_cursor(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+
+TAMPERED = [
+    raw_cursor(['next', 'abc', 1]),
+    raw_cursor(['next', None, None]),
+    raw_cursor(['prev', [1], 2]),
+    raw_cursor(['next', 1.5, 2 ** 70]),
+    raw_cursor(['sideways', 1, 2]),
+    'not-base64!',
+]
+
+
+@override_settings(LIBRARY_CATALOG_MAX_AGE=0)
+class TamperedCursorTests(LibraryTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.books = make_books(12)
+        cls.category = cls.books[0].category
+
+    def test_catalog_pages_fall_back_to_first_page(self):
+        paths = ['/books/', '/books/?sort=highest_rated', '/books/?sort=oldest', f'/category/{self.category.id}/']
+        for path in paths:
+            separator = '&' if '?' in path else '?'
+            first = self.client.get(path)
+            for cursor in TAMPERED:
+                with self.subTest(path=path, cursor=cursor):
+                    response = self.client.get(f'{path}{separator}cursor={cursor}')
+                    self.assertEqual(response.status_code, 200)
+                    self.assertEqual(
+                        [book.id for book in response.context['page_obj']],
+                        [book.id for book in first.context['page_obj']],
+                    )
+
+    def test_paginator_rejects_values_of_the_wrong_type(self):
+        paginator = KeysetPaginator(Book.objects.all(), ['-rating_avg', '-id'], 5)
+        first = [book.id for book in paginator.get_page()]
+        for cursor in TAMPERED:
+            with self.subTest(cursor=cursor):
+                page = paginator.get_page(cursor)
+                self.assertEqual([book.id for book in page], first)
+                self.assertFalse(page.has_previous())
+
+    async def test_async_paginator_rejects_tampered_cursors(self):
+        paginator = KeysetPaginator(Book.objects.all(), ['-created_at', '-id'], 5)
+        first = [book.id for book in await paginator.aget_page()]
+        for cursor in TAMPERED:
+            with self.subTest(cursor=cursor):
+                self.assertEqual([book.id for book in await paginator.aget_page(cursor)], first)
+
+    def test_valid_cursor_still_pages(self):
+        paginator = KeysetPaginator(Book.objects.all(), ['created_at', 'id'], 5)
+        first = paginator.get_page()
+        second = paginator.get_page(first.next_cursor)
+        self.assertEqual(len(second), 5)
+        self.assertTrue(second.has_previous())
+        self.assertNotIn(second.object_list[0], first.object_list)
+        back = paginator.get_page(encode_cursor(paginator._key(second.object_list[0]), 'prev'))
+        self.assertEqual(back.object_list, first.object_list)
+
+
+class EmptySearchTests(LibraryTestCase):
+    def test_sorted_search_without_hits_is_empty(self):
+        make_books(2)
+        for sort in ('newest', 'oldest', 'highest_rated'):
+            with self.subTest(sort=sort):
+                response = self.client.get(f'/books/?q=zzzzqx&sort={sort}')
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.context['total_count'], 0)
+                self.assertEqual(list(response.context['page_obj']), [])
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN output is SQLite specific')
+class KeysetIndexTests(LibraryTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = make_books(12)[0].category
+
+    def plan(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            return ' | '.join(row[-1] for row in cursor.fetchall())
+
+    def assertPagesUseIndex(self, paginator, index):
+        page = paginator.get_page()
+        cursors = [None, page.next_cursor, encode_cursor(paginator._key(page.object_list[-1]), 'prev')]
+        for cursor in cursors:
+            with self.subTest(ordering=paginator.ordering, cursor=cursor):
+                plan = self.plan(paginator._page_query(cursor)[0])
+                self.assertIn(f'library_book USING INDEX {index}', plan)
+                if cursor:
+                    # Later pages must seek into the index, not scan it from the start.
+                    self.assertIn(f'SEARCH library_book USING INDEX {index}', plan)
+                self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_catalog_sort_orders_are_served_by_an_index(self):
+        indexes = {'newest': 'book_created_idx', 'oldest': 'book_created_idx', 'highest_rated': 'book_rating_idx'}
+        for sort_by, ordering in BOOK_SORT_KEYS.items():
+            self.assertPagesUseIndex(KeysetPaginator(Book.objects.for_cards(), ordering, 5), indexes[sort_by])
+
+    def test_category_pages_are_served_by_an_index(self):
+        books = Book.objects.for_cards().filter(category=self.category)
+        self.assertPagesUseIndex(KeysetPaginator(books, BOOK_SORT_KEYS['newest'], 5), 'book_category_created_idx')
+
+
+class AuthorsPageTests(LibraryTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        make_books(3, author=Author.objects.create(name='Aaron'))
+        Author.objects.bulk_create(Author(name=f'Writer {index:02}') for index in range(AUTHORS_PER_PAGE + 2))
+
+    def test_pages_follow_the_name_order_with_book_counts(self):
+        first = self.client.get('/authors/')
+        authors = list(first.context['authors'])
+        self.assertEqual(len(authors), AUTHORS_PER_PAGE)
+        self.assertEqual((authors[0].name, authors[0].num_books), ('Aaron', 3))
+        self.assertEqual(authors[1].num_books, 0)
+
+        second = self.client.get(f"/authors/?{first.context['next_query']}")
+        self.assertEqual([author.name for author in second.context['authors']], ['Writer 23', 'Writer 24', 'Writer 25'])
+        self.assertFalse(second.context['page_obj'].has_next())
@@ -0,0 +1,117 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from library import inventory
+from library.admin import UserProfileAdmin
+from library.forms import ProfileEditForm
+from library.models import Borrowing, Review, UserProfile
+
+from .utils import LibraryTestCase, make_books, make_student
+
+
+class ProfileCounterTests(LibraryTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.books = make_books(7)
+
+    def setUp(self):
+        super().setUp()
+        self.student = make_student(first_name='Ada', email='ada@example.com')
+
+    def profile(self):
+        return UserProfile.objects.get(user=self.student)
+
+    def assertCounters(self, **expected):
+        profile = self.profile()
+        self.assertEqual({name: getattr(profile, name) for name in expected}, expected)
+        self.assertFalse(UserProfile.objects.filter(pk=profile.pk).drifted().exists())
+
+    def test_borrow_return_and_review_move_the_counters(self):
+        borrowing = inventory.borrow(self.student, self.books[0])
+        inventory.borrow(self.student, self.books[1])
+        self.assertCounters(active_borrow_count=2, total_borrow_count=2)
+        inventory.return_borrowing(borrowing)
+        Review.objects.create(user=self.student, book=self.books[0], rating=4)
+        self.assertCounters(active_borrow_count=1, total_borrow_count=2, review_count=1)
+
+    def test_limit_is_enforced_by_the_counter(self):
+        for book in self.books[:inventory.MAX_ACTIVE_BORROWINGS]:
+            inventory.borrow(self.student, book)
+        with self.assertRaises(inventory.BorrowLimitReached):
+            inventory.borrow(self.student, self.books[-1])
+        self.assertCounters(active_borrow_count=inventory.MAX_ACTIVE_BORROWINGS)
+
+    def test_missing_profile_is_created_with_reconciled_counters(self):
+        staff = User.objects.create_user(username='staff')
+        inventory.borrow(staff, self.books[0])
+        self.assertEqual(UserProfile.objects.get(user=staff).active_borrow_count, 1)
+
+    def test_deleting_borrowings_decrements_the_counters(self):
+        active = inventory.borrow(self.student, self.books[0])
+        returned = inventory.return_borrowing(inventory.borrow(self.student, self.books[1]))
+        overdue = inventory.borrow(self.student, self.books[2])
+        Borrowing.objects.filter(pk=overdue.pk).update(overdue=True)
+        UserProfile.objects.filter(user=self.student).adjust_counters(overdue_count=1)
+
+        Borrowing.objects.get(pk=active.pk).delete()
+        Borrowing.objects.filter(pk__in=[returned.pk, overdue.pk]).delete()
+        self.assertCounters(active_borrow_count=0, total_borrow_count=0, overdue_count=0)
+
+    def test_borrowings_created_outside_inventory_are_counted(self):
+        now = timezone.now()
+        Borrowing.objects.create(user=self.student, book=self.books[0], due_date=now)
+        Borrowing.objects.create(user=self.student, book=self.books[1], due_date=now, overdue=True)
+        Borrowing.objects.create(user=self.student, book=self.books[2], due_date=now, returned=True, return_date=now)
+        self.assertCounters(active_borrow_count=2, total_borrow_count=3, overdue_count=1)
+
+        inventory.borrow(self.student, self.books[3])
+        self.assertCounters(active_borrow_count=3, total_borrow_count=4, overdue_count=1)
+        Borrowing.objects.filter(user=self.student).delete()
+        self.assertCounters(active_borrow_count=0, total_borrow_count=0, overdue_count=0)
+
+    def test_admin_added_borrowing_is_counted(self):
+        admin_user = User.objects.create_superuser(username='admin', password='secret')
+        self.client.force_login(admin_user)
+        response = self.client.post('/admin/library/borrowing/add/', {
+            'user': self.student.pk, 'book': self.books[0].pk,
+            'due_date_0': '2030-01-01', 'due_date_1': '12:00:00',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertCounters(active_borrow_count=1, total_borrow_count=1)
+
+    def test_profile_edit_keeps_counters_updated_during_the_request(self):
+        self.client.force_login(self.student)
+        is_valid = ProfileEditForm.is_valid
+
+        def borrow_then_validate(form):
+            # A borrow landing between loading the profile and saving it.
+            inventory.borrow(self.student, self.books[0])
+            return is_valid(form)
+
+        with mock.patch.object(ProfileEditForm, 'is_valid', borrow_then_validate):
+            response = self.client.post('/profile/edit/', {
+                'full_name': 'Ada Lovelace', 'email': 'ada@example.com', 'phone': '555',
+            })
+        self.assertRedirects(response, '/profile/')
+        self.assertCounters(active_borrow_count=1, total_borrow_count=1)
+        self.assertEqual(self.profile().phone, '555')
+
+    def test_admin_change_keeps_counters_updated_during_the_request(self):
+        admin_user = User.objects.create_superuser(username='admin', password='secret')
+        self.client.force_login(admin_user)
+        profile = self.profile()
+        save_form = UserProfileAdmin.save_form
+
+        def borrow_then_save(admin, request, form, change):
+            inventory.borrow(self.student, self.books[0])
+            return save_form(admin, request, form, change)
+
+        with mock.patch.object(UserProfileAdmin, 'save_form', borrow_then_save):
+            response = self.client.post(f'/admin/library/userprofile/{profile.pk}/change/', {
+                'user': self.student.pk, 'phone': '777',
+            })
+        self.assertEqual(response.status_code, 302)
+        self.assertCounters(active_borrow_count=1, total_borrow_count=1)
+        self.assertEqual(self.profile().phone, '777')
@@ -0,0 +1,60 @@
+import threading
+
+from django.test import override_settings
+
+from library.middleware import QueryBudgetExceeded, reset_query_report
+from library.templatetags.library_filters import book_card, track_book_cards
+
+from .utils import LibraryTestCase, make_books
+
+INSTRUMENTED = {
+    'LIBRARY_QUERY_INSTRUMENTATION': True,
+    'LIBRARY_QUERY_BUDGET_STRICT': True,
+    'LIBRARY_CATALOG_MAX_AGE': 0,
+}
+
+
+class QueryBudgetTests(LibraryTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.books = make_books(3)
+
+    def setUp(self):
+        super().setUp()
+        reset_query_report()
+
+    @override_settings(LIBRARY_QUERY_BUDGETS={'all_books': 2}, **INSTRUMENTED)
+    def test_view_over_budget_fails_the_request(self):
+        with self.assertRaisesMessage(QueryBudgetExceeded, 'all_books ran'):
+            self.client.get('/books/')
+
+    @override_settings(LIBRARY_QUERY_BUDGETS={'all_books': 50}, **INSTRUMENTED)
+    def test_view_within_budget_reports_server_timing(self):
+        first = self.client.get('/books/')
+        self.assertIn('0 hits, 3 misses', first['Server-Timing'])
+        repeat = self.client.get('/books/')
+        self.assertIn('3 hits, 0 misses', repeat['Server-Timing'])
+
+    def test_card_counters_are_per_context(self):
+        book = self.books[0]
+        started = threading.Event()
+        finished = threading.Event()
+
+        def other_request():
+            with track_book_cards() as stats:
+                started.set()
+                for _ in range(5):
+                    book_card(book)
+                other.update(stats)
+            finished.set()
+
+        other = {}
+        with track_book_cards() as stats:
+            thread = threading.Thread(target=other_request)
+            thread.start()
+            started.wait(5)
+            finished.wait(5)
+            thread.join()
+            book_card(book)
+        self.assertEqual((other['hits'], other['misses']), (4, 1))
+        self.assertEqual((stats['hits'], stats['misses']), (1, 0))
@@ -0,0 +1,66 @@
+from django.core.cache import caches
+
+from library import inventory
+from library.models import Author, BookNeighbor, Category, Review
+
+from .utils import LibraryTestCase, make_books, make_student
+
+SIZES = (1, 9)
+
+
+class ConstantQueryCountTests(LibraryTestCase):
+    """The card and review querysets load their relations up front, so page size does not add queries."""
+
+    def scenario(self, size):
+        category = Category.objects.create(name=f'Size {size}')
+        books = make_books(size, category=category, author=Author.objects.create(name=f'Author {size}'))
+        subject = books[0]
+        readers = [make_student(f'reader-{size}-{index}') for index in range(size)]
+        for reader in readers:
+            Review.objects.create(user=reader, book=subject, rating=4, comment='Good')
+        for rank, neighbor in enumerate(books[1:], 1):
+            BookNeighbor.objects.create(
+                book=subject, neighbor=neighbor, rank=rank, score=1.0, co_occurrences=2, computed_at=subject.created_at,
+            )
+        student = make_student(f'student-{size}')
+        loans = [inventory.borrow(student, book) for book in books[:min(size, inventory.MAX_ACTIVE_BORROWINGS)]]
+        for loan in loans[3:]:
+            inventory.return_borrowing(loan)
+        for reader, book in zip(readers, make_books(min(size, 3), category=category, copies=1)):
+            inventory.borrow(reader, book)
+            inventory.place_hold(student, book)
+        return category, subject, student
+
+    def get(self, path, queries):
+        # Cold caches, so the cached counts and card fragments are part of the budget.
+        for cache in caches.all():
+            cache.clear()
+        with self.assertNumQueries(queries):
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_catalog_page(self):
+        for size in SIZES:
+            with self.subTest(size=size):
+                category, _, _ = self.scenario(size)
+                response = self.get(f'/books/?category={category.id}', 7)
+                self.assertEqual(len(response.context['page_obj']), min(size + min(size, 3), 9))
+
+    def test_book_detail(self):
+        for size in SIZES:
+            with self.subTest(size=size):
+                _, subject, student = self.scenario(size)
+                self.client.logout()
+                response = self.get(f'/book/{subject.id}/', 7)
+                self.assertEqual(len(response.context['reviews']), size)
+                self.client.force_login(student)
+                self.get(f'/book/{subject.id}/', 10)
+
+    def test_my_books(self):
+        for size in SIZES:
+            with self.subTest(size=size):
+                _, _, student = self.scenario(size)
+                self.client.force_login(student)
+                response = self.get('/my-books/', 7)
+                self.assertEqual(len(response.context['holds']), min(size, 3))
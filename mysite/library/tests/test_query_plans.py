@@ -0,0 +1,45 @@
+from unittest import skipUnless
+
+from django.db import connection
+
+from library import inventory
+from library.management.commands.explain_queries import DEFAULT_ALLOWED_SCANS, Command
+from library.models import Review
+
+from .utils import LibraryTestCase, make_books, make_student
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN output is SQLite specific')
+class QueryPlanTests(LibraryTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        books = make_books(12)
+        student = make_student()
+        inventory.borrow(student, books[0])
+        Review.objects.create(user=make_student('reader'), book=books[0], rating=4)
+
+    def test_pages_do_not_scan_library_tables(self):
+        command = Command()
+        for label, url, user in command.get_targets('student'):
+            with self.subTest(page=label):
+                status_code, plans, scans = command.check_page(self.client, url, user, set(DEFAULT_ALLOWED_SCANS))
+                self.assertEqual(status_code, 200)
+                self.assertTrue(plans)
+                self.assertEqual(scans, [])
+
+    def test_index_scans_count_unless_a_limit_stops_them(self):
+        command = Command()
+        limited = 'SELECT id FROM library_author ORDER BY name, id LIMIT 25'
+        self.assertEqual(command.full_scan_tables(limited, ['SCAN library_author USING INDEX author_name_idx']), [])
+        cases = [
+            ('SELECT COUNT(*) FROM library_author', ['SCAN library_author USING COVERING INDEX author_name_idx']),
+            ('SELECT id FROM library_author ORDER BY name', ['SCAN library_author USING INDEX author_name_idx']),
+            (
+                'SELECT id FROM library_author ORDER BY bio LIMIT 5',
+                ['SCAN library_author', 'USE TEMP B-TREE FOR ORDER BY'],
+            ),
+            ('SELECT id FROM library_author WHERE bio = %s LIMIT 1', ['SCAN library_author']),
+        ]
+        for sql, plan in cases:
+            with self.subTest(sql=sql):
+                self.assertEqual(command.full_scan_tables(sql, plan), ['library_author'])
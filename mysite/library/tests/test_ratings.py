@@ -0,0 +1,33 @@
+from library.models import Book, Review
+
+from .utils import LibraryTestCase, make_books, make_student
+
+
+class BookRatingTests(LibraryTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.books = make_books(2)
+
+    def ratings(self, book):
+        return Book.objects.values_list('rating_sum', 'rating_count', 'rating_avg').get(pk=book.pk)
+
+    def test_reviews_update_the_book_ratings(self):
+        first = Review.objects.create(user=make_student('ada'), book=self.books[0], rating=5)
+        Review.objects.create(user=make_student('alan'), book=self.books[0], rating=2)
+        self.assertEqual(self.ratings(self.books[0]), (7, 2, 3.5))
+        first.delete()
+        self.assertEqual(self.ratings(self.books[0]), (2, 1, 2.0))
+
+    def test_moving_a_review_refreshes_both_books(self):
+        Review.objects.create(user=make_student('ada'), book=self.books[0], rating=5)
+        review = Review.objects.create(user=make_student('alan'), book=self.books[0], rating=2)
+
+        review.book = self.books[1]
+        review.save()
+        self.assertEqual(self.ratings(self.books[0]), (5, 1, 5.0))
+        self.assertEqual(self.ratings(self.books[1]), (2, 1, 2.0))
+
+        review.book = self.books[0]
+        review.save(update_fields=['book'])
+        self.assertEqual(self.ratings(self.books[0]), (7, 2, 3.5))
+        self.assertEqual(self.ratings(self.books[1]), (0, 0, 0.0))
@@ -0,0 +1,71 @@
+from django.utils import timezone
+
+from library import recommendations
+from library.models import Book, BookNeighbor, Borrowing, Review, UserRecommendation
+
+from .utils import LibraryTestCase, make_books, make_student
+
+# Two groups of readers who share only book 5: (student, book) indexes.
+READING = {
+    'a': [(0, 0), (0, 1), (0, 2), (1, 0), (1, 1), (1, 3), (2, 1), (2, 2), (2, 3), (3, 0), (3, 2), (3, 4), (3, 5)],
+    'b': [(0, 5), (0, 6), (0, 7), (1, 6), (1, 7), (1, 8), (2, 7), (2, 8), (3, 6), (3, 8), (3, 9)],
+}
+
+
+class IncrementalBuildTests(LibraryTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.books = make_books(10)
+        cls.students = {
+            group: [make_student(f'{group}{index}') for index in range(4)] for group in READING
+        }
+        for group, pairs in READING.items():
+            for student, book in pairs:
+                cls.borrow(cls.students[group][student], cls.books[book])
+        # A well-rated review counts as reading the book, once per student.
+        Review.objects.create(user=cls.students['a'][2], book=cls.books[0], rating=5)
+        Review.objects.create(user=cls.students['a'][0], book=cls.books[1], rating=5)
+        Review.objects.create(user=cls.students['a'][3], book=cls.books[1], rating=1)
+
+    @staticmethod
+    def borrow(user, book):
+        now = timezone.now()
+        Borrowing.objects.create(user=user, book=book, due_date=now, return_date=now, returned=True)
+
+    def stored(self, books, users):
+        neighbors = BookNeighbor.objects.filter(book__in=books).order_by('book_id', 'rank')
+        picks = UserRecommendation.objects.filter(user__in=users).order_by('user_id', 'rank')
+        return (
+            [(row.book_id, row.neighbor_id, round(row.score, 9), row.co_occurrences) for row in neighbors],
+            [(row.user_id, row.book_id, round(row.score, 9)) for row in picks],
+        )
+
+    def test_incremental_run_loads_only_the_affected_readers(self):
+        recommendations.build(engine='python', min_support=1)
+        reader = self.students['a'][0]
+        self.borrow(reader, self.books[4])
+        Review.objects.create(user=self.students['a'][1], book=self.books[4], rating=4)
+
+        report = recommendations.build(engine='python', min_support=1)
+        self.assertEqual(report['mode'], 'incremental')
+        self.assertEqual(report['baskets_loaded'], len(self.students['a']))
+
+        changed = [self.students['a'][0], self.students['a'][1]]
+        books = Book.objects.filter(borrowings__user__in=changed).distinct()
+        incremental = self.stored(books, changed)
+        recommendations.build(full=True, engine='python', min_support=1)
+        self.assertEqual(incremental, self.stored(books, changed))
+
+    def test_count_readers_matches_the_baskets(self):
+        baskets = recommendations.load_baskets(3)
+        expected = {}
+        for basket in baskets.values():
+            for book_id in basket:
+                expected[book_id] = expected.get(book_id, 0) + 1
+        self.assertEqual(dict(recommendations.count_readers(3, [book.id for book in self.books])), expected)
+
+    def test_load_baskets_for_some_users(self):
+        students = self.students['b'][:2]
+        baskets = recommendations.load_baskets(3, [student.id for student in students])
+        everyone = recommendations.load_baskets(3)
+        self.assertEqual(dict(baskets), {student.id: everyone[student.id] for student in students})
@@ -0,0 +1,55 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db.models import Count, F
+from django.utils import timezone
+
+from library.management.commands.seed_data import Command
+from library.models import Book, Borrowing, Review
+
+from .utils import LibraryTestCase, make_books, make_student
+
+
+class ScaleSeedTests(LibraryTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # Few students and many loans, so the generator keeps drawing the same pairs.
+        call_command(
+            'seed_data', scale=60, users=8, borrowings=3000, visits=0, chunk_size=500, stdout=StringIO(),
+        )
+
+    def test_no_dates_in_the_future(self):
+        now = timezone.now()
+        self.assertGreater(Borrowing.objects.filter(returned=True).count(), 0)
+        self.assertFalse(Borrowing.objects.filter(return_date__gt=now).exists())
+        self.assertFalse(Borrowing.objects.filter(borrow_date__gt=now).exists())
+        self.assertFalse(Review.objects.filter(created_at__gt=now).exists())
+
+    def test_no_duplicate_active_borrowings(self):
+        self.assertGreater(Borrowing.objects.filter(returned=False).count(), 0)
+        duplicates = (
+            Borrowing.objects.filter(returned=False).values('user_id', 'book_id')
+            .annotate(n=Count('id')).filter(n__gt=1)
+        )
+        self.assertFalse(duplicates.exists())
+
+
+class ReconcileInventoryTests(LibraryTestCase):
+    def test_reconcile_binds_few_parameters_for_many_books(self):
+        books = make_books(1, copies=1)
+        author, category = books[0].author, books[0].category
+        books += Book.objects.bulk_create(
+            Book(title=f'Bulk {index}', author=author, category=category, total_copies=1, available_copies=1)
+            for index in range(1200)
+        )
+        student = make_student()
+        now = timezone.now()
+        Borrowing.objects.bulk_create(Borrowing(user=student, book=book, due_date=now) for book in books)
+
+        command = Command()
+        command.chunk_size = 5000
+        # More ids than any SQLite build accepts as bound parameters.
+        command.book_ids = list(range(1, books[-1].pk + 300000))
+        command.reconcile_inventory()
+
+        self.assertEqual(Book.objects.filter(available_copies=F('total_copies') - 1).count(), len(books))
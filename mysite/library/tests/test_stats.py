@@ -0,0 +1,79 @@
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+
+from library import stats
+
+from .utils import LibraryTestCase, make_student
+
+
+class HomeStatsInvalidationTests(LibraryTestCase):
+    def setUp(self):
+        super().setUp()
+        self.student = make_student()
+        patcher = mock.patch.object(stats, 'invalidate')
+        self.invalidate = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_login_keeps_the_home_stats(self):
+        self.client.force_login(self.student)
+        self.student.refresh_from_db()
+        self.assertIsNotNone(self.student.last_login)
+        self.invalidate.assert_not_called()
+
+    def test_profile_edits_keep_the_home_stats(self):
+        self.student.first_name = 'Ada'
+        self.student.save()
+        self.invalidate.assert_not_called()
+
+    def test_new_users_and_staff_changes_refresh_the_home_stats(self):
+        make_student('newcomer')
+        self.assertEqual(self.invalidate.call_count, 1)
+
+        self.student.is_staff = True
+        self.student.save(update_fields=['is_staff'])
+        self.assertEqual(self.invalidate.call_count, 2)
+
+        User.objects.get(pk=self.student.pk).delete()
+        self.assertEqual(self.invalidate.call_count, 3)
+
+
+class CachedValueTests(LibraryTestCase):
+    key = 'library:test-value'
+
+    def test_invalidation_during_a_recompute_is_not_lost(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            if len(calls) == 1:
+                # A write lands while the first recompute is still running.
+                stats.invalidate(self.key)
+            return len(calls)
+
+        self.assertEqual(stats.cached_value(self.key, compute, ttl=60), 1)
+        self.assertEqual(stats.cached_value(self.key, compute, ttl=60), 2)
+        self.assertEqual(stats.cached_value(self.key, compute, ttl=60), 2)
+        self.assertEqual(len(calls), 2)
+
+    def test_stale_value_is_served_while_another_request_recomputes(self):
+        self.assertEqual(stats.cached_value(self.key, lambda: 'old', ttl=60), 'old')
+        stats.invalidate(self.key)
+        stats.get_cache().add(f'{self.key}:lock', 1)
+        self.assertEqual(stats.cached_value(self.key, lambda: 'new', ttl=60), 'old')
+        stats.get_cache().delete(f'{self.key}:lock')
+        self.assertEqual(stats.cached_value(self.key, lambda: 'new', ttl=60), 'new')
+
+    async def test_async_invalidation_during_a_recompute_is_not_lost(self):
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            if len(calls) == 1:
+                await sync_to_async(stats.invalidate)(self.key)
+            return len(calls)
+
+        self.assertEqual(await stats.acached_value(self.key, compute, ttl=60), 1)
+        self.assertEqual(await stats.acached_value(self.key, compute, ttl=60), 2)
+        self.assertEqual(await stats.acached_value(self.key, compute, ttl=60), 2)
@@ -0,0 +1,39 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TransactionTestCase
+from django.utils import timezone
+
+from library import visit_log
+from library.models import VisitLog
+
+
+def record(user_id=None):
+    return {'path': '/', 'method': 'GET', 'ip_address': '127.0.0.1', 'user_id': user_id, 'timestamp': timezone.now()}
+
+
+class VisitLogWriterTests(TransactionTestCase):
+    def test_synchronous_writes_leave_the_request_connection_open(self):
+        writer = visit_log.VisitLogWriter(background=False)
+        with mock.patch.object(visit_log, 'close_old_connections') as close_old_connections:
+            writer.enqueue(record())
+        close_old_connections.assert_not_called()
+        self.assertEqual(VisitLog.objects.count(), 1)
+
+    def test_deleted_user_does_not_drop_the_batch(self):
+        kept = User.objects.create(username='kept')
+        deleted = User.objects.create(username='deleted')
+        deleted_id = deleted.pk
+        deleted.delete()
+
+        writer = visit_log.VisitLogWriter(background=False)
+        writer.flush()
+        for user_id in (kept.pk, deleted_id, None):
+            writer.queue.put(record(user_id))
+        writer.flush()
+
+        self.assertEqual(writer.get_stats()['failed'], 0)
+        self.assertEqual(
+            sorted(VisitLog.objects.values_list('user_id', flat=True), key=str),
+            sorted([kept.pk, None, None], key=str),
+        )
@@ -0,0 +1,48 @@
+"""Shared fixtures for the library tests."""
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import TestCase
+
+from library import visit_log
+from library.models import Author, Book, Category, UserProfile
+
+
+class LibraryTestCase(TestCase):
+    """TestCase with empty caches and visit logs written in the request thread."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # The default writer flushes from a background thread, which would
+        # outlive the test transaction.
+        cls._visit_log_writer = visit_log._writer
+        visit_log._writer = visit_log.VisitLogWriter(background=False)
+
+    @classmethod
+    def tearDownClass(cls):
+        visit_log._writer = cls._visit_log_writer
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        for cache in caches.all():
+            cache.clear()
+
+
+def make_books(count, category=None, author=None, copies=2, **fields):
+    author = author or Author.objects.create(name='Test Author')
+    category = category or Category.objects.create(name=f'Category {Category.objects.count()}')
+    return [
+        Book.objects.create(
+            title=f'Book {index}', author=author, category=category,
+            total_copies=copies, available_copies=copies, **fields,
+        )
+        for index in range(count)
+    ]
+
+
+def make_student(username='student', **fields):
+    user = User.objects.create_user(username=username, **fields)
+    UserProfile.objects.create(user=user)
+    return user
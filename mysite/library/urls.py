@@ -1,13 +1,18 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
+
+# Under ASGI the read-only catalog pages use the async ORM.
+catalog = async_views if settings.LIBRARY_ASYNC_VIEWS else views
 
 urlpatterns = [
-    path('', views.home, name='home'),
-    path('books/', views.all_books, name='all_books'),
-    path('book/<int:id>/', views.book_detail, name='book_detail'),
-    path('categories/', views.categories_page, name='categories'),
+    path('', catalog.home, name='home'),
+    path('books/', catalog.all_books, name='all_books'),
+    path('books/autocomplete/', views.autocomplete, name='autocomplete'),
+    path('book/<int:id>/', catalog.book_detail, name='book_detail'),
+    path('categories/', catalog.categories_page, name='categories'),
     path('category/<int:id>/', views.category_books, name='category_books'),
-    path('authors/', views.authors_page, name='authors'),
+    path('authors/', catalog.authors_page, name='authors'),
     path('author/<int:id>/', views.author_detail, name='author_detail'),
     path('contact/', views.contact_page, name='contact'),
     path('login/', views.login_view, name='login'),
@@ -18,5 +23,8 @@ urlpatterns = [
     path('borrow/<int:book_id>/', views.borrow_book, name='borrow_book'),
     path('my-books/', views.my_books, name='my_books'),
     path('return/<int:borrowing_id>/', views.return_book, name='return_book'),
+    path('hold/<int:book_id>/', views.place_hold, name='place_hold'),
+    path('hold/<int:hold_id>/cancel/', views.cancel_hold, name='cancel_hold'),
     path('book/<int:id>/review/', views.add_review, name='add_review'),
+    path('export/<str:dataset>/', views.export_data, name='export_data'),
 ]
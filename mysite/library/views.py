@@ -1,84 +1,168 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.http import Http404, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
 from django.contrib.auth import login, logout, authenticate
 from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.models import User
 from django.contrib import messages
-from django.db.models import Q, Avg, Count
-from django.utils import timezone
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.core.paginator import Paginator
-from datetime import timedelta
+from django.utils import timezone
+from datetime import date
 
-from .models import Book, Author, Category, Borrowing, Review, UserProfile, Contact
+from . import exports, inventory
+from .models import Book, Author, Category, Borrowing, Review, UserProfile, Contact, Notification, Hold
 from .forms import RegistrationForm, LoginForm, ContactForm, ReviewForm, ProfileEditForm
-
+from .recommendations import recommended_for, similar_books
+from .search import search_book_ids
+from .autocomplete import BOOK, suggestion_index
+from .stats import get_home_stats
+from .pagination import KeysetPage, KeysetPaginator, acached_count, cached_count
+from .conditional import (
+    conditional_for_anonymous, catalog_validators, book_validators,
+    categories_validators, authors_validators,
+)
+
+
+BOOK_SORT_KEYS = {
+    'newest': ['-created_at', '-id'],
+    'oldest': ['created_at', 'id'],
+    'highest_rated': ['-rating_avg', '-id'],
+}
+
+AUTHOR_SORT_KEY = ['name', 'id']
+AUTHORS_PER_PAGE = 24
+
+
+def pagination_queries(request, page_obj):
+    """Query strings for the previous/next page links, keeping the other GET parameters."""
+    queries = []
+    for has_page, cursor, number in (
+        (page_obj.has_previous(), getattr(page_obj, 'previous_cursor', None), 'previous_page_number'),
+        (page_obj.has_next(), getattr(page_obj, 'next_cursor', None), 'next_page_number'),
+    ):
+        if not has_page:
+            queries.append('')
+            continue
+        params = request.GET.copy()
+        params.pop('cursor', None)
+        params.pop('page', None)
+        if isinstance(page_obj, KeysetPage):
+            params['cursor'] = cursor
+        else:
+            params['page'] = getattr(page_obj, number)()
+        queries.append(params.urlencode())
+    return queries
 
 
 def home(request):
-    latest_books = Book.objects.all()[:6]
-    top_rated_books = Book.objects.annotate(
-        avg_rating=Avg('reviews__rating')
-    ).filter(avg_rating__isnull=False).order_by('-avg_rating')[:3]
-    total_books = Book.objects.count()
-    total_authors = Author.objects.count()
-    total_students = User.objects.filter(is_staff=False).count()
-
-    context = {
-        'latest_books': latest_books,
-        'top_rated_books': top_rated_books,
-        'total_books': total_books,
-        'total_authors': total_authors,
-        'total_students': total_students,
-    }
+    context = get_home_stats()
     return render(request, 'library/home.html', context)
 
 
+class CatalogListing:
+    """
+    The book list for one request: its GET parameters, the search, the
+    filtered queryset and the paginator. Shared by ``all_books`` here and in
+    ``library.async_views``; construction runs the search, so async callers
+    build it in a thread.
+    """
+
+    per_page = 9
+
+    def __init__(self, request):
+        self.request = request
+        self.search_query = request.GET.get('q', '').strip()
+        self.category_id = request.GET.get('category', '')
+        self.sort_by = request.GET.get('sort', 'relevance' if self.search_query else 'newest')
+
+        self.books = Book.objects.for_cards()
+        self.ranked_ids = None
+        if self.search_query:
+            self.ranked_ids = search_book_ids(self.search_query, category_id=self.category_id or None)
+            self.books = self.books.filter(id__in=self.ranked_ids)
+        elif self.sort_by == 'relevance':
+            self.sort_by = 'newest'
+        if self.category_id:
+            self.books = self.books.filter(category_id=self.category_id)
+
+        if self.sort_by == 'relevance':
+            self.paginator = Paginator(self.ranked_ids, self.per_page)
+        else:
+            ordering = BOOK_SORT_KEYS.get(self.sort_by, BOOK_SORT_KEYS['newest'])
+            self.paginator = KeysetPaginator(self.books, ordering, self.per_page)
+
+    def _ranked_page(self, page_obj, page_books):
+        page_obj.object_list = [page_books[book_id] for book_id in page_obj.object_list if book_id in page_books]
+        return page_obj
+
+    def page(self):
+        """The requested page and the total number of matching books."""
+        if self.sort_by == 'relevance':
+            page_obj = self.paginator.get_page(self.request.GET.get('page'))
+            page_obj = self._ranked_page(page_obj, self.books.in_bulk(page_obj.object_list))
+            return page_obj, self.paginator.count
+        return self.paginator.get_page(self.request.GET.get('cursor')), cached_count(self.books)
+
+    async def apage(self):
+        if self.sort_by == 'relevance':
+            page_obj = self.paginator.get_page(self.request.GET.get('page'))
+            page_obj = self._ranked_page(page_obj, await self.books.ain_bulk(page_obj.object_list))
+            return page_obj, self.paginator.count
+        return await self.paginator.aget_page(self.request.GET.get('cursor')), await acached_count(self.books)
+
+    def context(self, page_obj, total_count, categories):
+        previous_query, next_query = pagination_queries(self.request, page_obj)
+        for cat in categories:
+            cat.is_selected = (str(cat.id) == self.category_id)
+        return {
+            'page_obj': page_obj,
+            'previous_query': previous_query,
+            'next_query': next_query,
+            'total_count': total_count,
+            'categories': categories,
+            'search_query': self.search_query,
+            'selected_category': self.category_id,
+            'sort_by': self.sort_by,
+            'sort_relevance': self.sort_by == 'relevance',
+            'sort_newest': self.sort_by == 'newest',
+            'sort_oldest': self.sort_by == 'oldest',
+            'sort_highest_rated': self.sort_by == 'highest_rated',
+        }
+
+
+@conditional_for_anonymous(catalog_validators)
 def all_books(request):
-    books = Book.objects.all()
-    search_query = request.GET.get('q', '')
-    if search_query:
-        books = books.filter(
-            Q(title__icontains=search_query) | Q(author__name__icontains=search_query)
-        )
-
-    category_id = request.GET.get('category', '')
-    if category_id:
-        books = books.filter(category_id=category_id)
-
-    sort_by = request.GET.get('sort', 'newest')
-    if sort_by == 'oldest':
-        books = books.order_by('created_at')
-    elif sort_by == 'highest_rated':
-        books = books.annotate(avg_rating=Avg('reviews__rating')).order_by('-avg_rating')
-    else:
-        books = books.order_by('-created_at')
+    listing = CatalogListing(request)
+    page_obj, total_count = listing.page()
+    context = listing.context(page_obj, total_count, Category.objects.all())
+    return render(request, 'library/books.html', context)
 
-    paginator = Paginator(books, 9)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
 
-    categories = Category.objects.all()
-    for cat in categories:
-        cat.is_selected = (str(cat.id) == category_id)
+def autocomplete(request):
+    query = request.GET.get('q', '')
+    try:
+        limit = min(max(int(request.GET.get('limit', 8)), 1), 20)
+    except ValueError:
+        limit = 8
 
-    context = {
-        'page_obj': page_obj,
-        'categories': categories,
-        'search_query': search_query,
-        'selected_category': category_id,
-        'sort_by': sort_by,
-        'sort_newest': sort_by == 'newest',
-        'sort_oldest': sort_by == 'oldest',
-        'sort_highest_rated': sort_by == 'highest_rated',
-    }
-    return render(request, 'library/books.html', context)
+    suggestions = suggestion_index.suggest(query, limit=limit)
+    for suggestion in suggestions:
+        view_name = 'book_detail' if suggestion['type'] == BOOK else 'author_detail'
+        suggestion['url'] = reverse(view_name, kwargs={'id': suggestion['id']})
+    return JsonResponse({'query': query, 'suggestions': suggestions})
 
 
+@conditional_for_anonymous(book_validators)
 def book_detail(request, id):
-    book = get_object_or_404(Book, id=id)
-    reviews = book.reviews.all()
+    book = get_object_or_404(Book.objects.select_related('author', 'category'), id=id)
+    reviews = Review.objects.for_display().filter(book=book)
     user_has_borrowed = False
     user_currently_borrowed = False
     user_has_reviewed = False
+    user_hold = None
 
     if request.user.is_authenticated:
         user_has_borrowed = Borrowing.objects.filter(user=request.user, book=book).exists()
@@ -86,17 +170,21 @@ def book_detail(request, id):
             user=request.user, book=book, returned=False
         ).exists()
         user_has_reviewed = Review.objects.filter(user=request.user, book=book).exists()
+        user_hold = Hold.objects.active().with_position().filter(user=request.user, book=book).first()
 
     context = {
         'book': book,
         'reviews': reviews,
+        'similar_books': similar_books(book.id),
         'user_has_borrowed': user_has_borrowed,
         'user_currently_borrowed': user_currently_borrowed,
         'user_has_reviewed': user_has_reviewed,
+        'user_hold': user_hold,
     }
     return render(request, 'library/book_detail.html', context)
 
 
+@conditional_for_anonymous(categories_validators)
 def categories_page(request):
     categories = Category.objects.annotate(num_books=Count('books'))
     context = {'categories': categories}
@@ -105,28 +193,49 @@ def categories_page(request):
 
 def category_books(request, id):
     category = get_object_or_404(Category, id=id)
-    books = Book.objects.filter(category=category)
+    books = Book.objects.for_cards().filter(category=category)
 
-    paginator = Paginator(books, 9)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    paginator = KeysetPaginator(books, BOOK_SORT_KEYS['newest'], 9)
+    page_obj = paginator.get_page(request.GET.get('cursor'))
+    previous_query, next_query = pagination_queries(request, page_obj)
 
     context = {
         'category': category,
         'page_obj': page_obj,
+        'previous_query': previous_query,
+        'next_query': next_query,
+        'total_count': cached_count(books),
     }
     return render(request, 'library/category_books.html', context)
 
 
+def authors_with_book_counts():
+    """Authors annotated with ``num_books``, counted per row rather than with a GROUP BY."""
+    # A GROUP BY over the join reads every author before the page is cut;
+    # the per-row count lets the (name, id) index serve the page directly.
+    books = Book.objects.filter(author=OuterRef('pk')).order_by().values('author')
+    return Author.objects.annotate(
+        num_books=Coalesce(Subquery(books.annotate(total=Count('id')).values('total')), 0),
+    )
+
+
+@conditional_for_anonymous(authors_validators)
 def authors_page(request):
-    authors = Author.objects.annotate(num_books=Count('books'))
-    context = {'authors': authors}
+    paginator = KeysetPaginator(authors_with_book_counts(), AUTHOR_SORT_KEY, AUTHORS_PER_PAGE)
+    page_obj = paginator.get_page(request.GET.get('cursor'))
+    previous_query, next_query = pagination_queries(request, page_obj)
+    context = {
+        'authors': page_obj,
+        'page_obj': page_obj,
+        'previous_query': previous_query,
+        'next_query': next_query,
+    }
     return render(request, 'library/authors.html', context)
 
 
 def author_detail(request, id):
     author = get_object_or_404(Author, id=id)
-    books = Book.objects.filter(author=author)
+    books = Book.objects.for_cards().filter(author=author)
     context = {
         'author': author,
         'books': books,
@@ -212,14 +321,14 @@ def logout_view(request):
 
 @login_required
 def profile_view(request):
-    profile, created = UserProfile.objects.get_or_create(user=request.user)
-    context = {'profile': profile}
+    profile = UserProfile.objects.get_for_user(request.user)
+    context = {'profile': profile, 'recommended_books': recommended_for(request.user)}
     return render(request, 'library/profile.html', context)
 
 
 @login_required
 def profile_edit(request):
-    profile, created = UserProfile.objects.get_or_create(user=request.user)
+    profile = UserProfile.objects.get_for_user(request.user)
 
     if request.method == 'POST':
         form = ProfileEditForm(request.POST, request.FILES)
@@ -239,7 +348,9 @@ def profile_edit(request):
             profile.phone = form.cleaned_data.get('phone', '')
             if form.cleaned_data.get('profile_picture'):
                 profile.profile_picture = form.cleaned_data['profile_picture']
-            profile.save()
+            # Only the edited columns: the counters move with F() updates
+            # and the values loaded above may already be stale.
+            profile.save(update_fields=['phone', 'profile_picture'])
 
             if new_password:
                 login(request, user)
@@ -262,62 +373,87 @@ def profile_edit(request):
 def borrow_book(request, book_id):
     book = get_object_or_404(Book, id=book_id)
 
-    if not book.is_available:
-        messages.error(request, 'Sorry, this book is not available for borrowing.')
+    try:
+        borrowing = inventory.borrow(request.user, book)
+    except inventory.BookUnavailable:
+        messages.error(request, 'Sorry, this book is not available for borrowing. You can place a hold to join the waiting list.')
         return redirect('book_detail', id=book.id)
-
-    if Borrowing.objects.filter(user=request.user, book=book, returned=False).exists():
+    except inventory.AlreadyBorrowed:
         messages.warning(request, 'You have already borrowed this book.')
         return redirect('book_detail', id=book.id)
-
-    current_borrowings = Borrowing.objects.filter(user=request.user, returned=False).count()
-    if current_borrowings >= 5:
-        messages.error(request, 'You have reached the maximum borrowing limit (5 books).')
+    except inventory.BorrowLimitReached:
+        messages.error(request, f'You have reached the maximum borrowing limit ({inventory.MAX_ACTIVE_BORROWINGS} books).')
         return redirect('book_detail', id=book.id)
 
-    due_date = timezone.now() + timedelta(days=14)
-    Borrowing.objects.create(
-        user=request.user,
-        book=book,
-        due_date=due_date,
-    )
-
-    book.available_copies -= 1
-    book.save()
-
-    messages.success(request, f'You have successfully borrowed "{book.title}". Please return it by {due_date.strftime("%B %d, %Y")}.')
+    messages.success(request, f'You have successfully borrowed "{book.title}". Please return it by {borrowing.due_date.strftime("%B %d, %Y")}.')
     return redirect('my_books')
 
 
 @login_required
 def my_books(request):
-    borrowings = Borrowing.objects.filter(user=request.user, returned=False)
-    past_borrowings = Borrowing.objects.filter(user=request.user, returned=True)
+    borrowings = Borrowing.objects.filter(user=request.user, returned=False).select_related('book')
+    past_borrowings = Borrowing.objects.filter(user=request.user, returned=True).select_related('book')
+    notifications = Notification.objects.filter(user=request.user, read_at__isnull=True)[:5]
+    holds = Hold.objects.active().with_position().filter(user=request.user).select_related('book')
 
     context = {
         'borrowings': borrowings,
         'past_borrowings': past_borrowings,
+        'notifications': notifications,
+        'holds': holds,
     }
     return render(request, 'library/my_books.html', context)
 
 
+@login_required
+def place_hold(request, book_id):
+    book = get_object_or_404(Book, id=book_id)
+
+    try:
+        inventory.place_hold(request.user, book)
+    except inventory.BookAvailable:
+        messages.info(request, 'A copy of this book is available, so you can borrow it right away.')
+        return redirect('book_detail', id=book.id)
+    except inventory.AlreadyOnHold:
+        messages.warning(request, 'You are already on the waiting list for this book.')
+        return redirect('book_detail', id=book.id)
+    except inventory.AlreadyBorrowed:
+        messages.warning(request, 'You have already borrowed this book.')
+        return redirect('book_detail', id=book.id)
+    except inventory.HoldLimitReached:
+        messages.error(request, f'You have reached the maximum number of holds ({inventory.MAX_ACTIVE_HOLDS} books).')
+        return redirect('book_detail', id=book.id)
+
+    messages.success(request, f'You have joined the waiting list for "{book.title}". We will notify you when a copy is ready.')
+    return redirect('my_books')
+
+
+@login_required
+def cancel_hold(request, hold_id):
+    hold = get_object_or_404(Hold.objects.select_related('book'), id=hold_id, user=request.user)
+
+    try:
+        inventory.cancel_hold(hold)
+    except inventory.HoldNotActive:
+        messages.warning(request, 'This hold is no longer active.')
+        return redirect('my_books')
+
+    messages.success(request, f'Your hold on "{hold.book.title}" has been cancelled.')
+    return redirect('my_books')
+
+
 @login_required
 def return_book(request, borrowing_id):
     """Return a borrowed book."""
     borrowing = get_object_or_404(Borrowing, id=borrowing_id, user=request.user)
 
-    if borrowing.returned:
+    try:
+        inventory.return_borrowing(borrowing)
+    except inventory.AlreadyReturned:
         messages.warning(request, 'This book has already been returned.')
         return redirect('my_books')
 
-    borrowing.returned = True
-    borrowing.return_date = timezone.now()
-    borrowing.save()
-
     book = borrowing.book
-    book.available_copies += 1
-    book.save()
-
     messages.success(request, f'You have successfully returned "{book.title}".')
     return redirect('my_books')
 
@@ -325,7 +461,7 @@ def return_book(request, borrowing_id):
 
 @login_required
 def add_review(request, id):
-    book = get_object_or_404(Book, id=id)
+    book = get_object_or_404(Book.objects.select_related('author'), id=id)
 
     if not Borrowing.objects.filter(user=request.user, book=book).exists():
         messages.error(request, 'You can only review books you have borrowed.')
@@ -349,3 +485,26 @@ def add_review(request, id):
 
     context = {'form': form, 'book': book}
     return render(request, 'library/add_review.html', context)
+
+
+@staff_member_required
+def export_data(request, dataset):
+    """Stream a table as CSV or JSON Lines, optionally gzipped."""
+    if dataset not in exports.DATASETS:
+        raise Http404('Unknown export.')
+    fmt = request.GET.get('format', 'csv')
+    compress = request.GET.get('gzip') == '1'
+    try:
+        start = date.fromisoformat(request.GET['from']) if request.GET.get('from') else None
+        end = date.fromisoformat(request.GET['to']) if request.GET.get('to') else None
+        category = int(request.GET['category']) if request.GET.get('category') else None
+        chunks = exports.stream_export(dataset, fmt, start, end, category, compress)
+    except ValueError as exc:
+        return HttpResponseBadRequest(str(exc))
+
+    filename = f'{dataset}-{timezone.now():%Y%m%d}.{fmt}' + ('.gz' if compress else '')
+    response = StreamingHttpResponse(
+        chunks, content_type='application/gzip' if compress else exports.FORMATS[fmt],
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,174 @@
+"""
+Buffered VisitLog writer.
+
+Requests enqueue a compact record into a bounded in-memory queue and a
+background thread bulk-inserts them in batches, so page views never wait on
+the SQLite write lock. Visits by users deleted before their batch is written
+are kept as anonymous visits.
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import IntegrityError, close_old_connections, connection
+
+from .db import retry_on_locked
+from .models import VisitLog
+
+logger = logging.getLogger(__name__)
+
+
+class VisitLogWriter:
+    def __init__(self, batch_size=200, flush_interval=2.0, max_queue=10000, background=True):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.background = background
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.stats = {
+            'enqueued': 0,
+            'written': 0,
+            'dropped': 0,
+            'failed': 0,
+            'batches': 0,
+            'high_water': 0,
+        }
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def enqueue(self, record):
+        """Queue a record without blocking; returns False when it was dropped."""
+        if not self.background:
+            self._write([record])
+            return True
+        self._ensure_started()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self._bump('dropped')
+            return False
+        with self._lock:
+            self.stats['enqueued'] += 1
+            self.stats['high_water'] = max(self.stats['high_water'], self.queue.qsize())
+        return True
+
+    def flush(self):
+        """Drain the queue in the calling thread and write everything still buffered."""
+        batch = []
+        while True:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+            if len(batch) >= self.batch_size:
+                self._write(batch)
+                batch = []
+        if batch:
+            self._write(batch)
+
+    def shutdown(self, timeout=5.0):
+        self._stop.set()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout)
+        self.flush()
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self.stats, queued=self.queue.qsize())
+
+    def _ensure_started(self):
+        # Restart the flusher after a fork (e.g. preloaded gunicorn workers).
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._stop.clear()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='visit-log-writer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        batch = []
+        deadline = None
+        while True:
+            if self._stop.is_set() and self.queue.empty():
+                break
+            timeout = self.flush_interval if deadline is None else max(deadline - time.monotonic(), 0)
+            try:
+                batch.append(self.queue.get(timeout=min(timeout, 0.5)))
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+                while len(batch) < self.batch_size:
+                    batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                pass
+            if batch and (len(batch) >= self.batch_size or time.monotonic() >= deadline or self._stop.is_set()):
+                # Only this thread's connection; in synchronous mode _write
+                # runs in the request thread, whose connection is in use.
+                close_old_connections()
+                self._write(batch)
+                batch = []
+                deadline = None
+        if batch:
+            self._write(batch)
+        connection.close()
+
+    def _write(self, batch):
+        try:
+            try:
+                _insert(batch)
+            except IntegrityError:
+                # Most likely a visitor deleted since the request.
+                _insert(_without_missing_users(batch))
+        except Exception:
+            logger.exception('Failed to write %d visit log records', len(batch))
+            self._bump('failed', len(batch))
+        else:
+            self._bump('written', len(batch))
+            self._bump('batches')
+
+    def _bump(self, key, amount=1):
+        with self._lock:
+            self.stats[key] += amount
+
+
+@retry_on_locked()
+def _insert(batch):
+    VisitLog.objects.bulk_create([VisitLog(**record) for record in batch])
+
+
+def _without_missing_users(batch):
+    """``batch`` with the ids of users that no longer exist set to None."""
+    user_ids = {record['user_id'] for record in batch if record['user_id'] is not None}
+    existing = set(User.objects.filter(pk__in=user_ids).values_list('pk', flat=True))
+    return [
+        record if record['user_id'] is None or record['user_id'] in existing else dict(record, user_id=None)
+        for record in batch
+    ]
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_visit_log_writer():
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = VisitLogWriter(
+                    batch_size=getattr(settings, 'LIBRARY_VISIT_LOG_BATCH_SIZE', 200),
+                    flush_interval=getattr(settings, 'LIBRARY_VISIT_LOG_FLUSH_INTERVAL', 2.0),
+                    max_queue=getattr(settings, 'LIBRARY_VISIT_LOG_QUEUE_SIZE', 10000),
+                    background=getattr(settings, 'LIBRARY_VISIT_LOG_ASYNC', True),
+                )
+                atexit.register(_writer.shutdown)
+    return _writer
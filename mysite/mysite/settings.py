@@ -20,6 +20,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'library.middleware.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -49,10 +50,27 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'mysite.wsgi.application'
 
+DATABASE_PATH = os.environ.get('DJANGO_DB_PATH', BASE_DIR / 'db.sqlite3')
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': DATABASE_PATH,
+    }
+}
+
+# DJANGO_DB_PROFILE=production switches to WAL mode with tuned pragmas, a
+# single writer connection and a read-only alias (library.db).
+if os.environ.get('DJANGO_DB_PROFILE') == 'production':
+    from library.db import sqlite_production_databases
+
+    DATABASES = sqlite_production_databases(DATABASE_PATH)
+    DATABASE_ROUTERS = ['library.db.PrimaryReplicaRouter']
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('DJANGO_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('DJANGO_CACHE_LOCATION', 'library'),
     }
 }
 
@@ -79,3 +97,66 @@ LOGIN_REDIRECT_URL = '/'
 LOGOUT_REDIRECT_URL = '/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Buffered visit logging (library.visit_log.VisitLogWriter).
+LIBRARY_VISIT_LOG_ASYNC = True
+LIBRARY_VISIT_LOG_BATCH_SIZE = 200
+LIBRARY_VISIT_LOG_FLUSH_INTERVAL = 2.0
+LIBRARY_VISIT_LOG_QUEUE_SIZE = 10000
+
+# Catalog full-text search (library.search).
+LIBRARY_SEARCH_MAX_RESULTS = 1000
+
+# Cached home page statistics (library.stats).
+LIBRARY_STATS_CACHE = 'default'
+LIBRARY_HOME_STATS_TTL = 300
+LIBRARY_BOOK_CARD_TTL = 3600
+
+# Background jobs (library.jobs, run with `manage.py run_jobs`).
+# LIBRARY_PERIODIC_JOBS maps job names to their interval in seconds.
+LIBRARY_PERIODIC_JOBS = {
+    'mark_overdue': 900,
+    'expire_holds': 900,
+    'rollup_analytics': 3600,
+    'build_recommendations': 3600,
+}
+LIBRARY_JOB_BATCH_SIZE = 500
+LIBRARY_JOB_MAX_ATTEMPTS = 3
+LIBRARY_JOB_TIMEOUT = 600
+LIBRARY_JOB_POLL_INTERVAL = 5
+
+# Co-occurrence recommendations (library.recommendations,
+# `manage.py build_recommendations`). MIN_SUPPORT is the number of shared
+# readers two books need before one is suggested for the other.
+LIBRARY_RECOMMENDATION_NEIGHBORS = 10
+LIBRARY_RECOMMENDATIONS_PER_USER = 12
+LIBRARY_RECOMMENDATION_MIN_SUPPORT = 2
+LIBRARY_RECOMMENDATION_MIN_RATING = 3
+
+# Raw VisitLog retention (`manage.py prune_visit_logs`).
+LIBRARY_VISIT_LOG_RETENTION_DAYS = 90
+LIBRARY_VISIT_LOG_ARCHIVE_DIR = BASE_DIR / 'archive'
+
+# Responsive image derivatives (library.images).
+LIBRARY_IMAGE_WIDTHS = (160, 320, 640)
+# Largest profile picture upload accepted, in bytes and in pixels per side.
+LIBRARY_UPLOAD_MAX_BYTES = 5 * 1024 * 1024
+LIBRARY_UPLOAD_MAX_DIMENSION = 4096
+
+# Admin changelists count exactly up to this many rows, then estimate
+# (library.pagination.EstimatedCountPaginator).
+LIBRARY_ADMIN_EXACT_COUNT_LIMIT = 10000
+
+# Conditional GET / shared caching of anonymous catalog pages (library.conditional).
+LIBRARY_CATALOG_MAX_AGE = 60
+
+# Serve the catalog pages from the async views in library.async_views.
+# mysite/asgi.py turns this on; WSGI deployments keep the sync views.
+LIBRARY_ASYNC_VIEWS = os.environ.get('LIBRARY_ASYNC_VIEWS') == '1'
+
+# Per-view SQL instrumentation (library.middleware.QueryBudgetMiddleware).
+LIBRARY_QUERY_INSTRUMENTATION = os.environ.get('LIBRARY_QUERY_INSTRUMENTATION') == '1'
+LIBRARY_QUERY_BUDGET = None
+LIBRARY_QUERY_BUDGETS = {}
+LIBRARY_QUERY_DUPLICATE_THRESHOLD = 3
+LIBRARY_QUERY_BUDGET_STRICT = False
@@ -38,8 +38,51 @@ document.addEventListener('DOMContentLoaded', function () {
             observer.observe(el);
         });
     }
+
+    // Search-as-you-type suggestions for the catalog search box
+    const searchInput = document.querySelector('input[data-autocomplete-url]');
+    if (searchInput) {
+        setupAutocomplete(searchInput);
+    }
 });
 
+/**
+ * Fill the input's datalist with title/author suggestions as the user types.
+ * @param {HTMLInputElement} input - Search input with a data-autocomplete-url attribute.
+ */
+function setupAutocomplete(input) {
+    const datalist = document.getElementById(input.getAttribute('list'));
+    const url = input.getAttribute('data-autocomplete-url');
+    let timer = null;
+    let controller = null;
+
+    input.addEventListener('input', function () {
+        clearTimeout(timer);
+        const query = input.value.trim();
+        if (query.length < 2) {
+            datalist.innerHTML = '';
+            return;
+        }
+        timer = setTimeout(function () {
+            if (controller) {
+                controller.abort();
+            }
+            controller = new AbortController();
+            fetch(url + '?q=' + encodeURIComponent(query), { signal: controller.signal })
+                .then(function (response) { return response.json(); })
+                .then(function (data) {
+                    datalist.innerHTML = '';
+                    data.suggestions.forEach(function (suggestion) {
+                        const option = document.createElement('option');
+                        option.value = suggestion.label;
+                        datalist.appendChild(option);
+                    });
+                })
+                .catch(function () {});
+        }, 150);
+    });
+}
+
 /**
  * Animate a number counting up from 0 to its data-count value.
  * @param {HTMLElement} element - The element to animate.